@@ -0,0 +1,219 @@
+"""Time the stages of the design pipeline on synthetic surfaces and images, without Rhino.
+
+    python benchmarks/bench_pipeline.py [--scales 1000 10000 100000] [--surfaces saddle cylinder panel]
+                                        [--stages grid bubbles image combine] [--output PATH] [--compare PATH]
+
+Every stage runs on every surface at every scale, the approximate number of tiles, from a cold surface registry:
+
+- ``grid``: :meth:`GridLayer.generate`, with the tile diameter chosen to give the number of tiles.
+- ``bubbles``: :meth:`BubblesFromCurveLayer.generate`, with as many bubbles along an isocurve.
+  The relaxation compares all pairs of bubbles, so it only runs up to ``--max-bubbles``.
+- ``image``: :meth:`ImageLayer.alter` of the grid layer, with a synthetic image.
+- ``combine``: :meth:`TileDesign.combine_layers` of a coarser grid layer on top of the grid layer.
+
+Every stage is timed once, then run again with :mod:`tracemalloc` for its peak of memory, unless ``--no-memory``.
+The results are written as JSON, with the commit and the versions they were measured with,
+and ``--compare`` prints the speedup over the results of an earlier run.
+"""
+from __future__ import print_function
+
+import argparse
+import math
+import time
+import tracemalloc
+
+import numpy as np
+from compas.colors import Color
+
+from compas_urt.design import TileDesign
+from compas_urt.design.altering import ImageLayer
+from compas_urt.design.generative import BubblesFromCurveLayer
+from compas_urt.design.generative import GridLayer
+from compas_urt.design.registry import clear_registry
+from compas_urt.design.surfaces_numpy import CylinderSurface
+from compas_urt.design.surfaces_numpy import IsoCurve
+from compas_urt.design.surfaces_numpy import PanelSurface
+from compas_urt.design.surfaces_numpy import SaddleSurface
+
+from benchmark_results import load_results
+from benchmark_results import write_results
+
+SURFACES = {
+    "saddle": lambda: SaddleSurface(size_u=4000.0, size_v=4000.0, height=800.0),
+    "cylinder": lambda: CylinderSurface(radius=2000.0, height=4000.0, angle=math.pi),
+    "panel": lambda: PanelSurface(size_u=4000.0, size_v=4000.0, height=600.0),
+}
+
+STAGES = ["grid", "bubbles", "image", "combine"]
+
+GRID_OPTIONS = {
+    "pack_type": "hexagonal",
+    "curve_type": "isocurves",
+    "uniform": True,
+    "param_density": 1,
+    "flip_curves": False,
+    "flip_frame": False,
+    "debug_geometry": False,
+    "seed": 0,
+}
+
+TILE_JOINT = 2.0
+TILE_THICKNESS = 5.0
+
+# the number of image quads in each direction, and the size of the synthetic image in pixels
+IMAGE_QUADS = 32
+IMAGE_SIZE = 256
+
+
+class SyntheticImage(object):
+    """An image with the interface of :class:`~compas_urt.design.load_image.LoadedImage`,
+    with concentric rings over a diagonal gradient, so that neighbouring quads get different colors."""
+
+    def __init__(self, size=IMAGE_SIZE):
+        self.width = self.height = size
+        x, y = np.meshgrid(np.linspace(0, 1, size), np.linspace(0, 1, size), indexing="ij")
+        rings = 0.5 + 0.5 * np.cos(40 * np.hypot(x - 0.5, y - 0.5))
+        self.pixels = {}
+        for i in range(size):
+            for j in range(size):
+                self.pixels[i, j] = Color(x[i, j], y[i, j], rings[i, j])
+
+
+def surface_area(surface, resolution=256):
+    # the area of the surface from its vectorized evaluation on a UV grid
+    u, v = np.meshgrid(np.linspace(0, 1, resolution + 1), np.linspace(0, 1, resolution + 1), indexing="ij")
+    points = surface._evaluate(u, v)
+    du = points[1:, :-1] - points[:-1, :-1]
+    dv = points[:-1, 1:] - points[:-1, :-1]
+    return float(np.linalg.norm(np.cross(du, dv), axis=-1).sum())
+
+
+def tile_diameter(surface, count):
+    # the diameter of the tiles of a hexagonal packing of about count tiles on the surface
+    pitch = math.sqrt(surface_area(surface) / (count * math.sqrt(3) / 2))
+    return pitch - TILE_JOINT
+
+
+def grid_layer(surface, count):
+    return GridLayer(surface, tile_diameter(surface, count), TILE_THICKNESS, TILE_JOINT, options=dict(GRID_OPTIONS))
+
+
+def bubbles_layer(surface, count):
+    curve = IsoCurve(surface, "u", 0.5)
+    spacing = curve.length() / count
+    return BubblesFromCurveLayer(
+        surface,
+        curve,
+        count,
+        TILE_JOINT,
+        effect_factor=1.0,
+        xsize_domain=(0.4 * spacing, 0.6 * spacing),
+        ysize_domain=(0.4 * spacing, 0.6 * spacing),
+        options={"seed": 0, "debug_geometry": False},
+    )
+
+
+def prepare(stage, name, count, image):
+    """Set up a stage on a new surface, outside of the measured time.
+
+    Returns
+    -------
+    tuple[callable, callable]
+        The stage to measure, and a function returning the number of items it produced.
+    """
+    clear_registry()
+    surface = SURFACES[name]()
+
+    if stage == "grid":
+        layer = grid_layer(surface, count)
+        return layer.generate, lambda: len(layer.tiles)
+
+    if stage == "bubbles":
+        layer = bubbles_layer(surface, count)
+        return layer.generate, lambda: len(layer.bubbles)
+
+    layer = grid_layer(surface, count)
+    layer.generate()
+
+    if stage == "image":
+        image_layer = ImageLayer(surface, image)
+        result = []
+
+        def alter():
+            result.append(image_layer.alter(layer, IMAGE_QUADS, IMAGE_QUADS, False, None, False))
+
+        return alter, lambda: len(result[0].tiles)
+
+    if stage == "combine":
+        top = grid_layer(surface, max(count // 10, 10))
+        top.generate()
+        design = TileDesign()
+        result = []
+
+        def combine():
+            result.extend(design.combine_layers(top, layer))
+
+        return combine, lambda: len(result[0].tiles) + len(result[1].tiles)
+
+    raise Exception("Unknown stage: {}".format(stage))
+
+
+def measure(stage, name, count, image, memory=True):
+    run, items = prepare(stage, name, count, image)
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+    result = {"stage": stage, "surface": name, "scale": count, "items": items(), "seconds": seconds, "peak_mb": None}
+
+    if memory:
+        run, _ = prepare(stage, name, count, image)
+        tracemalloc.start()
+        try:
+            run()
+            result["peak_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def key(result):
+    return result["stage"], result["surface"], result["scale"]
+
+
+def main(args):
+    image = SyntheticImage() if "image" in args.stages else None
+    previous = {key(result): result for result in load_results(args.compare)} if args.compare else {}
+    results = []
+
+    row = "{:<8} {:<9} {:>8} {:>8} {:>10} {:>9} {:>8}"
+    print(row.format("stage", "surface", "scale", "items", "seconds", "peak MB", "speedup"))
+    for count in args.scales:
+        for name in args.surfaces:
+            for stage in args.stages:
+                if stage == "bubbles" and count > args.max_bubbles:
+                    continue
+                result = measure(stage, name, count, image, not args.no_memory)
+                results.append(result)
+
+                before = previous.get((stage, name, count))
+                speedup = "{:.2f}x".format(before["seconds"] / result["seconds"]) if before else "-"
+                peak = "-" if result["peak_mb"] is None else "{:.1f}".format(result["peak_mb"])
+                print(
+                    "{:<8} {:<9} {:>8} {:>8} {:>10.3f} {:>9} {:>8}".format(
+                        stage, name, count, result["items"], result["seconds"], peak, speedup
+                    )
+                )
+
+    write_results("pipeline", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000, 100000], help="approximate tile counts")
+    parser.add_argument("--surfaces", nargs="+", choices=sorted(SURFACES), default=["saddle", "cylinder", "panel"])
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--max-bubbles", type=int, default=1000, help="largest scale of the bubbles stage")
+    parser.add_argument("--no-memory", action="store_true", help="skip the second run measuring the memory peaks")
+    parser.add_argument("--output", help="the JSON file of the results, by default in benchmarks/results")
+    parser.add_argument("--compare", help="the JSON file of earlier results, to print the speedup over")
+    main(parser.parse_args())
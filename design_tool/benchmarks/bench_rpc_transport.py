@@ -0,0 +1,79 @@
+"""Compare the round trip of array payloads to a compute server, as JSON, inline binary and through files.
+
+    python benchmarks/bench_rpc_transport.py [--counts 1000000] [--repeat 5] [--output PATH] [--compare PATH]
+
+Every call sends ``count`` floats to the server and gets them back.
+The results are written as JSON, like those of ``bench_pipeline.py``,
+and ``--compare`` prints the speedup over the results of an earlier run.
+"""
+from __future__ import print_function
+
+import argparse
+import time
+
+import numpy as np
+from compas.rpc import Proxy
+
+from compas_urt.rpc import ComputeProxy
+
+from benchmark_results import load_results
+from benchmark_results import write_results
+
+TRANSPORTS = ["json", "inline", "file"]
+
+
+def timed(call, repeat):
+    call()  # warm up, e.g. the imports of the server
+    start = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - start) / repeat
+
+
+def key(result):
+    return result["transport"], result["count"]
+
+
+def main(args):
+    previous = {key(result): result for result in load_results(args.compare)} if args.compare else {}
+    results = []
+
+    # the default compas.rpc service, with the values as JSON lists
+    json_proxy = Proxy("numpy", port=17550, autoreload=False)
+    # one proxy per transport, all connected to the same server
+    compute_proxies = {transport: ComputeProxy(port=17551, transport=transport) for transport in ("inline", "file")}
+    try:
+        for count in args.counts:
+            values = np.random.default_rng(0).uniform(-1000, 1000, (count // 3, 3))
+            calls = {"json": lambda: json_proxy.ascontiguousarray(values.tolist())}
+            for transport, proxy in compute_proxies.items():
+                calls[transport] = lambda proxy=proxy: proxy.run_batch([("numpy.ascontiguousarray", [values], {})])
+
+            print("{} floats, mean of {} round trips".format(values.size, args.repeat))
+            print("{:<8} {:>10} {:>8} {:>8}".format("", "seconds", "vs json", "speedup"))
+            seconds = {}
+            for transport in TRANSPORTS:
+                seconds[transport] = timed(calls[transport], args.repeat)
+                results.append({"transport": transport, "count": int(values.size), "seconds": seconds[transport]})
+
+                before = previous.get((transport, values.size))
+                speedup = "{:.2f}x".format(before["seconds"] / seconds[transport]) if before else "-"
+                print(
+                    "{:<8} {:>10.3f} {:>7.1f}x {:>8}".format(
+                        transport, seconds[transport], seconds["json"] / seconds[transport], speedup
+                    )
+                )
+    finally:
+        json_proxy.stop_server()
+        compute_proxies["inline"].stop_server()
+
+    write_results("rpc_transport", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--counts", type=int, nargs="+", default=[1000000], help="the numbers of floats per call")
+    parser.add_argument("--repeat", type=int, default=5, help="the number of measured round trips")
+    parser.add_argument("--output", help="the JSON file of the results, by default in benchmarks/results")
+    parser.add_argument("--compare", help="the JSON file of earlier results, to print the speedup over")
+    main(parser.parse_args())
@@ -0,0 +1,81 @@
+"""Measure the memory of the tiles, compared with tiles holding their own frame and colour objects.
+
+    python benchmarks/bench_tile_memory.py [count]
+
+The reference tiles have the attributes in an instance dictionary, a :class:`compas.geometry.Frame`
+and a :class:`compas.colors.Color` per tile, as before the tiles were slotted.
+The memory is measured with :mod:`tracemalloc`, including the frames and the uv parameters.
+"""
+from __future__ import print_function
+
+import random
+import sys
+import tracemalloc
+
+from compas.colors import Color
+from compas.geometry import Frame
+
+from compas_urt.design import RoundTile
+from compas_urt.design.palette import palette_color
+
+COLORS = [(0.9, 0.2, 0.1), (0.1, 0.5, 0.9), (0.95, 0.95, 0.9), (0.2, 0.2, 0.2)]
+
+
+class ReferenceTile(object):
+    def __init__(self, base_frame, diameter, thickness, uv_param, color, tag=None):
+        self.base_frame = base_frame
+        self.thickness = thickness
+        self.uv_param = uv_param
+        self.color = color
+        self.diameter = diameter
+        self.tag = tag
+
+
+def random_frames(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        (
+            [rng.uniform(0, 5000), rng.uniform(0, 5000), rng.uniform(0, 500)],
+            [1, rng.uniform(-0.2, 0.2), rng.uniform(-0.2, 0.2)],
+            [rng.uniform(-0.2, 0.2), 1, rng.uniform(-0.2, 0.2)],
+            [rng.random(), rng.random()],
+            rng.choice(COLORS),
+        )
+        for _ in range(count)
+    ]
+
+
+def reference_tile(point, xaxis, yaxis, uv, rgb):
+    return ReferenceTile(Frame(point, xaxis, yaxis), 50.0, 5.0, tuple(uv), Color(*rgb))
+
+
+def slotted_tile(point, xaxis, yaxis, uv, rgb):
+    return RoundTile(Frame(point, xaxis, yaxis), 50.0, 5.0, tuple(uv), palette_color(*rgb))
+
+
+def measure(factory, values):
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    tiles = [factory(*value) for value in values]
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return size / float(len(tiles))
+
+
+def main(count):
+    values = random_frames(count)
+    # create the shared palette colours before measuring
+    for rgb in COLORS:
+        palette_color(*rgb)
+
+    reference = measure(reference_tile, values)
+    slotted = measure(slotted_tile, values)
+
+    print("{} tiles".format(count))
+    print("{:<10} {:>12}".format("", "bytes/tile"))
+    print("{:<10} {:>12.0f}".format("reference", reference))
+    print("{:<10} {:>12.0f} {:>8.1f}x".format("slotted", slotted, reference / slotted))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,90 @@
+"""Compare the binary tile file with COMPAS JSON, in size and in read and write time.
+
+    python benchmarks/bench_tilefile.py [count]
+"""
+from __future__ import print_function
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+import compas
+from compas.geometry import Frame
+
+from compas_urt.design import RoundTile
+from compas_urt.design.palette import palette_color
+from compas_urt.design.tilefile_numpy import TileWriter
+from compas_urt.design.tilefile_numpy import read_arrays
+from compas_urt.design.tilefile_numpy import read_tiles
+
+
+def random_tiles(count, seed=0):
+    rng = random.Random(seed)
+    colors = [palette_color(rng.random(), rng.random(), rng.random()) for _ in range(8)]
+    tiles = []
+    for _ in range(count):
+        frame = Frame(
+            [rng.uniform(0, 5000), rng.uniform(0, 5000), rng.uniform(0, 500)],
+            [1, rng.uniform(-0.2, 0.2), rng.uniform(-0.2, 0.2)],
+            [rng.uniform(-0.2, 0.2), 1, rng.uniform(-0.2, 0.2)],
+        )
+        tile = RoundTile(frame, rng.choice([40.0, 50.0, 60.0]), 5.0, (rng.random(), rng.random()), rng.choice(colors))
+        tiles.append(tile)
+    return tiles
+
+
+def tile_to_data(tile):
+    # what serializing a design with compas JSON stores per tile
+    return {
+        "base_frame": tile.base_frame,
+        "diameter": tile.diameter,
+        "thickness": tile.thickness,
+        "uv_param": list(tile.uv_param),
+        "color": tile.color,
+        "tag": tile.tag,
+    }
+
+
+def timed(function, *args):
+    start = time.time()
+    result = function(*args)
+    return result, time.time() - start
+
+
+def main(count):
+    tiles = random_tiles(count)
+    directory = tempfile.mkdtemp()
+    json_path = os.path.join(directory, "design.json")
+    binary_path = os.path.join(directory, "design.tiles")
+
+    def write_json():
+        compas.json_dump([tile_to_data(tile) for tile in tiles], json_path)
+
+    def write_binary():
+        with TileWriter(binary_path) as writer:
+            writer.write_tiles(tiles)
+
+    _, json_write = timed(write_json)
+    _, json_read = timed(compas.json_load, json_path)
+    _, binary_write = timed(write_binary)
+    _, arrays_read = timed(read_arrays, binary_path)
+    _, tiles_read = timed(read_tiles, binary_path)
+
+    print("{} tiles".format(count))
+    print("{:<8} {:>10} {:>10} {:>14} {:>14}".format("", "size MB", "write s", "read arrays s", "read tiles s"))
+    print(
+        "{:<8} {:>10.2f} {:>10.3f} {:>14} {:>14.3f}".format(
+            "json", os.path.getsize(json_path) / 1e6, json_write, "-", json_read
+        )
+    )
+    print(
+        "{:<8} {:>10.2f} {:>10.3f} {:>14.3f} {:>14.3f}".format(
+            "binary", os.path.getsize(binary_path) / 1e6, binary_write, arrays_read, tiles_read
+        )
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,65 @@
+"""Write the results of the benchmarks as JSON, with the commit and the versions they were measured with."""
+from __future__ import print_function
+
+import datetime
+import json
+import os
+import platform
+import subprocess
+import time
+
+import compas
+import numpy as np
+
+RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def environment():
+    # what the results were measured with, to compare runs over time
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=os.path.dirname(__file__)
+        ).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "compas": compas.__version__,
+        "machine": platform.machine(),
+        "system": platform.system(),
+    }
+
+
+def write_results(name, results, output=None):
+    """Write the results of a benchmark, by default to a new file in benchmarks/results.
+
+    Parameters
+    ----------
+    name : str
+        The name of the benchmark, the prefix of the default file name.
+    results : list[dict]
+        One dict per measurement.
+    output : str, optional
+        The path of the file.
+
+    Returns
+    -------
+    str
+        The path of the file.
+    """
+    if output is None:
+        if not os.path.isdir(RESULTS):
+            os.makedirs(RESULTS)
+        output = os.path.join(RESULTS, "{}_{}.json".format(name, time.strftime("%Y%m%d_%H%M%S")))
+    with open(output, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print("Results written to {}".format(output))
+    return output
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)["results"]
@@ -0,0 +1,105 @@
+"""Check the import time of compas_urt, and that Rhino and Grasshopper are only loaded where needed.
+
+    python benchmarks/check_import_time.py [--budget MILLISECONDS]
+
+Every module is imported in a fresh interpreter with ``-X importtime``, after COMPAS itself,
+whose import time is not ours to cut. The check fails, with exit code 1, if the compas_urt modules
+take longer than the budget to import, or if any of them imports a Rhino or Grasshopper module.
+"""
+from __future__ import print_function
+
+import argparse
+import subprocess
+import sys
+
+# the modules imported by the plugin discovery of COMPAS, and the entry points of the package
+MODULES = [
+    "compas_urt",
+    "compas_urt.rhino.install",
+    "compas_urt.ghpython",
+    "compas_urt.design.load_image",
+    "compas_urt.design",
+    "compas_urt.design.generative",
+    "compas_urt.design.altering",
+    "compas_urt.design.multiface",
+    "compas_urt.design.sweep",
+    "compas_urt.rpc",
+]
+
+# the modules that only exist inside Rhino, and must be imported inside the functions that need them
+FORBIDDEN = ["Rhino", "System", "scriptcontext", "rhinoscriptsyntax", "Grasshopper", "compas_rhino", "compas_ghpython"]
+
+# the import time budget of a module in milliseconds, not counting COMPAS
+BUDGET = 50.0
+
+
+# imports COMPAS, then the module, and prints the names of the modules it loaded
+CODE = """
+import sys
+import compas, compas.geometry, compas.rpc
+before = set(sys.modules)
+import {}
+print(" ".join(sorted(set(sys.modules) - before)))
+"""
+
+
+def import_module(module):
+    """Import a module in a fresh interpreter.
+
+    Returns
+    -------
+    tuple[dict[str, int], list[str], str]
+        The time in microseconds spent in every module itself, by name,
+        including failed imports, the names of the loaded modules, and the error if the import failed.
+    """
+    command = [sys.executable, "-X", "importtime", "-c", CODE.format(module)]
+    process = subprocess.run(command, capture_output=True, text=True)
+    if process.returncode:
+        return {}, [], process.stderr.strip().splitlines()[-1]
+
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, _, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(own)
+    return times, process.stdout.split(), None
+
+
+def own_time(times):
+    # the time in milliseconds spent in the compas_urt modules themselves
+    return sum(time for name, time in times.items() if name.split(".")[0] == "compas_urt") / 1000.0
+
+
+def forbidden_modules(loaded):
+    return sorted(name for name in loaded if name.split(".")[0] in FORBIDDEN)
+
+
+def main(budget):
+    failures = []
+    print("{:<32} {:>10} {:>8}".format("module", "own ms", "modules"))
+    for module in MODULES:
+        times, loaded, error = import_module(module)
+        if error:
+            failures.append("{} cannot be imported: {}".format(module, error))
+            continue
+        total = own_time(times)
+        count = len([name for name in times if name.split(".")[0] == "compas_urt"])
+        print("{:<32} {:>10.1f} {:>8}".format(module, total, count))
+
+        if total > budget:
+            failures.append("{} takes {:.1f} ms to import, over the budget of {} ms".format(module, total, budget))
+        forbidden = forbidden_modules(loaded)
+        if forbidden:
+            failures.append("{} imports {}".format(module, ", ".join(forbidden)))
+
+    for failure in failures:
+        print("FAILED: " + failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget", type=float, default=BUDGET, help="import time budget of a module in milliseconds")
+    args = parser.parse_args()
+    sys.exit(main(args.budget))
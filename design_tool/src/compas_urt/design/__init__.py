@@ -4,18 +4,20 @@ from __future__ import print_function
 
 import math as m
 import random
+from array import array
 from copy import copy
-from copy import deepcopy
 
-from compas.colors import Color
+import compas
 from compas.geometry import Frame
 from compas.geometry import KDTree
 from compas.geometry import Line
 from compas.geometry import Plane
+from compas.geometry import Surface
 from compas.geometry import allclose
-from compas_rhino.conversions import RhinoCurve
-from compas_rhino.conversions import RhinoSurface
-from compas_rhino.conversions import frame_to_rhino
+
+from compas_urt.design.palette import WHITE
+from compas_urt.design.palette import to_palette
+from compas_urt.design.registry import shared_surface
 
 
 class TileDesign(object):
@@ -24,19 +26,56 @@ class TileDesign(object):
         self.tiles = []
 
     def add_layer(self, layer):
-        self.tiles.extend(layer.tiles)
+        """Add a layer to the design.
+
+        The layer can also be the specification of a layer, which is generated later,
+        together with the other specifications, by :meth:`generate_layers`.
+
+        Parameters
+        ----------
+        layer : :class:`DesignLayer` | :class:`LayerSpec`
+        """
         self.layers.append(layer)
-        self.pack()
+        if not isinstance(layer, LayerSpec):
+            self.tiles.extend(layer.tiles)
+
+    def generate_layers(self, processes=None):
+        """Generate the layers that were added as specifications.
+
+        The specifications are independent of each other, and are generated concurrently in a process pool.
+        The generated layers replace their specifications, so the layers and the tiles of the design
+        stay in the order of :meth:`add_layer`, whatever order the layers finish in.
+
+        Parameters
+        ----------
+        processes : int, optional
+            The number of worker processes, by default the number of CPUs.
+            With a single process, or in IronPython, the layers are generated in the current process.
+        """
+        pending = [index for index, layer in enumerate(self.layers) if isinstance(layer, LayerSpec)]
+        specs = [self.layers[index] for index in pending]
+
+        if processes == 1 or len(specs) < 2 or compas.IPY:
+            layers = [generate_layer(spec) for spec in specs]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                layers = list(executor.map(generate_layer, specs))
+
+        for index, layer in zip(pending, layers):
+            self.layers[index] = layer
+        self.tiles = [tile for layer in self.layers for tile in layer.tiles]
 
     def combine_layers(self, layer_top, layer_bottom):
         """This function handles interactions between same layer-type and different layer-type stacking"""
 
-        tiles_bottom_centers = [tile_bottom.base_frame.point for tile_bottom in layer_bottom.tiles]
+        tiles_bottom_centers = [tile_bottom.center for tile_bottom in layer_bottom.tiles]
         kdtree = KDTree(tiles_bottom_centers)
 
         indices_to_pop_bottom = []
         for tile_top in layer_top.tiles:
-            nearest_neighbors = kdtree.nearest_neighbors(tile_top.base_frame.point, 15, True)
+            nearest_neighbors = kdtree.nearest_neighbors(tile_top.center, 15, True)
             for nearest_neighbor in nearest_neighbors:
                 neighbor_center, neighbor_index, neighbor_dist = (
                     nearest_neighbor[0],
@@ -49,9 +88,9 @@ class TileDesign(object):
                     # layer_bottom.tiles.pop(neighbor_index)
                     indices_to_pop_bottom.append(neighbor_index)
 
-        indices_to_pop_bottom_sorted = sorted(indices_to_pop_bottom)
+        # a bottom tile can be covered by several top tiles, but is only removed once
+        indices_to_pop_bottom_sorted = sorted(set(indices_to_pop_bottom))
 
-        print(list(reversed(indices_to_pop_bottom_sorted)))
         # pop things reversed, so you don't have a shifting-list-wrong-element-all-the-time-fuckup
         layer_bottom_copy = copy(layer_bottom)
         layer_bottom_copy.tiles = layer_bottom_copy.tiles[:]
@@ -59,38 +98,409 @@ class TileDesign(object):
             layer_bottom_copy.tiles.pop(neighbor_index)
         return layer_top, layer_bottom_copy
 
+    def coverage(self, resolution=256):
+        """Measure how well the tiles of the design cover the surface.
+
+        All tiles are assumed to lie on the surface of the first layer.
+        See :meth:`DesignLayer.coverage`.
+
+        Parameters
+        ----------
+        resolution : int, optional
+            The number of samples of the surface raster in each direction.
+
+        Returns
+        -------
+        tuple[float, float, ndarray]
+            The covered fraction of the surface area, the diameter of the largest uncovered disk,
+            and the gap heatmap (resolution, resolution).
+        """
+        from compas_urt.design.analysis_numpy import tile_coverage
+
+        if not self.layers:
+            raise Exception("The design has no layers.")
+
+        covered_fraction, largest_gap, gaps = tile_coverage(self.tiles, self.layers[0].uv_raster(resolution))
+        return covered_fraction, largest_gap, gaps
+
+    def seating_deviation(self, tolerance, rim_samples=16, resolution=256):
+        """Measure how far the rims of the flat tiles are off the surface of their layer.
+
+        The rims of all tiles of a layer are sampled at once, and their distances to the surface
+        are measured on a UV raster of it.
+
+        Parameters
+        ----------
+        tolerance : float
+            The largest acceptable gap between a rim and the surface.
+        rim_samples : int, optional
+            The number of points per rim.
+        resolution : int, optional
+            The number of samples of the surface raster in each direction.
+
+        Returns
+        -------
+        tuple[list[float], list[float], list[int]]
+            The maximum and the mean gap per tile, in the order of :attr:`tiles`,
+            and the indices of the tiles with a maximum gap above the tolerance.
+        """
+        from compas_urt.design.analysis_numpy import tile_seating_deviation
+
+        max_deviations = []
+        mean_deviations = []
+        flagged = []
+        for layer in self.layers:
+            layer_max, layer_mean, layer_flagged = tile_seating_deviation(
+                layer.tiles, layer.uv_raster(resolution), rim_samples=rim_samples, tolerance=tolerance
+            )
+            flagged.extend(index + len(max_deviations) for index in layer_flagged)
+            max_deviations.extend(layer_max.tolist())
+            mean_deviations.extend(layer_mean.tolist())
+
+        return max_deviations, mean_deviations, flagged
+
+
+# surfaces deserialized in the current process, by their json string
+_SURFACES = {}
+
+
+def load_surface(surface_json):
+    """Deserialize a surface, once per process.
+
+    Parameters
+    ----------
+    surface_json : str
+        The surface serialized with :func:`compas.json_dumps`.
+
+    Returns
+    -------
+    :class:`compas.geometry.Surface`
+    """
+    if surface_json not in _SURFACES:
+        _SURFACES[surface_json] = compas.json_loads(surface_json)
+    return _SURFACES[surface_json]
+
+
+class LayerSpec(object):
+    """Picklable specification of a design layer.
+
+    The specification holds the class of the layer, its surface serialized to JSON and its arguments,
+    so that the layer can be created and generated in another process.
+    The surface has to be a serializable COMPAS surface, e.g. one of :mod:`compas_urt.design.surfaces_numpy`,
+    and the arguments have to be picklable.
+
+    Parameters
+    ----------
+    layer_cls : type
+        The class of the layer, e.g. :class:`~compas_urt.design.generative.GridLayer`.
+    surface : :class:`compas.geometry.Surface` | str
+        The surface, or its serialization to JSON.
+    options : dict, optional
+        The options of the layer.
+    **arguments : dict, optional
+        The other arguments of the constructor of the layer.
+
+    """
+
+    def __init__(self, layer_cls, surface, options=None, **arguments):
+        self.layer_cls = layer_cls
+        if isinstance(surface, Surface):
+            surface = compas.json_dumps(surface)
+        self.surface = surface
+        self.options = options or {}
+        self.arguments = arguments
+
+    def create(self):
+        """Create the layer, without generating it.
+
+        Returns
+        -------
+        :class:`DesignLayer`
+        """
+        return self.layer_cls(load_surface(self.surface), options=dict(self.options), **self.arguments)
+
+
+def generate_layer(spec):
+    """Create and generate the layer of a specification.
+
+    Parameters
+    ----------
+    spec : :class:`LayerSpec`
+
+    Returns
+    -------
+    :class:`DesignLayer`
+    """
+    layer = spec.create()
+    layer.generate()
+    return layer
+
+
+def spatial_functions():
+    """Get the module of the overlap functions: NumPy in CPython, pure Python in IronPython.
+
+    Returns
+    -------
+    module
+        :mod:`compas_urt.design.spatial_numpy`, or :mod:`compas_urt.design.spatial` in IronPython.
+    """
+    if compas.IPY:
+        from compas_urt.design import spatial
+
+        return spatial
+    from compas_urt.design import spatial_numpy
+
+    return spatial_numpy
+
+
+def _tolist(values):
+    # the results of the overlap functions as lists, from arrays or lists
+    return values.tolist() if hasattr(values, "tolist") else list(values)
+
+
+class _TileFrame(Frame):
+    # the base frame of a tile, built from its frame values on every access,
+    # changing it would not move the tile, so it raises instead of silently doing nothing
+
+    def __init__(self, point, xaxis, yaxis, **kwargs):
+        self._frozen = False
+        super(_TileFrame, self).__init__(point, xaxis, yaxis, **kwargs)
+        self._frozen = True
+
+    def _check_frozen(self):
+        if self._frozen:
+            raise Exception(
+                "The base frame of a tile cannot be changed in place. "
+                "Assign a new frame to tile.base_frame, or change a copy of the frame."
+            )
+
+    @property
+    def dtype(self):
+        return "compas.geometry/Frame"
+
+    @property
+    def point(self):
+        return self._point
+
+    @point.setter
+    def point(self, point):
+        self._check_frozen()
+        Frame.point.fset(self, point)
+
+    @property
+    def xaxis(self):
+        return self._xaxis
+
+    @xaxis.setter
+    def xaxis(self, vector):
+        self._check_frozen()
+        Frame.xaxis.fset(self, vector)
+
+    @property
+    def yaxis(self):
+        return self._yaxis
+
+    @yaxis.setter
+    def yaxis(self, vector):
+        self._check_frozen()
+        Frame.yaxis.fset(self, vector)
+
+    def copy(self, cls=None):
+        return super(_TileFrame, self).copy(cls or Frame)
+
+    def __reduce__(self):
+        # pickled and deep copied as a plain frame
+        return Frame, (list(self.point), list(self.xaxis), list(self.yaxis))
+
 
 class Tile(object):
+    """Base class of the tiles.
+
+    The tiles are slotted, and store their base frame as a flat array of doubles,
+    which brings the memory of a round tile down from about 1040 to about 290 bytes
+    (measured with :mod:`tracemalloc` on 20k tiles in CPython 3, including the frame and the uv parameters,
+    see ``benchmarks/bench_tile_memory.py``).
+    The colours are the shared instances of :mod:`compas_urt.design.palette`.
+
+    Parameters
+    ----------
+    base_frame : :class:`compas.geometry.Frame`
+        The frame of the bottom face of the tile.
+    thickness : float
+        The thickness of the tile.
+    uv_param : tuple[float, float]
+        The surface parameters of the tile.
+    color : :class:`compas.colors.Color`
+        The colour of the tile.
+
+    Attributes
+    ----------
+    base_frame : :class:`compas.geometry.Frame`
+        A new frame on every access. Assign a frame to move the tile.
+        The returned frame raises on changes, e.g. ``tile.base_frame.point = point``, use a copy to change it.
+    frame_values : :class:`array.array`
+        The point, the X axis and the Y axis of the base frame, as 9 doubles.
+
+    """
+
+    __slots__ = ("frame_values", "thickness", "uv_param", "_color")
+
     def __init__(self, base_frame, thickness, uv_param, color):
         self.base_frame = base_frame
         self.thickness = thickness
         self.uv_param = uv_param
         self.color = color
 
+    @property
+    def base_frame(self):
+        values = self.frame_values
+        return _TileFrame(values[0:3], values[3:6], values[6:9])
+
+    @base_frame.setter
+    def base_frame(self, frame):
+        self.frame_values = array(
+            "d", [value for vector in (frame.point, frame.xaxis, frame.yaxis) for value in vector]
+        )
+
+    @property
+    def center(self):
+        """tuple[float, float, float] : The origin of the base frame."""
+        return tuple(self.frame_values[0:3])
+
+    @property
+    def color(self):
+        return self._color
+
+    @color.setter
+    def color(self, color):
+        self._color = to_palette(color)
+
     @property
     def pickup_frame(self):
-        move_vector = self.base_frame.normal.unitized() * self.thickness
-        pickup_frame = deepcopy(self.base_frame)
+        values = self.frame_values
+        pickup_frame = Frame(values[0:3], values[3:6], values[6:9])
+        move_vector = pickup_frame.normal.unitized() * self.thickness
         pickup_frame.point += move_vector
         pickup_frame.xaxis *= -1
         return pickup_frame
 
 
 class RoundTile(Tile):
-    def __init__(self, base_frame, diameter, thickness, uv_param, color=Color.white(), tag=None):
+    __slots__ = ("diameter", "tag")
+
+    def __init__(self, base_frame, diameter, thickness, uv_param, color=WHITE, tag=None):
         super(RoundTile, self).__init__(base_frame, thickness, uv_param, color)
         self.diameter = diameter
         self.tag = tag
 
+    @classmethod
+    def from_values(cls, frame_values, diameter, thickness, uv_param, color=WHITE, tag=None):
+        """Create a round tile from the values of its base frame, without creating the frame.
+
+        Parameters
+        ----------
+        frame_values : sequence[float]
+            The point, the X axis and the Y axis of the base frame, as 9 floats.
+            The axes have to be orthonormal.
+
+        Returns
+        -------
+        :class:`RoundTile`
+        """
+        tile = cls.__new__(cls)
+        tile.frame_values = array("d", frame_values)
+        tile.thickness = thickness
+        tile.uv_param = uv_param
+        tile.color = color
+        tile.diameter = diameter
+        tile.tag = tag
+        return tile
+
 
 class DesignLayer(object):
-    def __init__(self, rhino_brep, options=None):
+    """Base class of the design layers.
+
+    Parameters
+    ----------
+    rhino_brep : :rhino:`Rhino.Geometry.Brep` | :class:`compas.geometry.Surface`
+        The surface to tile.
+        Outside of Rhino, a COMPAS surface can be used instead, e.g. one of
+        :mod:`compas_urt.design.surfaces_numpy`. Its domain is not trimmed, and the operations
+        that need the Brep itself, such as contours, are not available.
+        The surface is converted once and shared by all the layers on the same geometry,
+        see :mod:`compas_urt.design.registry`.
+    options : dict, optional
+        The options of the layer.
+    face_index : int, optional
+        The index of the face of the Brep to tile.
+        See :class:`~compas_urt.design.multiface.MultiFaceLayer` to tile all faces.
+
+    Attributes
+    ----------
+    shared_surface : :class:`~compas_urt.design.registry.SharedSurface`
+        The converted surface and its derived data, shared with the other layers on the same geometry.
+    rng : :class:`random.Random`
+        The random generator of the layer, seeded with the ``"seed"`` option.
+        It restarts from the seed on every generation, so that a seeded layer always gives the same tiles.
+
+    """
+
+    def __init__(self, rhino_brep, options=None, face_index=0):
         self.options = options or {}
-        self.rhino_brep = rhino_brep
-        self.compas_surface = RhinoSurface.from_geometry(self.rhino_brep).to_compas()
-        if self.compas_surface.u_domain[1] > 1 or self.compas_surface.v_domain[1] > 1:
-            raise Exception("Your surface is not reparameterized.")
+        self.face_index = face_index
+        self.rhino_brep = None if isinstance(rhino_brep, Surface) else rhino_brep
+        self.shared_surface = shared_surface(rhino_brep, face_index)
+        self.compas_surface = self.shared_surface.compas_surface
         self.tiles = []
+        self.rng = random.Random(self.options.get("seed"))
+
+    def reset_rng(self):
+        """Restart the random generator of the layer from the ``"seed"`` option."""
+        self.rng = random.Random(self.options.get("seed"))
+
+    def uv_raster(self, resolution):
+        """Get the surface of the layer sampled on a regular UV grid.
+
+        The rasters are cached per resolution, and shared by the raster based fields and analyses
+        of all the layers on the same surface.
+
+        Parameters
+        ----------
+        resolution : int
+            The number of samples in each direction.
+
+        Returns
+        -------
+        :class:`~compas_urt.design.raster_numpy.UVRaster`
+        """
+        from compas_urt.design.raster_numpy import UVRaster
+
+        return self.shared_surface.derived(("uv_raster", resolution), lambda: UVRaster(self.compas_surface, resolution))
+
+    def is_on_face(self, u, v):
+        """Check if surface parameters are inside of the trimmed face of the Brep.
+
+        Without a Brep, every parameter in the domain of the surface is inside.
+        """
+        if self.rhino_brep is None:
+            u_min, u_max = self.compas_surface.u_domain
+            v_min, v_max = self.compas_surface.v_domain
+            return u_min <= u <= u_max and v_min <= v <= v_max
+
+        import Rhino.Geometry as rg
+
+        relationship = self.rhino_brep.Faces[self.face_index].IsPointOnFace(u, v)
+        return relationship != rg.PointFaceRelation.Exterior
+
+    def _require_brep(self, operation):
+        if self.rhino_brep is None:
+            raise Exception("{} requires a Rhino Brep.".format(operation))
+
+    def _face_brep(self):
+        # the face of the layer on its own, so that operations on the brep stay within the face
+        if self.rhino_brep.Faces.Count == 1:
+            return self.rhino_brep
+        return self.rhino_brep.Faces[self.face_index].DuplicateFace(False)
 
     def generate_tile_frame_on_surface(self, point, flip_frame):
         _, uv_param = self.compas_surface.closest_point(point, return_parameters=True)
@@ -146,7 +556,7 @@ class DesignLayer(object):
             domain_end = 1 + (unit_size / input_curve.length())
 
             while curve_param < domain_end:
-                param_dist = random.uniform(unit_size, unit_size * param_density)
+                param_dist = self.rng.uniform(unit_size, unit_size * param_density)
 
                 # while loop condition
                 # ------------------------------------------------------------------------------
@@ -202,6 +612,11 @@ class DesignLayer(object):
             raise Exception("generate_contours for more than 2 input curves is not implemented yet.")
 
     def generate_contours_from_single_curve(self, input_curve, unit_size, uniform, param_density):
+        from compas_rhino.conversions import RhinoCurve
+        from compas_rhino.conversions import frame_to_rhino
+
+        self._require_brep("Generating contours")
+        face_brep = self._face_brep()
         compas_contours_nested = []  # ! nested
         contour_frames = []
 
@@ -224,7 +639,7 @@ class DesignLayer(object):
             contour_frames.append(contour_frame)
 
             rhino_plane = frame_to_rhino(contour_frame)
-            contour_segments = self.rhino_brep.CreateContourCurves(self.rhino_brep, rhino_plane)
+            contour_segments = self.rhino_brep.CreateContourCurves(face_brep, rhino_plane)
 
             compas_contour_segments = []
             for contour_segment in contour_segments:
@@ -235,6 +650,11 @@ class DesignLayer(object):
         return compas_contours_nested, contour_frames
 
     def generate_contours_from_two_curves(self, input_curves, unit_size, uniform, param_density, reverse_curve_params):
+        from compas_rhino.conversions import RhinoCurve
+        from compas_rhino.conversions import frame_to_rhino
+
+        self._require_brep("Generating contours")
+        face_brep = self._face_brep()
         compas_contours_nested = []  # ! nested
         contour_frames = []
         curves_params_nested = []
@@ -285,7 +705,7 @@ class DesignLayer(object):
             contour_frames.append(rotated_frame)
 
             rhino_plane = frame_to_rhino(rotated_frame)
-            contour_segments = self.rhino_brep.CreateContourCurves(self.rhino_brep, rhino_plane)
+            contour_segments = self.rhino_brep.CreateContourCurves(face_brep, rhino_plane)
 
             compas_contour_segments = []
             for contour_segment in contour_segments:
@@ -302,3 +722,109 @@ class DesignLayer(object):
 
     def generate(self):
         raise Exception("This method is implemented in the child classes.")
+
+    def coverage(self, resolution=256):
+        """Measure how well the tiles of the layer cover its surface.
+
+        The footprint of every tile is rasterized into a UV grid of the surface,
+        where each sample is weighted by the surface area it stands for.
+
+        Parameters
+        ----------
+        resolution : int, optional
+            The number of samples of the surface raster in each direction.
+
+        Returns
+        -------
+        tuple[float, float, ndarray]
+            The covered fraction of the surface area, the diameter of the largest uncovered disk,
+            and the gap heatmap: the distance of every raster sample to the nearest tile rim, zero if covered
+            (resolution, resolution). Use ``tolist()`` to pass it on to IronPython.
+        """
+        from compas_urt.design.analysis_numpy import tile_coverage
+
+        covered_fraction, largest_gap, gaps = tile_coverage(self.tiles, self.uv_raster(resolution))
+        return covered_fraction, largest_gap, gaps
+
+    def find_overlaps(self, tolerance=0.0):
+        """Find the overlapping pairs of tiles within the layer.
+
+        Two tiles overlap if the distance of their centres is smaller than the sum of their radii.
+        The candidate pairs are found on a spatial grid, in near-linear time.
+
+        Parameters
+        ----------
+        tolerance : float, optional
+            Overlaps up to this depth are accepted.
+
+        Returns
+        -------
+        list[tuple[int, int, float]]
+            The indices of the two tiles and the depth of every overlap.
+        """
+        points = [tile.center for tile in self.tiles]
+        radii = [tile.diameter / 2 for tile in self.tiles]
+        first, second, depths = spatial_functions().find_overlaps(points, radii, tolerance)
+        return list(zip(_tolist(first), _tolist(second), _tolist(depths)))
+
+    def resolve_overlaps(self, policy="drop_smaller", tolerance=0.0, max_iterations=10):
+        """Resolve the overlaps between the tiles of the layer.
+
+        The tiles of the layer are replaced by a new list, and moved tiles by copies,
+        so that tiles shared with other layers are never changed.
+        In IronPython, the overlaps are found and resolved in pure Python.
+
+        Parameters
+        ----------
+        policy : {"drop_smaller", "drop_later", "nudge"}, optional
+            ``"drop_smaller"`` keeps the larger tiles and drops the smaller tiles overlapping them,
+            ``"drop_later"`` keeps the tiles in the order they were generated,
+            ``"nudge"`` pushes the overlapping tiles apart and projects them back on the surface.
+        tolerance : float, optional
+            Overlaps up to this depth are accepted.
+        max_iterations : int, optional
+            The maximum number of iterations of the ``"nudge"`` policy.
+
+        Returns
+        -------
+        int
+            The number of dropped or moved tiles.
+        """
+        spatial = spatial_functions()
+        points = [tile.center for tile in self.tiles]
+        radii = [tile.diameter / 2 for tile in self.tiles]
+        count = len(self.tiles)
+
+        if policy in ("drop_smaller", "drop_later"):
+            first, second, _ = spatial.find_overlaps(points, radii, tolerance)
+            if policy == "drop_smaller":
+                # larger tiles first, earlier tiles first among the same size
+                priorities = [radius - index * 1e-9 / max(count, 1) for index, radius in enumerate(radii)]
+            else:
+                priorities = [-index for index in range(count)]
+            dropped = set(_tolist(spatial.select_non_overlapping(count, first, second, priorities)))
+            self.tiles = [tile for index, tile in enumerate(self.tiles) if index not in dropped]
+            return len(dropped)
+
+        elif policy == "nudge":
+            normals = [list(tile.base_frame.normal) for tile in self.tiles]
+            moved_points = _tolist(spatial.nudge_apart(points, radii, normals, tolerance, max_iterations))
+            # the tiles may be shared with other layers, the moved tiles are copies
+            tiles = list(self.tiles)
+            moved = 0
+            for index, (point, moved_point) in enumerate(zip(points, moved_points)):
+                if list(point) == list(moved_point):
+                    continue
+                frame, uv_param = self.generate_tile_frame_on_surface(moved_point, flip_frame=False)
+                if frame.normal.dot(tiles[index].base_frame.normal) < 0:
+                    frame.xaxis *= -1
+                tile = copy(tiles[index])
+                tile.base_frame = frame
+                tile.uv_param = uv_param
+                tiles[index] = tile
+                moved += 1
+            self.tiles = tiles
+            return moved
+
+        else:
+            raise Exception("policy can only be 'drop_smaller', 'drop_later' or 'nudge'")
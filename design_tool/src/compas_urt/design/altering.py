@@ -2,14 +2,19 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-from copy import copy
+import math as m
 
+import compas
 from compas.colors import Color
 from compas.datastructures import Mesh
 from compas.geometry import KDTree
 from compas.geometry import distance_point_point
 
 from compas_urt.design import DesignLayer
+from compas_urt.design.hashing import geometry_hash
+from compas_urt.design.overlay import AttributeArray
+from compas_urt.design.overlay import LayerOverlay
+from compas_urt.design.palette import palette_color
 
 
 class AltLayer(DesignLayer):
@@ -24,16 +29,22 @@ class ImageLayer(AltLayer):
         self.meshes = []
 
     def alter(self, layer, nu, nv, flip_frame, available_colors, return_meshes):
-        copied_layer = copy(layer)
-        tiles = copied_layer.tiles
+        """Color the tiles of a layer from the image.
+
+        Returns
+        -------
+        :class:`~compas_urt.design.overlay.LayerOverlay`
+            The colors and tags of the tiles on top of the unchanged `layer`.
+        """
+        overlay = LayerOverlay(layer)
 
         color_quads, meshes = self.create_colored_quads(nu, nv, return_meshes)
         self.meshes = meshes
-        self.assign_color(tiles, color_quads, flip_frame, available_colors)
+        self.assign_color(overlay, color_quads, flip_frame, available_colors)
 
-        return copied_layer
+        return overlay
 
-    def assign_color(self, tiles, color_quads, flip_frame, available_colors):
+    def assign_color(self, overlay, color_quads, flip_frame, available_colors):
         sorted_color_quads = sorted(color_quads, key=self.uv_sorting)
         sorted_uvparams = [(self.uv_sorting(quad)[0], self.uv_sorting(quad)[1], 0) for quad in sorted_color_quads]
 
@@ -43,8 +54,8 @@ class ImageLayer(AltLayer):
             available_colors_tuples = [(c.R / 255, c.G / 255, c.B / 255, c.A / 255) for c in available_colors]
             kdtree_color = KDTree(available_colors_tuples)
 
-        for tile in tiles:
-            _, uv_params = self.generate_tile_frame_on_surface(tile.base_frame.point, flip_frame)
+        for index, tile in enumerate(overlay.tiles):
+            _, uv_params = self.generate_tile_frame_on_surface(tile.center, flip_frame)
             u, v = uv_params
             neighbor = kdtree.nearest_neighbor((u, v, 0))
             uv_param, color_quad_index, param_distance = neighbor
@@ -55,11 +66,11 @@ class ImageLayer(AltLayer):
                     closest_color, closest_color_index, closest_color_dist = kdtree_color.nearest_neighbor(
                         (existing_color.r, existing_color.g, existing_color.b, existing_color.a)
                     )
-                    closest_color = Color(*closest_color)
-                    tile.color = closest_color
-                    tile.tag = closest_color_index
+                    closest_color = palette_color(*closest_color)
+                    overlay.set_attribute(index, "color", closest_color)
+                    overlay.set_attribute(index, "tag", closest_color_index)
                 else:
-                    tile.color = color_quad["color"]
+                    overlay.set_attribute(index, "color", color_quad["color"])
 
     def uv_sorting(self, quad):
         u = quad["u_domain"][0]
@@ -93,7 +104,26 @@ class ImageLayer(AltLayer):
         return avg_colors
 
     # ------------------------------------------------------------------------------------
-    def _surface_to_compas_quads(self, compas_surface, nu, nv=None):
+    def _surface_to_grid(self, compas_surface, nu, nv=None):
+        """Evaluate the surface once on the vertex grid of the image quads.
+
+        Parameters
+        ----------
+        compas_surface : :class:`compas.geometry.Surface`
+            The surface to evaluate.
+        nu : int
+            Divisions in the U direction.
+        nv : int, optional
+            Divisions in the V direction.
+            Defaults to `nu`.
+
+        Returns
+        -------
+        tuple[list[float], list[float], list[:class:`compas.geometry.Point`]]
+            The U parameters, the V parameters, and the grid points.
+            The points are listed row by row in U, i.e. the point at ``(u_params[i], v_params[j])``
+            is at index ``i * len(v_params) + j``.
+        """
         nv = nv or nu
 
         # trying to get the longest isocurve..
@@ -111,26 +141,49 @@ class ImageLayer(AltLayer):
         u_params = list(max_v_edge.divide_by_count(nu, return_points=False))
         v_params = list(max_u_edge.divide_by_count(nv, return_points=False))
 
-        quads = []
-        for i, u in enumerate(u_params):
-            for j, v in enumerate(v_params[:-1]):
-                a = compas_surface.point_at(u_params[i % len(u_params)], v_params[j])
-                b = compas_surface.point_at(u_params[(i + 1) % len(u_params)], v_params[j])
-                c = compas_surface.point_at(u_params[(i + 1) % len(u_params)], v_params[(j + 1)])
-                d = compas_surface.point_at(u_params[i % len(u_params)], v_params[(j + 1)])
+        # every vertex is evaluated once and shared by up to four quads
+        points = [compas_surface.point_at(u, v) for u in u_params for v in v_params]
+
+        return u_params, v_params, points
 
-                u_domain = (u_params[i % len(u_params)], u_params[(i + 1) % len(u_params)])
-                v_domain = (v_params[j], v_params[(j + 1)])
+    def _grid_faces(self, u_params, v_params, nu):
+        # closed isocurves are divided into `nu` params instead of `nu + 1`,
+        # in which case the last column of quads wraps around to the first one
+        count_u = len(u_params)
+        count_v = len(v_params)
+        faces = []
+        for i in range(nu):
+            for j in range(count_v - 1):
+                a = (i % count_u) * count_v + j
+                b = ((i + 1) % count_u) * count_v + j
+                c = ((i + 1) % count_u) * count_v + j + 1
+                d = (i % count_u) * count_v + j + 1
 
-                quads.append(dict(vertices=[a, b, c, d], u_domain=u_domain, v_domain=v_domain))
+                u_domain = (u_params[i % count_u], u_params[(i + 1) % count_u])
+                v_domain = (v_params[j], v_params[j + 1])
 
+                faces.append(([a, b, c, d], u_domain, v_domain))
+        return faces
+
+    def _grid_to_quads(self, points, grid_faces):
+        quads = []
+        for face, u_domain, v_domain in grid_faces:
+            vertices = [points[index] for index in face]
+            quads.append(dict(vertices=vertices, u_domain=u_domain, v_domain=v_domain))
         return quads
 
+    def _surface_to_compas_quads(self, compas_surface, nu, nv=None):
+        u_params, v_params, points = self._surface_to_grid(compas_surface, nu, nv)
+        return self._grid_to_quads(points, self._grid_faces(u_params, v_params, nu))
+
     # ------------------------------------------------------------------------------------
 
     def create_colored_quads(self, nu, nv, return_meshes=False):
         """Creates colored quad information from the image.
 
+        The surface is evaluated once per vertex of the ``(nu + 1) x (nv + 1)`` grid,
+        and the quads share those vertices.
+
         Parameters
         ----------
         nu : int
@@ -139,16 +192,21 @@ class ImageLayer(AltLayer):
             Divisions in the V direction.
         return_meshes : bool, optional
             If True, return the a list of quad information dictionaries,
-            and the meshes corresponding to those quads.
+            and a single mesh with one face per quad.
             If False, return only the list of quad information dictionaries.
 
         Returns
         -------
         list[dict] | tuple[list[dict], list[:class:`compas.datastructures.Mesh`]]
             If `return_meshes` is False, the list of quad information dictionaries.
-            If `return_meshes` is True, a list of meshes in addition to the quad dictionaries.
+            If `return_meshes` is True, a list containing the preview mesh in addition to the quad dictionaries.
+            The ``"color"``, ``"u_domain"`` and ``"v_domain"`` of every quad are stored as face attributes of the mesh.
         """
-        quads = self._surface_to_compas_quads(self.compas_surface, nu, nv)
+        u_params, v_params, points = self.shared_surface.derived(
+            ("quad_grid", nu, nv), lambda: self._surface_to_grid(self.compas_surface, nu, nv)
+        )
+        grid_faces = self._grid_faces(u_params, v_params, nu)
+        quads = self._grid_to_quads(points, grid_faces)
         colors = self._get_average_colors(nu, nv)
 
         for quad, color in zip(quads, colors):
@@ -156,37 +214,170 @@ class ImageLayer(AltLayer):
 
         meshes = []
         if return_meshes:
-            for quad in quads:
+            faces = [face for face, _, _ in grid_faces]
+            mesh = Mesh.from_vertices_and_faces(points, faces)
+            mesh.attributes["nu"] = nu
+            mesh.attributes["nv"] = nv
+            for fkey, quad in zip(mesh.faces(), quads):
                 if "color" in quad:
-                    mesh = Mesh.from_vertices_and_faces(quad["vertices"], [[0, 1, 2, 3]])
-                    mesh.attributes["u_domain"] = quad["u_domain"]
-                    mesh.attributes["v_domain"] = quad["v_domain"]
-                    mesh.attributes["color"] = quad["color"]
-                    meshes.append(mesh)
+                    mesh.face_attribute(fkey, "u_domain", quad["u_domain"])
+                    mesh.face_attribute(fkey, "v_domain", quad["v_domain"])
+                    mesh.face_attribute(fkey, "color", quad["color"])
+            meshes.append(mesh)
         return quads, meshes
 
 
 class AttractorsLayer(AltLayer):
+    """Base class of the alterations driven by attractor curves.
+
+    Notes
+    -----
+    The distances of the tiles to the curves are looked up in a distance field if the ``"distance_field"`` option
+    is set. The field is computed once per set of curves on a UV raster of the surface, with
+    ``"distance_field_resolution"`` samples in each direction (128 by default).
+    If the ``"distance_field_signed"`` option is set, the distances are negative inside of closed curves.
+
+    """
+
     def __init__(self, rhino_brep, **kwargs):
         super(AttractorsLayer, self).__init__(rhino_brep, **kwargs)
+        self._distance_field = None
+        self._distance_field_key = None
 
-    def get_affected_tiles_multiple_curves(self, layer, input_curves, effect_factor):
+    def distance_field(self, input_curves):
+        """Get the distance field of the curves over the surface.
 
-        affected_tiles_indices = []
-        for curve in input_curves:
-            affected_tiles_indices_per_curve, _ = self.get_affected_tiles_and_distances_single_curve(
-                layer, curve, effect_factor
-            )
-            affected_tiles_indices.extend(affected_tiles_indices_per_curve)
-        affected_tiles_indices = set(affected_tiles_indices)
+        The field is cached, and only recomputed when the geometry of the curves,
+        or the resolution options of the layer change.
 
-        return affected_tiles_indices
+        Parameters
+        ----------
+        input_curves : list[:class:`compas.geometry.Curve`]
+            The attractor curves.
+
+        Returns
+        -------
+        :class:`~compas_urt.design.raster_numpy.DistanceField`
+        """
+        from compas_urt.design.distance_numpy import CurvesDistanceEngine
+        from compas_urt.design.raster_numpy import DistanceField
+
+        resolution = self.options.get("distance_field_resolution", 128)
+        signed = self.options.get("distance_field_signed", False)
+        key = geometry_hash(list(input_curves), resolution, signed)
+
+        if self._distance_field_key != key:
+            raster = self.uv_raster(resolution)
+            cell_size = m.sqrt(((raster.points[1:] - raster.points[:-1]) ** 2).sum(axis=-1).mean())
+            engine = CurvesDistanceEngine(input_curves, segment_length=cell_size)
+            self._distance_field = DistanceField(raster, engine, signed=signed, surface=self.compas_surface)
+            self._distance_field_key = key
+
+        return self._distance_field
+
+    def get_affected_tiles_from_field(self, layer, input_curves, effect_factor):
+        """Find the affected tiles with a lookup in the distance field of the curves.
+
+        The tiles are looked up by their UV parameters,
+        which are assumed to be on the same surface as this layer.
+
+        Parameters
+        ----------
+        layer : :class:`~compas_urt.design.DesignLayer`
+            The layer with the tiles.
+        input_curves : list[:class:`compas.geometry.Curve`]
+            The attractor curves.
+        effect_factor : float
+            The distance of effect of the curves.
+
+        Returns
+        -------
+        tuple[list[int], list[float], list[int]]
+            The indices of the affected tiles, their distance to the nearest curve,
+            and the index of that curve.
+        """
+        if not layer.tiles:
+            return [], [], []
+
+        field = self.distance_field(input_curves)
+        uv_params = [tile.uv_param for tile in layer.tiles]
+        distances = field.distances_at(uv_params)
+        curve_ids = field.curve_ids_at(uv_params)
+
+        affected = distances < effect_factor
+        affected_tiles_indices = affected.nonzero()[0]
+        return affected_tiles_indices.tolist(), distances[affected].tolist(), curve_ids[affected].tolist()
+
+    def get_affected_tiles(self, layer, input_curves, effect_factor, exact=False, segment_length=None):
+        """Find the tiles closer to any of the curves than the effect factor.
+
+        The distances of all tiles to all curves are computed in one batched query,
+        see :class:`~compas_urt.design.distance_numpy.CurvesDistanceEngine`.
+        If the ``distance_field`` option is set, the distances are looked up in the cached distance field instead,
+        see :meth:`get_affected_tiles_from_field`.
+        In IronPython, the tiles are tested against every curve one by one.
+
+        Parameters
+        ----------
+        layer : :class:`~compas_urt.design.DesignLayer`
+            The layer with the tiles.
+        input_curves : list[:class:`compas.geometry.Curve`]
+            The attractor curves.
+        effect_factor : float
+            The distance of effect of the curves.
+        exact : bool, optional
+            If True, refine the distances of the affected tiles with the closest point on the actual curves.
+        segment_length : float, optional
+            The length of the segments the curves are sampled into.
+            Defaults to a tenth of the effect factor.
+
+        Returns
+        -------
+        tuple[list[int], list[float], list[int]]
+            The indices of the affected tiles, their distance to the nearest curve,
+            and the index of that curve.
+        """
+        if compas.IPY:
+            return self._get_affected_tiles_per_curve(layer, input_curves, effect_factor)
+
+        if self.options.get("distance_field"):
+            return self.get_affected_tiles_from_field(layer, input_curves, effect_factor)
+
+        from compas_urt.design.distance_numpy import CurvesDistanceEngine
+
+        if not layer.tiles:
+            return [], [], []
+
+        engine = CurvesDistanceEngine(input_curves, segment_length=segment_length or effect_factor / 10.0)
+        points = [tile.center for tile in layer.tiles]
+        distances, curve_ids, _ = engine.query(points, max_distance=effect_factor, exact=exact)
+
+        affected = distances < effect_factor
+        affected_tiles_indices = affected.nonzero()[0]
+        return affected_tiles_indices.tolist(), distances[affected].tolist(), curve_ids[affected].tolist()
+
+    def _get_affected_tiles_per_curve(self, layer, input_curves, effect_factor):
+        nearest = {}
+        for curve_id, curve in enumerate(input_curves):
+            indices, distances = self.get_affected_tiles_and_distances_single_curve(layer, curve, effect_factor)
+            for index, dist in zip(indices, distances):
+                if index not in nearest or dist < nearest[index][0]:
+                    nearest[index] = (dist, curve_id)
+
+        affected_tiles_indices = sorted(nearest)
+        distances = [nearest[index][0] for index in affected_tiles_indices]
+        curve_ids = [nearest[index][1] for index in affected_tiles_indices]
+        return affected_tiles_indices, distances, curve_ids
+
+    def get_affected_tiles_multiple_curves(self, layer, input_curves, effect_factor):
+        affected_tiles_indices, _, _ = self.get_affected_tiles(layer, input_curves, effect_factor)
+        return set(affected_tiles_indices)
 
     def get_affected_tiles_and_distances_single_curve(self, layer, input_curve, effect_factor):
         affected_tiles_indices = []
         distances = []
         for tile_index, tile in enumerate(layer.tiles):
-            tile_centroid = tile.base_frame.point
+            tile_centroid = tile.center
 
             pt_on_curve = input_curve.closest_point(tile_centroid)
             dist = distance_point_point(tile_centroid, pt_on_curve)
@@ -205,13 +396,111 @@ class TileColoringLayer(AttractorsLayer):
         super(TileColoringLayer, self).__init__(rhino_brep, **kwargs)
 
     def alter(self, color, layer, input_curves, effect_factor):
-        affected_tiles_indices, distances = self.get_affected_tiles(layer, input_curves, effect_factor)
-        layer_copy = copy(layer)
-        layer_copy.tiles = layer_copy.tiles[:]
-        for index in affected_tiles_indices:
-            layer_copy.tiles[index].color = color
+        """Color the tiles of a layer close to the attractor curves.
+
+        Returns
+        -------
+        :class:`~compas_urt.design.overlay.LayerOverlay`
+            The colors of the affected tiles on top of the unchanged `layer`.
+        """
+        affected_tiles_indices, _, _ = self.get_affected_tiles(layer, input_curves, effect_factor)
+        overlay = LayerOverlay(layer)
+        overlay.set_attributes(affected_tiles_indices, "color", color)
+        return overlay
 
 
 class VectorFieldLayer(AltLayer):
-    def alter(self):
-        pass
+    """Rotate and offset tiles along a vector field over the surface.
+
+    The field is sampled once on a UV raster of the surface, with ``"vector_field_resolution"`` samples
+    in each direction (128 by default), from curves, attractors or an image.
+    Altering a layer then reads the field at all tile UV parameters by bilinear interpolation,
+    and updates all tile frames in one batched array operation.
+
+    """
+
+    def __init__(self, rhino_brep, **kwargs):
+        super(VectorFieldLayer, self).__init__(rhino_brep, **kwargs)
+        self.raster = None
+        self.vectors = None
+
+    def _get_raster(self):
+        self.raster = self.uv_raster(self.options.get("vector_field_resolution", 128))
+        return self.raster
+
+    def sample_from_curves(self, input_curves):
+        """Sample the field from the tangents of the nearest curve.
+
+        Parameters
+        ----------
+        input_curves : list[:class:`compas.geometry.Curve`]
+            The guide curves.
+        """
+        from compas_urt.design.distance_numpy import CurvesDistanceEngine
+        from compas_urt.design.vectorfield_numpy import curve_tangent_field
+
+        raster = self._get_raster()
+        self.vectors = curve_tangent_field(raster, CurvesDistanceEngine(input_curves))
+
+    def sample_from_attractors(self, input_curves, effect_factor=None):
+        """Sample the field from the directions pointing away from the nearest curve.
+
+        Parameters
+        ----------
+        input_curves : list[:class:`compas.geometry.Curve`]
+            The attractor curves.
+        effect_factor : float, optional
+            If given, the vectors fade out linearly to zero at this distance from the curves.
+        """
+        from compas_urt.design.distance_numpy import CurvesDistanceEngine
+        from compas_urt.design.vectorfield_numpy import attractor_field
+
+        raster = self._get_raster()
+        self.vectors = attractor_field(raster, CurvesDistanceEngine(input_curves), effect_factor)
+
+    def sample_from_image(self, loaded_image):
+        """Sample the field from the brightness gradient of an image stretched over the surface.
+
+        Parameters
+        ----------
+        loaded_image : :class:`~compas_urt.design.load_image.LoadedImage`
+            The image.
+        """
+        from compas_urt.design.vectorfield_numpy import image_gradient_field
+
+        raster = self._get_raster()
+        self.vectors = image_gradient_field(raster, loaded_image)
+
+    def alter(self, layer, rotation_factor=1.0, offset_factor=0.0):
+        """Rotate and offset the tiles of a layer along the sampled field.
+
+        Parameters
+        ----------
+        layer : :class:`~compas_urt.design.DesignLayer`
+            The layer with the tiles.
+        rotation_factor : float, optional
+            The fraction of the angle between the X axis of a tile and the field the tile is rotated by.
+        offset_factor : float, optional
+            The factor the field vectors are scaled by to offset the tiles in their plane.
+
+        Returns
+        -------
+        :class:`~compas_urt.design.overlay.LayerOverlay`
+            The frames of the tiles on top of the unchanged `layer`.
+            The UV parameters of offset tiles are not updated.
+        """
+        from compas_urt.design.vectorfield_numpy import frame_from_row
+        from compas_urt.design.vectorfield_numpy import reorient_tile_frames
+
+        if self.vectors is None:
+            raise Exception("Sample the vector field before altering a layer.")
+
+        overlay = LayerOverlay(layer)
+        if not layer.tiles:
+            return overlay
+
+        vectors = self.raster.interpolate(self.vectors, [tile.uv_param for tile in layer.tiles])
+        changed, rows = reorient_tile_frames(layer.tiles, vectors, rotation_factor, offset_factor)
+
+        overlay.set_attributes(changed, "base_frame", AttributeArray(rows, frame_from_row))
+        return overlay
@@ -0,0 +1,151 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from compas_urt.design.vectorfield_numpy import tiles_to_arrays
+
+
+def tile_rims(tiles, rim_samples=16):
+    """Sample the rims of round tiles.
+
+    Parameters
+    ----------
+    tiles : list[:class:`~compas_urt.design.RoundTile`]
+        The tiles.
+    rim_samples : int, optional
+        The number of points per rim.
+
+    Returns
+    -------
+    ndarray
+        The rim points (n, rim_samples, 3).
+
+    """
+    points, xaxes, yaxes = tiles_to_arrays(tiles)
+    radii = np.array([tile.diameter / 2 for tile in tiles], dtype=float).reshape(-1, 1, 1)
+    angles = np.linspace(0, 2 * np.pi, rim_samples, endpoint=False)
+    directions = np.cos(angles)[None, :, None] * xaxes[:, None, :] + np.sin(angles)[None, :, None] * yaxes[:, None, :]
+    return points[:, None, :] + radii * directions
+
+
+def distances_to_raster(points, raster, kdtree=None):
+    """Compute the distances of points to a sampled surface.
+
+    Every point is projected onto the tangent plane of its nearest raster sample.
+
+    Parameters
+    ----------
+    points : ndarray
+        The points (..., 3).
+    raster : :class:`~compas_urt.design.raster_numpy.UVRaster`
+        The sampled surface.
+        The distances are accurate as long as the sample spacing is small compared to the radius of curvature.
+    kdtree : :class:`scipy.spatial.cKDTree`, optional
+        A KD tree of the raster points, if it was built before.
+
+    Returns
+    -------
+    ndarray
+        The unsigned distances (...).
+
+    """
+    samples = raster.points.reshape(-1, 3)
+    normals = raster.normals.reshape(-1, 3)
+    if kdtree is None:
+        kdtree = cKDTree(samples)
+
+    shape = points.shape[:-1]
+    points = points.reshape(-1, 3)
+    _, nearest = kdtree.query(points)
+    distances = np.abs(((points - samples[nearest]) * normals[nearest]).sum(axis=1))
+    return distances.reshape(shape)
+
+
+def tile_seating_deviation(tiles, raster, rim_samples=16, tolerance=None):
+    """Measure the gap between the rims of flat round tiles and the surface they sit on.
+
+    Parameters
+    ----------
+    tiles : list[:class:`~compas_urt.design.RoundTile`]
+        The tiles.
+    raster : :class:`~compas_urt.design.raster_numpy.UVRaster`
+        The sampled surface.
+    rim_samples : int, optional
+        The number of points per rim.
+    tolerance : float, optional
+        The largest acceptable gap.
+
+    Returns
+    -------
+    tuple[ndarray, ndarray, list[int]]
+        The maximum and the mean gap per tile (n,),
+        and the indices of the tiles with a maximum gap above the tolerance.
+
+    """
+    if not tiles:
+        return np.zeros(0), np.zeros(0), []
+
+    distances = distances_to_raster(tile_rims(tiles, rim_samples), raster)
+    max_deviations = distances.max(axis=1)
+    mean_deviations = distances.mean(axis=1)
+
+    flagged = []
+    if tolerance is not None:
+        flagged = (max_deviations > tolerance).nonzero()[0].tolist()
+
+    return max_deviations, mean_deviations, flagged
+
+
+def tile_coverage(tiles, raster, k=8):
+    """Rasterize the footprints of round tiles on a sampled surface.
+
+    Every raster sample is tested against the `k` tiles with the nearest centres,
+    and weighted by the surface area it stands for.
+
+    Parameters
+    ----------
+    tiles : list[:class:`~compas_urt.design.RoundTile`]
+        The tiles.
+    raster : :class:`~compas_urt.design.raster_numpy.UVRaster`
+        The sampled surface.
+    k : int, optional
+        The number of candidate tiles per sample.
+
+    Returns
+    -------
+    tuple[float, float, ndarray]
+        The covered fraction of the surface area, the diameter of the largest uncovered disk,
+        and the distance of every raster sample to the nearest tile rim, zero if covered (nu, nv).
+
+    """
+    nu, nv = raster.shape
+    samples = raster.points.reshape(-1, 3)
+
+    # area of the surface around every sample, halved on the borders of the domain
+    du, dv = raster.tangents
+    areas = np.linalg.norm(np.cross(du, dv), axis=-1)
+    areas *= (raster.u_params[1] - raster.u_params[0]) * (raster.v_params[1] - raster.v_params[0])
+    areas[[0, -1], :] /= 2
+    areas[:, [0, -1]] /= 2
+    areas = areas.ravel()
+
+    if not tiles:
+        gaps = np.full(nu * nv, np.inf)
+        return 0.0, np.inf, gaps.reshape(nu, nv)
+
+    centers = np.array([tile.center for tile in tiles], dtype=float)
+    radii = np.array([tile.diameter / 2 for tile in tiles], dtype=float)
+    k = min(k, len(tiles))
+
+    distances, nearest = cKDTree(centers).query(samples, k=k)
+    distances = distances.reshape(len(samples), k)
+    nearest = nearest.reshape(len(samples), k)
+    clearances = (distances - radii[nearest]).min(axis=1)
+
+    covered = clearances <= 0
+    covered_fraction = areas[covered].sum() / areas.sum()
+    gaps = np.clip(clearances, 0.0, None)
+    return float(covered_fraction), float(2 * gaps.max()), gaps.reshape(nu, nv)
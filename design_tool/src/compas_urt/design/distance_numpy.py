@@ -0,0 +1,243 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import math as m
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+def curves_to_segments(curves, segment_length=None, divisions_count=100):
+    """Sample a set of curves into one set of polyline segments.
+
+    Parameters
+    ----------
+    curves : list[:class:`compas.geometry.Curve`]
+        The curves to sample.
+    segment_length : float, optional
+        The target length of the segments.
+        If given, it overrides `divisions_count`.
+    divisions_count : int, optional
+        The number of segments per curve.
+
+    Returns
+    -------
+    tuple[ndarray, ndarray, ndarray]
+        The start points (m, 3), the end points (m, 3) and the curve index (m,) of every segment.
+    """
+    starts = []
+    ends = []
+    curve_ids = []
+    for curve_id, curve in enumerate(curves):
+        count = divisions_count
+        if segment_length:
+            count = max(1, int(m.ceil(curve.length() / segment_length)))
+        _, points = curve.divide_by_count(count, return_points=True)
+        points = np.asarray([list(point) for point in points], dtype=float)
+        if len(points) < 2:
+            continue
+        starts.append(points[:-1])
+        ends.append(points[1:])
+        curve_ids.append(np.full(len(points) - 1, curve_id, dtype=int))
+
+    if not starts:
+        raise Exception("The curves could not be sampled into segments.")
+
+    return np.vstack(starts), np.vstack(ends), np.concatenate(curve_ids)
+
+
+def closest_points_on_segments(points, starts, ends):
+    """Compute the closest points on segments, element by element.
+
+    Parameters
+    ----------
+    points : ndarray
+        Query points (..., 3).
+    starts : ndarray
+        Segment start points, broadcastable against `points`.
+    ends : ndarray
+        Segment end points, broadcastable against `points`.
+
+    Returns
+    -------
+    tuple[ndarray, ndarray]
+        The closest points (..., 3) and the distances (...).
+    """
+    direction = ends - starts
+    length_squared = np.einsum("...i,...i->...", direction, direction)
+    length_squared = np.where(length_squared > 0, length_squared, 1.0)
+    t = np.einsum("...i,...i->...", points - starts, direction) / length_squared
+    t = np.clip(t, 0.0, 1.0)
+    closest = starts + t[..., None] * direction
+    distances = np.linalg.norm(points - closest, axis=-1)
+    return closest, distances
+
+
+class CurvesDistanceEngine(object):
+    """Nearest distances from many points to a set of curves.
+
+    All curves are sampled into a single set of polyline segments,
+    indexed by a KD tree on the segment midpoints.
+    Every query point is tested against the `k` segments with the nearest midpoints,
+    and against all segments within reach where those are not enough to bound the nearest distance.
+
+    Parameters
+    ----------
+    curves : list[:class:`compas.geometry.Curve`]
+        The attractor curves.
+    segment_length : float, optional
+        The target length of the polyline segments.
+    divisions_count : int, optional
+        The number of polyline segments per curve, if no `segment_length` is given.
+
+    """
+
+    def __init__(self, curves, segment_length=None, divisions_count=100):
+        self.curves = list(curves)
+        self.starts, self.ends, self.curve_ids = curves_to_segments(
+            self.curves, segment_length=segment_length, divisions_count=divisions_count
+        )
+        self.midpoints = (self.starts + self.ends) / 2
+        self.max_half_length = np.linalg.norm(self.ends - self.starts, axis=1).max() / 2
+        self.kdtree = cKDTree(self.midpoints)
+
+    def query(self, points, max_distance=None, k=8, exact=False):
+        """Compute the nearest distance of every point to all curves.
+
+        Parameters
+        ----------
+        points : list[:class:`compas.geometry.Point`] | ndarray
+            The query points.
+        max_distance : float, optional
+            Points further away than this distance are not resolved,
+            their distance is ``inf`` and their curve index is ``-1``.
+        k : int, optional
+            The number of candidate segments tested per point in the first pass.
+        exact : bool, optional
+            If True, refine the resolved points with the closest point on the actual curve.
+
+        Returns
+        -------
+        tuple[ndarray, ndarray, ndarray]
+            The distances (n,), the index of the nearest curve (n,), and the closest points (n, 3).
+        """
+        points = np.asarray([list(point) for point in points], dtype=float).reshape(-1, 3)
+        distances, segment_ids, closest = self.nearest_segments(points, max_distance=max_distance, k=k)
+        curve_ids = np.where(segment_ids >= 0, self.curve_ids[segment_ids], -1)
+
+        if exact:
+            distances, closest = self.refine(points, curve_ids, distances, closest)
+
+        return distances, curve_ids, closest
+
+    def nearest_segments(self, points, max_distance=None, k=8):
+        """Find the nearest polyline segment of every point.
+
+        Parameters
+        ----------
+        points : ndarray
+            The query points (n, 3).
+        max_distance : float, optional
+            Points further away than this distance are not resolved.
+        k : int, optional
+            The number of candidate segments tested per point in the first pass.
+
+        Returns
+        -------
+        tuple[ndarray, ndarray, ndarray]
+            The distances (n,), the index of the nearest segment (n,), and the closest points (n, 3).
+            Unresolved points have an infinite distance and a segment index of ``-1``.
+        """
+        count = len(points)
+        k = min(k, len(self.midpoints))
+
+        upper_bound = np.inf
+        if max_distance is not None:
+            upper_bound = max_distance + self.max_half_length
+
+        midpoint_distances, candidates = self.kdtree.query(points, k=k, distance_upper_bound=upper_bound)
+        midpoint_distances = np.asarray(midpoint_distances).reshape(count, k)
+        candidates = np.asarray(candidates).reshape(count, k)
+        missing = candidates == len(self.midpoints)
+        candidates = np.where(missing, 0, candidates)
+
+        closest, distances = closest_points_on_segments(
+            points[:, None, :], self.starts[candidates], self.ends[candidates]
+        )
+        distances = np.where(missing, np.inf, distances)
+
+        nearest = np.argmin(distances, axis=1)
+        rows = np.arange(count)
+        distances = distances[rows, nearest]
+        closest = closest[rows, nearest]
+        segment_ids = candidates[rows, nearest]
+
+        # a segment is at least its midpoint distance minus its half length away, so the segments
+        # with midpoints beyond the nearest distance plus the largest half length cannot be nearer,
+        # the points with an unchecked segment within that bound search all segments within it
+        radii = distances + self.max_half_length
+        unsure = np.isfinite(distances) & (midpoint_distances[:, -1] <= radii)
+        if k < len(self.midpoints) and unsure.any():
+            unsure = np.flatnonzero(unsure)
+            distances[unsure], segment_ids[unsure], closest[unsure] = self._nearest_within(
+                points[unsure], radii[unsure]
+            )
+
+        resolved = distances < upper_bound
+        distances = np.where(resolved, distances, np.inf)
+        segment_ids = np.where(resolved, segment_ids, -1)
+
+        return distances, segment_ids, closest
+
+    def _nearest_within(self, points, radii):
+        # the nearest of all segments with midpoints within the radius of every point
+        candidates = self.kdtree.query_ball_point(points, radii)
+        owners = np.repeat(np.arange(len(points)), [len(ids) for ids in candidates])
+        segment_ids = np.concatenate([np.asarray(ids, dtype=int) for ids in candidates])
+        closest, distances = closest_points_on_segments(
+            points[owners], self.starts[segment_ids], self.ends[segment_ids]
+        )
+
+        order = np.lexsort((distances, owners))
+        _, first = np.unique(owners[order], return_index=True)
+        nearest = order[first]
+        return distances[nearest], segment_ids[nearest], closest[nearest]
+
+    @property
+    def directions(self):
+        """ndarray : The unit direction of every segment (m, 3)."""
+        directions = self.ends - self.starts
+        lengths = np.linalg.norm(directions, axis=1)
+        return directions / np.where(lengths > 0, lengths, 1.0)[:, None]
+
+    def refine(self, points, curve_ids, distances, closest):
+        """Replace the polyline distances by the distances to the actual curves.
+
+        Only the points with a resolved nearest curve are refined.
+
+        Parameters
+        ----------
+        points : ndarray
+            The query points (n, 3).
+        curve_ids : ndarray
+            The index of the nearest curve of every point (n,).
+        distances : ndarray
+            The polyline distances (n,).
+        closest : ndarray
+            The closest points on the polyline (n, 3).
+
+        Returns
+        -------
+        tuple[ndarray, ndarray]
+            The refined distances and closest points.
+        """
+        distances = distances.copy()
+        closest = closest.copy()
+        for index in np.nonzero(curve_ids >= 0)[0]:
+            curve = self.curves[curve_ids[index]]
+            point = curve.closest_point(points[index].tolist())
+            closest[index] = list(point)
+        resolved = curve_ids >= 0
+        distances[resolved] = np.linalg.norm(points[resolved] - closest[resolved], axis=1)
+        return distances, closest
@@ -6,7 +6,6 @@ import math as m
 import random
 import time
 
-import Rhino.Geometry as rg
 from compas.colors import Color
 from compas.datastructures import Mesh
 from compas.geometry import Circle
@@ -15,8 +14,6 @@ from compas.geometry import Plane
 from compas.geometry import Vector
 from compas.geometry import distance_point_point
 from compas.utilities import flatten
-from compas_rhino.conversions import RhinoCurve
-from compas_rhino.conversions import frame_to_rhino
 
 from compas_urt.design import DesignLayer
 from compas_urt.design import RoundTile
@@ -24,19 +21,139 @@ from compas_urt.design.ellipse_with_frame import EllipseFrame
 
 
 class GenLayer(DesignLayer):
+    def __init__(self, rhino_brep, **kwargs):
+        super(GenLayer, self).__init__(rhino_brep, **kwargs)
+        self._debug_geometry = True
+
     def generate(self):
-        pass
+        self.tiles = list(self.iter_tiles(self.options.get("debug_geometry", True)))
+
+    def iter_tiles(self, debug_geometry=False):
+        """Yield the tiles of the layer one by one, as they are generated.
+
+        Parameters
+        ----------
+        debug_geometry : bool, optional
+            If True, keep the construction geometry of the tiles on the layer.
+
+        Yields
+        ------
+        :class:`~compas_urt.design.RoundTile`
+        """
+        raise Exception("This method is implemented in the child classes.")
+
+    def curvature_field(self):
+        """Get the principal curvature field of the surface.
+
+        The field is computed once per surface, on a UV raster with ``"curvature_field_resolution"``
+        samples in each direction (64 by default).
+
+        Returns
+        -------
+        :class:`~compas_urt.design.raster_numpy.CurvatureField`
+        """
+        from compas_urt.design.raster_numpy import CurvatureField
+
+        resolution = self.options.get("curvature_field_resolution", 64)
+        return self.shared_surface.derived(
+            ("curvature_field", resolution), lambda: CurvatureField(self.uv_raster(resolution))
+        )
 
 
 class GridLayer(GenLayer):
+    """Layer of tiles on a grid along the isocurves or the contours of the surface.
+
+    With the ``"progressive"`` option, the first call of :meth:`generate` only creates a coarse preview:
+    the centres of the tiles of every k-th row and column, with k the ``"preview_step"`` option (4 by default).
+    The second call, or :meth:`refine`, creates the full set of tiles.
+
+    Attributes
+    ----------
+    level : int | None
+        The level of detail of the generated layer, 0 for the preview, 1 for the full set of tiles,
+        and None before any generation.
+    is_final : bool
+        True once the full set of tiles is generated.
+    preview_points : list[:class:`compas.geometry.Point`]
+        The tile centres of the preview.
+
+    """
+
     def __init__(self, rhino_brep, tile_diameter, tile_thickness, tile_joint, **kwargs):
         super(GridLayer, self).__init__(rhino_brep, **kwargs)
         # self.curve_type = curve_type
         self.tile_diameter = tile_diameter
         self.tile_joint = tile_joint
         self.tile_thickness = tile_thickness
+        self.level = None
+        self.is_final = False
+        self.preview_points = []
 
     def generate(self):
+        if self.options.get("progressive") and self.level is None:
+            self.generate_preview()
+        else:
+            self.refine()
+
+    def generate_preview(self):
+        """Generate the centres of every k-th row and column of tiles, without their frames."""
+        self._generate(step=self.options.get("preview_step", 4))
+
+    def refine(self, background=False):
+        """Generate the full set of tiles.
+
+        The tiles of the layer are replaced at once when the generation is complete,
+        so the preview stays available until then.
+
+        Parameters
+        ----------
+        background : bool, optional
+            If True, generate on a separate thread and return it.
+
+        Returns
+        -------
+        :class:`threading.Thread` | None
+        """
+        if background:
+            import threading
+
+            thread = threading.Thread(target=self._generate)
+            thread.start()
+            return thread
+        self._generate()
+
+    def iter_tiles(self, debug_geometry=False):
+        """Yield the tiles of the layer one by one, as they are generated.
+
+        Nothing is stored on the layer, so very large layers can be streamed to an artist or an exporter
+        with bounded memory. Use :meth:`generate` to store the tiles in :attr:`tiles`.
+
+        Parameters
+        ----------
+        debug_geometry : bool, optional
+            If True, keep the construction geometry on the layer,
+            i.e. ``edge_isocurve`` and ``isocurves``, or ``contour_frames`` and ``compas_contours``.
+
+        Yields
+        ------
+        :class:`~compas_urt.design.RoundTile`
+        """
+        return self._iter_grid(1, debug_geometry)
+
+    def _generate(self, step=1):
+        debug_geometry = self.options.get("debug_geometry", True)
+        if step > 1:
+            self.preview_points = list(self._iter_grid(step, debug_geometry))
+            self.level = 0
+            self.is_final = False
+        else:
+            self.tiles = list(self._iter_grid(1, debug_geometry))
+            self.level = 1
+            self.is_final = True
+
+    def _iter_grid(self, step, debug_geometry):
+        # yields the tiles, or the tile centres of every step-th row and column if step > 1
+        self.reset_rng()
         uniform = self.options["uniform"]
         pack_type = self.options["pack_type"]
         param_density = self.options["param_density"]
@@ -48,11 +165,6 @@ class GridLayer(GenLayer):
         unit_size = self.tile_diameter + self.tile_joint
         equilateral_height = unit_size * m.sqrt(3) / 2
 
-        brepface = self.rhino_brep.Faces[0]
-
-        frames = []
-        uv_params = []
-
         # TODO: check which edge isocurve has the biggest length! otherwise you might not cover the whole surface with isocurves
 
         if pack_type == "hexagonal":
@@ -62,47 +174,40 @@ class GridLayer(GenLayer):
             unit = unit_size
             division_mode = "by_count"
 
-        min_u_edge = None
-        min_v_edge = None
-
-        for i in range(50):
-            temp_u = self.compas_surface.u_isocurve(i / 50)
-            temp_v = self.compas_surface.v_isocurve(i / 50)
-
-            if temp_u.length() > 0:
-                if min_u_edge is None or temp_u.length() < min_u_edge.length():
-                    min_u_edge = temp_u
-            if temp_v.length() > 0:
-                if min_v_edge is None or temp_v.length() < min_v_edge.length():
-                    min_v_edge = temp_v
-        if min_u_edge is None or min_v_edge is None:
-            raise Exception("The isocurve length in either u or v direction cannot be None")
+        min_u_edge, min_v_edge = self.shared_surface.derived(("min_edge_isocurves",), self._min_edge_isocurves)
 
         if curve_type == "isocurves":
             if flip_curves:
-                # self.edge_isocurve = self.compas_surface.u_isocurve(0.5)
-                self.edge_isocurve = min_u_edge
+                # edge_isocurve = self.compas_surface.u_isocurve(0.5)
+                edge_isocurve = min_u_edge
             else:
-                # self.edge_isocurve = self.compas_surface.v_isocurve(0.5)
-                self.edge_isocurve = min_v_edge
+                # edge_isocurve = self.compas_surface.v_isocurve(0.5)
+                edge_isocurve = min_v_edge
 
             edge_params = self.generate_params_on_curve(
-                self.edge_isocurve,
+                edge_isocurve,
                 unit_size=unit,
                 uniform=uniform,
                 param_density=param_density,
                 division_mode=division_mode,
             )
 
-            self.isocurves = self.generate_isocurves(edge_params, flip_curves)
+            if debug_geometry:
+                self.edge_isocurve = edge_isocurve
+                self.isocurves = []
+
+            for i in range(0, len(edge_params), step):
+                edge_param = edge_params[i]
+                isocurve = self.generate_isocurves([edge_param], flip_curves)[0]
+                if debug_geometry:
+                    self.isocurves.append(isocurve)
 
-            for i, (edge_param, isocurve) in enumerate(zip(edge_params, self.isocurves)):
                 if isocurve.length() < unit:
                     continue
                 unit_reparam = unit_size / isocurve.length()
                 parameters = self.generate_params_on_curve(isocurve, unit_size=unit_size, uniform=True, param_density=1)
 
-                for isocurve_param in parameters:
+                for isocurve_param in parameters[::step]:
                     if pack_type == "hexagonal":
                         if i % 2:
                             isocurve_param += unit_reparam / 2
@@ -114,14 +219,15 @@ class GridLayer(GenLayer):
                         v = edge_param
                         u = isocurve_param
 
-                    pointBrepFaceRelationship = brepface.IsPointOnFace(u, v)
-                    if pointBrepFaceRelationship == rg.PointFaceRelation.Exterior:
+                    if not self.is_on_face(u, v):
                         continue
 
                     point = isocurve.point_at(isocurve_param)
+                    if step > 1:
+                        yield point
+                        continue
                     frame, uv_param = self.generate_tile_frame_on_surface(point, flip_frame)
-                    frames.append(frame)
-                    uv_params.append(uv_param)
+                    yield self._create_tile(frame, uv_param)
 
         elif curve_type == "contours":
             if "input_curves" not in self.options:
@@ -133,11 +239,16 @@ class GridLayer(GenLayer):
 
             # edge_params = self.generate_params_on_curve(input_curve, unit, uniform, param_density)
 
-            compas_contours_nested, self.contour_frames = self.generate_contours(
+            compas_contours_nested, contour_frames = self.generate_contours(
                 input_curves, unit, uniform, param_density, reverse_curve_params
             )
+            if debug_geometry:
+                self.contour_frames = contour_frames
+                self.compas_contours = list(flatten(compas_contours_nested))
 
             for i, contour_segments in enumerate(compas_contours_nested):
+                if i % step:
+                    continue
                 for contour_segment in contour_segments:
                     params = self.generate_params_on_curve(
                         contour_segment, unit_size=unit, uniform=True, param_density=0.5
@@ -152,6 +263,15 @@ class GridLayer(GenLayer):
 
                     for j, point in enumerate(points):
                         frame = None  # reset your frame, previously stored frame creates a fuckup
+                        if step > 1:
+                            # every k-th of the tiles of the contour, which are every other point
+                            if pack_type == "hexagonal":
+                                selected = j % 2 == i % 2
+                            else:
+                                selected = pack_type == "aligned" and j % 2 == 0
+                            if selected and (j // 2) % step == 0:
+                                yield point
+                            continue
 
                         if pack_type == "hexagonal":
                             if (j % 2 == 0 and i % 2 == 0) or (j % 2 == 1 and i % 2 == 1):
@@ -161,16 +281,30 @@ class GridLayer(GenLayer):
                                 frame, uv_param = self.generate_tile_frame_on_surface(point, flip_frame)
 
                         if frame is not None:
-                            uv_params.append(uv_param)
-                            frames.append(frame)
+                            yield self._create_tile(frame, uv_param)
 
-            self.compas_contours = list(flatten(compas_contours_nested))
+    def _min_edge_isocurves(self):
+        min_u_edge = None
+        min_v_edge = None
 
-        for f, uv_param in zip(frames, uv_params):
-            round_tile = RoundTile(
-                base_frame=f, diameter=self.tile_diameter, thickness=self.tile_thickness, uv_param=uv_param
-            )
-            self.tiles.append(round_tile)
+        for i in range(50):
+            temp_u = self.compas_surface.u_isocurve(i / 50)
+            temp_v = self.compas_surface.v_isocurve(i / 50)
+
+            if temp_u.length() > 0:
+                if min_u_edge is None or temp_u.length() < min_u_edge.length():
+                    min_u_edge = temp_u
+            if temp_v.length() > 0:
+                if min_v_edge is None or temp_v.length() < min_v_edge.length():
+                    min_v_edge = temp_v
+        if min_u_edge is None or min_v_edge is None:
+            raise Exception("The isocurve length in either u or v direction cannot be None")
+        return min_u_edge, min_v_edge
+
+    def _create_tile(self, frame, uv_param):
+        return RoundTile(
+            base_frame=frame, diameter=self.tile_diameter, thickness=self.tile_thickness, uv_param=uv_param
+        )
 
 
 class BubblesFromCurveLayer(GenLayer):
@@ -196,10 +330,11 @@ class BubblesFromCurveLayer(GenLayer):
         self.points_on_curve = []  # TODO: remove
 
     def generate(self):
+        self.reset_rng()
         bubble_frames = self.generate_bubble_frames()
         for frame in bubble_frames:
-            bubble_xsize = Bubble.assign_size_from_domain(self.xsize_domain)
-            bubble_ysize = Bubble.assign_size_from_domain(self.ysize_domain)
+            bubble_xsize = Bubble.assign_size_from_domain(self.xsize_domain, self.rng)
+            bubble_ysize = Bubble.assign_size_from_domain(self.ysize_domain, self.rng)
             bubble = Bubble(frame, bubble_xsize, bubble_ysize)
             self.bubbles.append(bubble)
 
@@ -208,18 +343,18 @@ class BubblesFromCurveLayer(GenLayer):
     def generate_bubble_frames(self):
         ## Generate initial ellipses
         ##------------------------------------------------------------------------------
-        self.tiles = []
-
         bubble_frames = []
 
         if self.division_num == 0:
             raise Exception("Division points cannot be zero.")
         _, points = self.input_curve.divide_by_count(self.division_num, return_points=True)
 
+        self.bubble_uv_params = []
         for point in points:
             _, uv_param = self.compas_surface.closest_point(point, return_parameters=True)
             frame = self.compas_surface.frame_at(uv_param[0], uv_param[1])
             bubble_frames.append(frame)
+            self.bubble_uv_params.append(uv_param)
 
         return bubble_frames
 
@@ -238,7 +373,14 @@ class BubblesFromCurveLayer(GenLayer):
 
         # Project bubbles on compas_surface
         ##------------------------------------------------------------------------------
+        if self.rhino_brep is None or not self._debug_geometry:
+            return
+
+        import Rhino.Geometry as rg
+        from compas_rhino.conversions import RhinoCurve
+        from compas_rhino.conversions import frame_to_rhino
 
+        face_brep = self._face_brep()
         for bubble in self.bubbles:
             bubble_shape = bubble.ellipse
 
@@ -247,7 +389,7 @@ class BubblesFromCurveLayer(GenLayer):
             rhino_bubble_shape = rg.Ellipse(rhino_frame, bubble_shape.major, bubble_shape.minor)
             rhino_nurbs_curve = rhino_bubble_shape.ToNurbsCurve()
 
-            projected_curves = rg.Curve.ProjectToBrep(rhino_nurbs_curve, self.rhino_brep, rhino_frame.ZAxis, 0.01)
+            projected_curves = rg.Curve.ProjectToBrep(rhino_nurbs_curve, face_brep, rhino_frame.ZAxis, 0.01)
 
             for projected_curve in projected_curves:
                 compas_nurbs_curve = RhinoCurve.from_geometry(projected_curve).to_compas()
@@ -286,8 +428,9 @@ class BubblesFromCurveLayer(GenLayer):
 
                 # create circumscribed circles
                 ##------------------------------------------------------------------------------
-                plane = Plane.from_frame(self.bubbles[j].frame)
-                self.circles.append(Circle(plane, self.radius_j))
+                if self._debug_geometry:
+                    plane = Plane.from_frame(self.bubbles[j].frame)
+                    self.circles.append(Circle(plane, self.radius_j))
 
                 # collision distance is the sum of the 2 radii, of the corresponding tiles
                 ##------------------------------------------------------------------------------
@@ -350,14 +493,25 @@ class Bubble(object):
         self.projected_curves = []
 
     @classmethod
-    def assign_size_from_domain(cls, domain):
-        size = random.uniform(domain[0], domain[1])
+    def assign_size_from_domain(cls, domain, rng=random):
+        size = rng.uniform(domain[0], domain[1])
         size /= 2  # ellipse is instantiated with radius, not diameter!
         return size
 
     @classmethod
-    def assign_size_discrete(cls, dimensions):
-        diameter, thickness = random.choice(dimensions)
+    def assign_size_discrete(cls, dimensions, rng=random):
+        diameter, thickness = rng.choice(dimensions)
+        radius = diameter / 2
+        return radius, thickness
+
+    @classmethod
+    def assign_size_from_max_diameter(cls, dimensions, max_diameter):
+        """Pick the largest dimensions with a diameter up to `max_diameter`, or the smallest if none fits."""
+        fitting = [dimension for dimension in dimensions if dimension[0] <= max_diameter]
+        if fitting:
+            diameter, thickness = max(fitting, key=lambda dimension: dimension[0])
+        else:
+            diameter, thickness = min(dimensions, key=lambda dimension: dimension[0])
         radius = diameter / 2
         return radius, thickness
 
@@ -385,15 +539,45 @@ class TileBrushLayer(BubblesFromCurveLayer):
         self.tile_diameters = tile_diameters
         self.tile_thicknesses = tile_thicknesses
 
-        self.tile_dimensions = zip(self.tile_diameters, self.tile_thicknesses)
+        self.tile_dimensions = list(zip(self.tile_diameters, self.tile_thicknesses))
 
     def generate(self):
+        self.tiles = list(self.iter_tiles(self.options.get("debug_geometry", True)))
+
+    def iter_tiles(self, debug_geometry=False):
+        """Yield the tiles of the layer one by one.
+
+        The bubbles are relaxed all together first, the tiles are then created and yielded one by one.
+
+        Parameters
+        ----------
+        debug_geometry : bool, optional
+            If True, keep the construction geometry on the layer:
+            the ``bubbles`` with their projected curves, and the ``circles`` of the last relaxation step.
+
+        Yields
+        ------
+        :class:`~compas_urt.design.RoundTile`
+        """
+        self._debug_geometry = debug_geometry
+        self.reset_rng()
+        self.bubbles = []
         bubble_frames = self.generate_bubble_frames()
         tile_thicknesses = []
-        self.tiles = []
 
-        for frame in bubble_frames:
-            bubble_radius, tile_thickness = Bubble.assign_size_discrete(self.tile_dimensions)
+        # With a curvature tolerance, pick the largest tile that seats within the tolerance on the surface
+        ##------------------------------------------------------------------------------
+        curvature_tolerance = self.options.get("curvature_tolerance")
+        if curvature_tolerance:
+            max_diameters = self.curvature_field().max_diameters_at(self.bubble_uv_params, curvature_tolerance)
+        else:
+            max_diameters = [None] * len(bubble_frames)
+
+        for frame, max_diameter in zip(bubble_frames, max_diameters):
+            if max_diameter is None:
+                bubble_radius, tile_thickness = Bubble.assign_size_discrete(self.tile_dimensions, self.rng)
+            else:
+                bubble_radius, tile_thickness = Bubble.assign_size_from_max_diameter(self.tile_dimensions, max_diameter)
             bubble = Bubble(frame, bubble_radius, bubble_radius)
             tile_thicknesses.append(tile_thickness)
             self.bubbles.append(bubble)
@@ -402,17 +586,18 @@ class TileBrushLayer(BubblesFromCurveLayer):
         ##------------------------------------------------------------------------------
         self.relax_bubbles()
 
-        brepface = self.rhino_brep.Faces[0]
-
         for bubble, tile_thickness in zip(self.bubbles, tile_thicknesses):
             _, uv_param = self.compas_surface.closest_point(bubble.frame.point, return_parameters=True)
-            pointBrepFaceRelationship = brepface.IsPointOnFace(*uv_param)
-            if pointBrepFaceRelationship == rg.PointFaceRelation.Exterior:
+            if not self.is_on_face(*uv_param):
                 continue
 
             round_tile = RoundTile(bubble.frame, bubble.radius * 2, thickness=tile_thickness, uv_param=uv_param)
 
-            self.tiles.append(round_tile)
+            yield round_tile
+
+        if not debug_geometry:
+            self.bubbles = []
+            self.circles = []
 
 
 class AddTileLayer(GenLayer):
@@ -423,9 +608,20 @@ class AddTileLayer(GenLayer):
         self.tile_thickness = tile_thickness
         self.tiles = []
 
-    def generate(self):
+    def iter_tiles(self, debug_geometry=False):
+        """Yield the tiles at the points one by one.
+
+        Parameters
+        ----------
+        debug_geometry : bool, optional
+            Unused, the layer has no construction geometry.
+
+        Yields
+        ------
+        :class:`~compas_urt.design.RoundTile`
+        """
         flip_frame = self.options["flip_frame"]
         for point in self.points:
             frame, uv_param = self.generate_tile_frame_on_surface(point, flip_frame)
             round_tile = RoundTile(frame, self.tile_diameter, self.tile_thickness, uv_param=uv_param)
-            self.tiles.append(round_tile)
+            yield round_tile
@@ -0,0 +1,57 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import hashlib
+import json
+
+from compas.data.encoders import DataEncoder
+
+
+class _ContentEncoder(DataEncoder):
+    # the guid identifies the object, not its content
+    def default(self, o):
+        value = super(_ContentEncoder, self).default(o)
+        if isinstance(value, dict):
+            value.pop("guid", None)
+        return value
+
+
+def geometry_hash(*items):
+    """Compute a content hash of geometry and plain data.
+
+    Two sets of items with the same geometric data have the same hash,
+    regardless of object identity.
+
+    Parameters
+    ----------
+    *items : :class:`compas.data.Data` | list | dict | str | float | int | None
+        The COMPAS geometry objects or plain (JSON serializable) data to hash.
+
+    Returns
+    -------
+    str
+        The hexadecimal SHA1 digest.
+
+    """
+    serialized = json.dumps(items, cls=_ContentEncoder, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(serialized.encode("utf-8")).hexdigest()
+
+
+def brep_hash(brep):
+    """Compute a content hash of the geometry of a Rhino Brep.
+
+    Parameters
+    ----------
+    brep : :rhino:`Rhino.Geometry.Brep`
+
+    Returns
+    -------
+    str
+        The hexadecimal SHA1 digest.
+
+    """
+    from Rhino.FileIO import SerializationOptions
+
+    serialized = brep.ToJSON(SerializationOptions())
+    return hashlib.sha1(serialized.encode("utf-8")).hexdigest()
@@ -0,0 +1,200 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import inspect
+import os
+import pickle
+from collections import OrderedDict
+from copy import copy
+
+import compas_urt
+from compas_urt.design.hashing import brep_hash
+from compas_urt.design.hashing import geometry_hash
+
+
+def constructor_arguments(layer_cls):
+    """Get the names of the arguments of the constructor of a layer class, besides the surface.
+
+    Parameters
+    ----------
+    layer_cls : type
+
+    Returns
+    -------
+    list[str]
+    """
+    try:
+        spec = inspect.getfullargspec(layer_cls.__init__)
+    except AttributeError:
+        spec = inspect.getargspec(layer_cls.__init__)
+    return spec.args[2:]
+
+
+def layer_key(layer):
+    """Compute the content hash of the inputs of a layer.
+
+    The hash covers the class of the layer, the geometry of its surface, its constructor arguments
+    and its options, including the ``"seed"`` of its random generator.
+    The arguments and the options have to be COMPAS data or plain data, e.g. curves, points and numbers.
+
+    Parameters
+    ----------
+    layer : :class:`~compas_urt.design.DesignLayer`
+
+    Returns
+    -------
+    str
+    """
+    if layer.rhino_brep is not None:
+        surface = brep_hash(layer.rhino_brep)
+    else:
+        surface = geometry_hash(layer.compas_surface)
+
+    cls = type(layer)
+    arguments = dict((name, getattr(layer, name)) for name in constructor_arguments(cls))
+    return geometry_hash(
+        compas_urt.__version__,
+        "{}/{}".format(cls.__module__, cls.__name__),
+        surface,
+        layer.face_index,
+        arguments,
+        layer.options,
+    )
+
+
+class LayerCache(object):
+    """Cache of the tiles of generated layers, by the content hash of their inputs.
+
+    The tiles are kept in memory for the most recently used layers,
+    and optionally on disk, where they survive restarts of Rhino.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        The number of layers kept in memory.
+    directory : str, optional
+        The directory of the disk tier. Without a directory, the tiles are only kept in memory.
+
+    """
+
+    def __init__(self, maxsize=32, directory=None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self._memory = OrderedDict()
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".pickle")
+
+    def get(self, key):
+        """Get the tiles of a layer, from memory or from disk.
+
+        Parameters
+        ----------
+        key : str
+
+        Returns
+        -------
+        list[:class:`~compas_urt.design.Tile`] | None
+        """
+        if key in self._memory:
+            tiles = self._memory.pop(key)
+            self._memory[key] = tiles
+            return tiles
+
+        if self.directory and os.path.exists(self._path(key)):
+            with open(self._path(key), "rb") as f:
+                tiles = pickle.load(f)
+            self._remember(key, tiles)
+            return tiles
+
+        return None
+
+    def put(self, key, tiles):
+        """Store the tiles of a layer.
+
+        Parameters
+        ----------
+        key : str
+        tiles : list[:class:`~compas_urt.design.Tile`]
+        """
+        self._remember(key, tiles)
+
+        if self.directory:
+            # write next to the final file and move it in place, so readers never see a partial file
+            temp = self._path(key) + ".{}.tmp".format(os.getpid())
+            with open(temp, "wb") as f:
+                pickle.dump(tiles, f, protocol=2)
+            if os.path.exists(self._path(key)):
+                os.remove(temp)
+            else:
+                os.rename(temp, self._path(key))
+
+    def _remember(self, key, tiles):
+        self._memory.pop(key, None)
+        self._memory[key] = tiles
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        """Remove all layers from memory and from disk."""
+        self._memory.clear()
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith(".pickle"):
+                    os.remove(os.path.join(self.directory, name))
+
+    def generate(self, layer):
+        """Generate a layer, unless a layer with the same inputs was generated before.
+
+        Only the tiles are cached, the construction geometry of a layer is not restored.
+        The layer gets copies of the cached tiles, which it can change freely.
+        Layers without a ``"seed"`` option are random, and are always generated.
+
+        Parameters
+        ----------
+        layer : :class:`~compas_urt.design.DesignLayer`
+
+        Returns
+        -------
+        bool
+            True if the tiles came from the cache.
+        """
+        if layer.options.get("seed") is None:
+            layer.generate()
+            return False
+
+        key = layer_key(layer)
+        tiles = self.get(key)
+        if tiles is None:
+            layer.generate()
+            self.put(key, [copy(tile) for tile in layer.tiles])
+            return False
+
+        layer.tiles = [copy(tile) for tile in tiles]
+        if hasattr(layer, "is_final"):
+            layer.level = 1
+            layer.is_final = True
+        return True
+
+
+# the cache shared by the layers of a Rhino session
+_DEFAULT_CACHE = LayerCache()
+
+
+def cached_generate(layer, cache=None):
+    """Generate a layer through a cache, by default the in-memory cache of the current process.
+
+    Parameters
+    ----------
+    layer : :class:`~compas_urt.design.DesignLayer`
+    cache : :class:`LayerCache`, optional
+
+    Returns
+    -------
+    bool
+        True if the tiles came from the cache.
+    """
+    return (cache or _DEFAULT_CACHE).generate(layer)
@@ -0,0 +1,176 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import threading
+
+import compas
+from compas.geometry import Surface
+
+from compas_urt.design import LayerSpec
+from compas_urt.design import _tolist
+from compas_urt.design import generate_layer
+from compas_urt.design import spatial_functions
+
+
+def map_threads(function, items, workers=4):
+    """Apply a function to items on a pool of threads, keeping the order of the items.
+
+    In IronPython, threads run in parallel, which makes them the worker pool of choice inside Rhino.
+
+    Parameters
+    ----------
+    function : callable
+    items : list
+    workers : int, optional
+        The number of threads.
+
+    Returns
+    -------
+    list
+        The results, in the order of the items.
+
+    """
+    results = [None] * len(items)
+    errors = []
+    positions = list(range(len(items)))
+    lock = threading.Lock()
+
+    def work():
+        while True:
+            with lock:
+                if not positions or errors:
+                    return
+                position = positions.pop(0)
+            try:
+                results[position] = function(items[position])
+            except Exception as error:
+                with lock:
+                    errors.append(error)
+
+    threads = [threading.Thread(target=work) for _ in range(min(workers, len(items)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    return results
+
+
+class MultiFaceLayer(object):
+    """A layer tiling all faces of a polysurface.
+
+    The faces are tiled independently of each other by one layer each, on a pool of workers,
+    and the tiles are stitched together: where the tiles of two faces overlap along a shared edge,
+    the tile of the face with the higher index is removed.
+
+    Parameters
+    ----------
+    layer_cls : type
+        The class of the layer of every face, e.g. :class:`~compas_urt.design.generative.GridLayer`.
+    rhino_brep : :rhino:`Rhino.Geometry.Brep` | list[:class:`compas.geometry.Surface`]
+        The polysurface, or its faces as COMPAS surfaces.
+    options : dict, optional
+        The options of the layers.
+        ``"seam_tolerance"`` is the depth up to which tiles of different faces may overlap, 0 by default.
+    **arguments : dict, optional
+        The other arguments of the constructor of the layers.
+
+    Attributes
+    ----------
+    layers : list[:class:`~compas_urt.design.DesignLayer`]
+        The layer of every face.
+    tiles : list[:class:`~compas_urt.design.RoundTile`]
+        The stitched tiles of all faces.
+    tile_faces : list[int]
+        The face index of every tile.
+
+    """
+
+    def __init__(self, layer_cls, rhino_brep, options=None, **arguments):
+        self.layer_cls = layer_cls
+        self.rhino_brep = rhino_brep
+        self.options = options or {}
+        self.arguments = arguments
+        self.layers = []
+        self.tiles = []
+        self.tile_faces = []
+
+    @property
+    def face_count(self):
+        if isinstance(self.rhino_brep, (list, tuple)):
+            return len(self.rhino_brep)
+        return self.rhino_brep.Faces.Count
+
+    def _generate_face(self, face_index):
+        layer = self.layer_cls(self.rhino_brep, options=dict(self.options), face_index=face_index, **self.arguments)
+        layer.generate()
+        return layer
+
+    def generate(self, processes=None):
+        """Generate the tiles of all faces, and stitch them.
+
+        Faces given as COMPAS surfaces are generated in a process pool. Faces of a Rhino Brep cannot
+        leave the current process, and are generated on a pool of threads instead,
+        as are all faces in IronPython.
+
+        Parameters
+        ----------
+        processes : int, optional
+            The number of workers, by default the number of CPUs.
+            With a single worker, the faces are generated one after the other.
+        """
+        surfaces = isinstance(self.rhino_brep, (list, tuple)) and all(
+            isinstance(face, Surface) for face in self.rhino_brep
+        )
+
+        if surfaces:
+            specs = [LayerSpec(self.layer_cls, face, self.options, **self.arguments) for face in self.rhino_brep]
+            if processes == 1 or len(specs) < 2 or compas.IPY:
+                self.layers = [generate_layer(spec) for spec in specs]
+            else:
+                from concurrent.futures import ProcessPoolExecutor
+
+                with ProcessPoolExecutor(max_workers=processes) as executor:
+                    self.layers = list(executor.map(generate_layer, specs))
+        else:
+            faces = list(range(self.face_count))
+            if processes == 1:
+                self.layers = [self._generate_face(face_index) for face_index in faces]
+            else:
+                self.layers = map_threads(self._generate_face, faces, processes or 4)
+
+        self.stitch()
+
+    def stitch(self):
+        """Merge the tiles of the faces, removing the duplicates along the seams.
+
+        Only tiles of different faces are compared, the overlaps within a face are left as generated.
+        In IronPython, the overlaps are found in pure Python.
+
+        Returns
+        -------
+        int
+            The number of removed tiles.
+        """
+        tiles = []
+        tile_faces = []
+        for face_index, layer in enumerate(self.layers):
+            tiles.extend(layer.tiles)
+            tile_faces.extend([face_index] * len(layer.tiles))
+
+        spatial = spatial_functions()
+        points = [tile.center for tile in tiles]
+        radii = [tile.diameter / 2 for tile in tiles]
+        first, second, _ = spatial.find_overlaps(points, radii, self.options.get("seam_tolerance", 0.0))
+
+        seams = [(i, j) for i, j in zip(_tolist(first), _tolist(second)) if tile_faces[i] != tile_faces[j]]
+        priorities = [-face_index for face_index in tile_faces]
+        dropped = spatial.select_non_overlapping(len(tiles), [i for i, _ in seams], [j for _, j in seams], priorities)
+        dropped = set(_tolist(dropped))
+
+        self.tiles = [tile for index, tile in enumerate(tiles) if index not in dropped]
+        self.tile_faces = [face for index, face in enumerate(tile_faces) if index not in dropped]
+        return len(dropped)
@@ -0,0 +1,211 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from copy import copy
+
+
+class AttributeArray(object):
+    """Per-tile values that are only converted when the tile is resolved.
+
+    Use it to store the result of a batched computation in an overlay,
+    e.g. the rows of a NumPy array with a `factory` that turns a row into a :class:`compas.geometry.Frame`.
+
+    Parameters
+    ----------
+    values : sequence
+        The raw values, one per changed tile.
+    factory : callable, optional
+        Converts a raw value into the attribute value.
+
+    """
+
+    def __init__(self, values, factory=None):
+        self.values = values
+        self.factory = factory
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, position):
+        value = self.values[position]
+        if self.factory:
+            return self.factory(value)
+        return value
+
+
+class _ArrayItem(object):
+    __slots__ = ["array", "position"]
+
+    def __init__(self, array, position):
+        self.array = array
+        self.position = position
+
+
+def _resolved(value):
+    if isinstance(value, _ArrayItem):
+        return value.array[value.position]
+    return value
+
+
+class LayerOverlay(object):
+    """Per-tile attribute changes stacked on top of a layer.
+
+    The base layer and its tiles are never modified. Only the changed attributes are stored,
+    as one ``{tile_index: value}`` mapping per attribute name (e.g. ``"color"``, ``"tag"`` or ``"base_frame"``).
+    Overlays can be stacked on top of other overlays, the changes of the upper overlays take precedence.
+
+    The tiles of the overlay are resolved lazily: unchanged tiles are the tiles of the base layer,
+    changed tiles are shallow copies of them with the changed attributes applied.
+    Any other attribute is looked up on the base layer.
+
+    Parameters
+    ----------
+    base : :class:`~compas_urt.design.DesignLayer` | :class:`LayerOverlay`
+        The layer to alter.
+
+    Attributes
+    ----------
+    base : :class:`~compas_urt.design.DesignLayer` | :class:`LayerOverlay`
+        The altered layer.
+    attributes : dict[str, dict[int, object]]
+        The changed values per attribute name and tile index.
+
+    """
+
+    def __init__(self, base):
+        self.base = base
+        self.attributes = {}
+        self._tiles = None
+
+    def __getattr__(self, name):
+        # only called for attributes that are not found on the overlay itself
+        if name.startswith("_") or name in ("base", "attributes"):
+            raise AttributeError(name)
+        return getattr(self.base, name)
+
+    @property
+    def root(self):
+        """:class:`~compas_urt.design.DesignLayer` : The layer at the bottom of the stack of overlays."""
+        layer = self.base
+        while isinstance(layer, LayerOverlay):
+            layer = layer.base
+        return layer
+
+    @property
+    def tiles(self):
+        """list[:class:`~compas_urt.design.Tile`] : The resolved tiles."""
+        if self._tiles is None:
+            self._tiles = self.resolve()
+        return self._tiles
+
+    @tiles.setter
+    def tiles(self, tiles):
+        self._tiles = tiles
+
+    def set_attribute(self, index, name, value):
+        """Change an attribute of a single tile.
+
+        Parameters
+        ----------
+        index : int
+            The index of the tile.
+        name : str
+            The name of the attribute.
+        value : object
+            The new value.
+
+        """
+        self.attributes.setdefault(name, {})[index] = value
+        self._tiles = None
+
+    def set_attributes(self, indices, name, values):
+        """Change an attribute of several tiles.
+
+        Parameters
+        ----------
+        indices : list[int]
+            The indices of the tiles.
+        name : str
+            The name of the attribute.
+        values : list[object] | :class:`AttributeArray` | object
+            The new values, one per tile, or a single value shared by all tiles.
+
+        """
+        changes = self.attributes.setdefault(name, {})
+        if isinstance(values, AttributeArray):
+            for position, index in enumerate(indices):
+                changes[index] = _ArrayItem(values, position)
+        elif isinstance(values, (list, tuple)):
+            changes.update(zip(indices, values))
+        else:
+            for index in indices:
+                changes[index] = values
+        self._tiles = None
+
+    def attribute(self, index, name):
+        """Get the resolved value of an attribute of a tile.
+
+        Parameters
+        ----------
+        index : int
+            The index of the tile.
+        name : str
+            The name of the attribute.
+
+        Returns
+        -------
+        object
+
+        """
+        layer = self
+        while isinstance(layer, LayerOverlay):
+            changes = layer.attributes.get(name)
+            if changes and index in changes:
+                return _resolved(changes[index])
+            layer = layer.base
+        return getattr(layer.tiles[index], name)
+
+    def changes(self):
+        """Collect the changes of this overlay and of the overlays below it.
+
+        Returns
+        -------
+        dict[int, dict[str, object]]
+            The changed attributes per tile index.
+
+        """
+        stack = []
+        layer = self
+        while isinstance(layer, LayerOverlay):
+            stack.append(layer)
+            layer = layer.base
+
+        changes = {}
+        for overlay in reversed(stack):
+            for name, values in overlay.attributes.items():
+                for index, value in values.items():
+                    changes.setdefault(index, {})[name] = value
+
+        # values overridden further up the stack are never converted
+        for values in changes.values():
+            for name, value in values.items():
+                values[name] = _resolved(value)
+        return changes
+
+    def resolve(self):
+        """Resolve the tiles of the overlay.
+
+        Returns
+        -------
+        list[:class:`~compas_urt.design.Tile`]
+            The tiles of the base layer, with shallow copies in place of the changed tiles.
+
+        """
+        tiles = self.root.tiles[:]
+        for index, values in self.changes().items():
+            tile = copy(tiles[index])
+            for name, value in values.items():
+                setattr(tile, name, value)
+            tiles[index] = tile
+        return tiles
@@ -0,0 +1,94 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from compas.colors import Color
+
+# shared colours, by their rounded components
+_PALETTE = {}
+
+# past this size, e.g. with the colours of many different images, the palette starts over
+MAX_PALETTE_SIZE = 65536
+
+_COMPONENTS = ("r", "g", "b", "a", "_r", "_g", "_b", "_a")
+
+
+class PaletteColor(Color):
+    """An immutable colour, shared by all the tiles of the same colour.
+
+    Use :func:`palette_color` to get the shared instance of a colour, instead of creating one.
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(PaletteColor, self).__init__(*args, **kwargs)
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if name in _COMPONENTS and getattr(self, "_frozen", False):
+            raise Exception("Palette colors are shared and cannot be changed, use palette_color for another color.")
+        super(PaletteColor, self).__setattr__(name, value)
+
+    def __hash__(self):
+        return hash(self.rgba)
+
+    def __reduce__(self):
+        # copies and unpickled colours are the shared instance
+        return palette_color, self.rgba
+
+    @property
+    def dtype(self):
+        # serialized like any other color
+        return "compas.colors/Color"
+
+
+def palette_color(red, green, blue, alpha=1.0):
+    """Get the shared instance of a colour.
+
+    Parameters
+    ----------
+    red : float
+        The red component in the range of 0-1.
+    green : float
+        The green component in the range of 0-1.
+    blue : float
+        The blue component in the range of 0-1.
+    alpha : float, optional
+        The opacity in the range of 0-1.
+
+    Returns
+    -------
+    :class:`PaletteColor`
+
+    Examples
+    --------
+    >>> palette_color(1, 1, 1) is palette_color(1.0, 1.0, 1.0)
+    True
+
+    """
+    key = (round(red, 6), round(green, 6), round(blue, 6), round(alpha, 6))
+    color = _PALETTE.get(key)
+    if color is None:
+        if len(_PALETTE) >= MAX_PALETTE_SIZE:
+            _PALETTE.clear()
+        color = _PALETTE[key] = PaletteColor(*key)
+    return color
+
+
+def to_palette(color):
+    """Get the shared instance of the colour of a :class:`compas.colors.Color`.
+
+    Parameters
+    ----------
+    color : :class:`compas.colors.Color`
+
+    Returns
+    -------
+    :class:`PaletteColor`
+    """
+    if isinstance(color, PaletteColor):
+        return color
+    return palette_color(color.r, color.g, color.b, color.a)
+
+
+WHITE = palette_color(1.0, 1.0, 1.0)
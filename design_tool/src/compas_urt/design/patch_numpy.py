@@ -0,0 +1,333 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import copy
+import json
+import os
+from bisect import bisect_left
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from compas_urt.design.store_numpy import TileStore
+from compas_urt.design.store_numpy import _inverse
+from compas_urt.design.store_numpy import _save_array
+from compas_urt.design.store_numpy import _save_arrays
+from compas_urt.design.store_numpy import _write_header
+from compas_urt.design.store_numpy import _write_segment
+from compas_urt.design.tilefile_numpy import COLUMNS
+from compas_urt.design.tilefile_numpy import design_to_arrays
+
+# Design patches: the changes between two versions of a design, as arrays.
+#
+#   removed    int64, the ids of the removed tiles in the old version
+#   modified   int64, the ids of the changed tiles in the old version
+#   frames ... one row per changed tile, in the order of modified, followed by one row per added tile,
+#              as in tile files, with their palette and layer names
+#   inserted   int64, the positions of the added tiles in the new version
+#
+# The ids are the ids of a store when the old version was read from it, otherwise the positions
+# of the tiles in the old version, "positional" in the header, with the "base_count" of the old version.
+# The new version holds the tiles of the old version in the same order, without the removed tiles,
+# and with the added tiles at their positions. Tiles that moved in the order are removed and added again.
+# Saved with numpy.savez, together with a JSON header.
+
+FORMAT = "compas_urt.patch"
+VERSION = 1
+
+
+def _ids(arrays):
+    # the ids of tiles read from a store, otherwise their positions
+    if "ids" in arrays:
+        return np.asarray(arrays["ids"], dtype=np.int64)
+    return np.arange(len(arrays["frames"]), dtype=np.int64)
+
+
+def _match_positions(old, new, tolerance):
+    # pair every new tile with the nearest old tile within the tolerance, each old tile at most once
+    if not len(old["frames"]) or not len(new["frames"]):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    distances, nearest = cKDTree(old["frames"][:, :3]).query(new["frames"][:, :3], distance_upper_bound=tolerance)
+    new_positions = np.flatnonzero(np.isfinite(distances))
+    order = np.argsort(distances[new_positions], kind="stable")
+    old_positions, first = np.unique(nearest[new_positions][order], return_index=True)
+    return old_positions, new_positions[order][first]
+
+
+def _match_keys(old, new, key):
+    # pair the tiles with the same value in a column
+    _, old_positions, new_positions = np.intersect1d(old[key], new[key], assume_unique=True, return_indices=True)
+    return old_positions, new_positions
+
+
+def _in_order(old_positions, new_positions):
+    # which of the matched tiles keep their order, the longest increasing run of old positions in the new order
+    order = np.argsort(new_positions, kind="stable")
+    values = old_positions[order]
+    kept = np.ones(len(values), dtype=bool)
+    if np.all(np.diff(values) > 0):
+        return kept
+
+    # patience sorting, with the predecessor of every value to trace back the run
+    tails = []
+    tail_indices = []
+    previous = np.full(len(values), -1, dtype=np.int64)
+    for index, value in enumerate(values.tolist()):
+        position = bisect_left(tails, value)
+        if position:
+            previous[index] = tail_indices[position - 1]
+        if position == len(tails):
+            tails.append(value)
+            tail_indices.append(index)
+        else:
+            tails[position] = value
+            tail_indices[position] = index
+
+    kept[:] = False
+    index = tail_indices[-1]
+    while index >= 0:
+        kept[index] = True
+        index = previous[index]
+    return kept[_inverse(order)]
+
+
+def _changed(old, new, old_positions, new_positions, precision):
+    # which of the matched tiles differ in any column
+    changed = np.zeros(len(old_positions), dtype=bool)
+    for column in ("frames", "diameters", "thicknesses", "uvs"):
+        difference = np.abs(old[column][old_positions] - new[column][new_positions]) > precision
+        changed |= difference.reshape(len(old_positions), -1).any(axis=1)
+
+    old_colors = np.asarray(old["palette"])[old["colors"][old_positions]]
+    new_colors = np.asarray(new["palette"])[new["colors"][new_positions]]
+    changed |= np.any(np.abs(old_colors - new_colors) > precision, axis=1)
+    changed |= old["tags"][old_positions] != new["tags"][new_positions]
+
+    old_layers = np.array(list(old["layer_names"]) or [""], dtype=object)[old["layers"][old_positions]]
+    new_layers = np.array(list(new["layer_names"]) or [""], dtype=object)[new["layers"][new_positions]]
+    changed |= old_layers != new_layers
+    return changed
+
+
+def diff_arrays(old, new, tolerance=1.0, key=None, precision=1e-6):
+    """Find the changes between two versions of a design, as arrays.
+
+    Tiles are matched either by a key, a column of unique values identifying the tiles such as their tags,
+    or by the position of their centres. A matched tile is modified when any of its values changed.
+
+    Parameters
+    ----------
+    old : dict
+        The old version, see :func:`~compas_urt.design.tilefile_numpy.read_arrays`,
+        or the arrays of a :class:`~compas_urt.design.store_numpy.TileStore` with the ``"ids"`` of the tiles.
+    new : dict
+        The new version.
+    tolerance : float, optional
+        The distance up to which the centres of matching tiles may have moved.
+    key : str, optional
+        The column of unique values identifying the tiles, e.g. ``"tags"``, instead of their positions.
+    precision : float, optional
+        The differences in the values up to which a tile is unchanged.
+
+    Returns
+    -------
+    dict
+        The patch, see :func:`apply_patch`.
+    """
+    if key is None:
+        old_positions, new_positions = _match_positions(old, new, tolerance)
+    else:
+        old_positions, new_positions = _match_keys(old, new, key)
+
+    positional = "ids" not in old
+    if positional:
+        in_order = _in_order(old_positions, new_positions)
+        old_positions, new_positions = old_positions[in_order], new_positions[in_order]
+
+    changed = _changed(old, new, old_positions, new_positions, precision)
+    removed = np.ones(len(old["frames"]), dtype=bool)
+    removed[old_positions] = False
+    added = np.ones(len(new["frames"]), dtype=bool)
+    added[new_positions] = False
+    inserted = np.flatnonzero(added).astype(np.int64)
+
+    rows = np.concatenate([new_positions[changed], inserted]).astype(np.int64)
+    patch = {column: new[column][rows] for column in COLUMNS}
+    patch["palette"] = np.asarray(new["palette"], dtype=float).reshape(-1, 4)
+    patch["layer_names"] = list(new["layer_names"])
+    patch["removed"] = _ids(old)[removed]
+    patch["modified"] = _ids(old)[old_positions[changed]]
+    patch["inserted"] = inserted
+    patch["positional"] = positional
+    patch["base_count"] = len(old["frames"])
+    return patch
+
+
+def diff_designs(old, new, tolerance=1.0, key=None, precision=1e-6):
+    """Find the changes between two versions of a design.
+
+    The tiles are identified by their positions in the old version, which :func:`apply_patch`
+    maps to the ids of a store written from the old version, or patched to it.
+
+    Parameters
+    ----------
+    old : :class:`~compas_urt.design.TileDesign`
+        The old version.
+    new : :class:`~compas_urt.design.TileDesign`
+        The new version.
+    tolerance : float, optional
+    key : str, optional
+    precision : float, optional
+        See :func:`diff_arrays`.
+
+    Returns
+    -------
+    dict
+        The patch, see :func:`apply_patch`.
+    """
+    return diff_arrays(design_to_arrays(old), design_to_arrays(new), tolerance, key, precision)
+
+
+def write_patch(patch, filepath, compress=True):
+    """Write a patch to a file.
+
+    Parameters
+    ----------
+    patch : dict
+    filepath : str
+    compress : bool, optional
+        If True, deflate the arrays.
+    """
+    header = {
+        "format": FORMAT,
+        "version": VERSION,
+        "layers": patch["layer_names"],
+        "positional": patch["positional"],
+        "base_count": patch["base_count"],
+    }
+    arrays = {column: patch[column] for column in COLUMNS + ["palette", "removed", "modified", "inserted"]}
+    save = np.savez_compressed if compress else np.savez
+    with open(filepath, "wb") as f:
+        save(f, header=np.array(json.dumps(header)), **arrays)
+
+
+def read_patch(filepath):
+    """Read a patch from a file.
+
+    Parameters
+    ----------
+    filepath : str
+
+    Returns
+    -------
+    dict
+    """
+    with np.load(filepath) as npz:
+        header = json.loads(str(npz["header"]))
+        if header.get("format") != FORMAT:
+            raise Exception("{} is not a design patch.".format(filepath))
+        if header["version"] > VERSION:
+            raise Exception(
+                "Patch version {} is newer than the supported version {}.".format(header["version"], VERSION)
+            )
+        patch = {name: npz[name] for name in npz.files if name != "header"}
+    patch["layer_names"] = header["layers"]
+    patch["positional"] = header["positional"]
+    patch["base_count"] = header["base_count"]
+    return patch
+
+
+def apply_patch(store, patch):
+    """Apply a patch to a tile store, in time proportional to the size of the patch.
+
+    The removed and the modified tiles are marked as removed, and the modified and the added tiles
+    are appended to the store as a new segment, with new ids. The store is changed by replacing its header,
+    so that readers see the store before or after the patch, never in between.
+
+    Parameters
+    ----------
+    store : :class:`~compas_urt.design.store_numpy.TileStore` | str
+        The store, or its directory.
+    patch : dict
+        The patch, with the ids of the tiles in the store, or the positions of the tiles
+        in the version of the design the store holds, see :meth:`TileStore.ids_at_positions`.
+        A patch by store ids ends the version by position, later patches must be made by store ids as well.
+
+    Returns
+    -------
+    tuple[ndarray, ndarray]
+        The new ids of the modified tiles, in the order of ``patch["modified"]``, and the ids of the added tiles.
+    """
+    if not isinstance(store, TileStore):
+        store = TileStore(store)
+    header = copy.deepcopy(store.header)
+
+    removed = np.asarray(patch["removed"], dtype=np.int64)
+    modified = np.asarray(patch["modified"], dtype=np.int64)
+    if patch["positional"]:
+        if header["position_ids"] and patch["base_count"] != header["position_count"]:
+            raise Exception(
+                "The patch was made against a design of {} tiles, the store holds {} tiles.".format(
+                    patch["base_count"], header["position_count"]
+                )
+            )
+        inserted = np.asarray(patch["inserted"], dtype=np.int64)
+        delta = {"removed": np.sort(removed), "modified": modified, "inserted": inserted}
+        removed = store.ids_at_positions(removed)
+        modified = store.ids_at_positions(modified)
+
+    removed = np.union1d(removed, modified).astype(np.int64)
+    if len(removed) and (removed[0] < 0 or removed[-1] >= store.size):
+        raise Exception("The patch removes tiles that are not in the store.")
+
+    # the layers are indexed by their names in the store
+    layer_names = header["layers"]
+    for name in patch["layer_names"]:
+        if name not in layer_names:
+            layer_names.append(name)
+    layer_map = np.array([layer_names.index(name) for name in patch["layer_names"]], dtype=np.int32)
+
+    # the ids of the rows of the patch, which are sorted by grid cell in their segment
+    ids = np.zeros(0, dtype=np.int64)
+    if len(patch["frames"]):
+        arrays = {column: patch[column] for column in COLUMNS}
+        arrays["layers"] = layer_map[arrays["layers"]] if len(layer_map) else arrays["layers"]
+        arrays["palette"] = patch["palette"]
+        name = "segment_{:06d}".format(len(header["segments"]))
+        segment, order = _write_segment(os.path.join(store.directory, name), arrays, None, header["uv_resolution"])
+        segment["name"] = name
+        segment["offset"] = store.size
+        header["segments"].append(segment)
+        ids = store.size + _inverse(order)
+
+    count = len(patch["modified"])
+    previous = [header["removed"]]
+    header["generation"] += 1
+    header["removed"] = "removed_{:06d}.npy".format(header["generation"])
+    _save_array(store.directory, header["removed"], np.union1d(store.removed, removed).astype(np.int64))
+
+    # the changes of the position ids, or none after a patch by store ids
+    if patch["positional"]:
+        order = np.argsort(delta["modified"])
+        delta["modified"] = delta["modified"][order]
+        delta["modified_ids"] = ids[:count][order]
+        delta["inserted_ids"] = ids[count:]
+        name = "positions_{:06d}.npz".format(header["generation"])
+        _save_arrays(store.directory, name, delta)
+        header["position_deltas"].append(name)
+        header["position_count"] += len(inserted) - len(delta["removed"])
+    elif header["position_ids"]:
+        previous += [header["position_ids"]] + header["position_deltas"]
+        header["position_ids"] = None
+        header["position_deltas"] = []
+    _write_header(store.directory, header)
+
+    for name in previous:
+        try:
+            os.remove(os.path.join(store.directory, name))
+        except OSError:
+            pass
+    store.reload()
+    return ids[:count], ids[count:]
@@ -0,0 +1,370 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+
+def bilinear_interpolate(values, u_params, v_params, u, v):
+    """Interpolate values given on a regular UV grid.
+
+    Parameters
+    ----------
+    values : ndarray
+        The grid values (nu, nv, ...).
+    u_params : ndarray
+        The increasing U parameters of the grid (nu,).
+    v_params : ndarray
+        The increasing V parameters of the grid (nv,).
+    u : ndarray
+        The U parameters to sample at (n,).
+    v : ndarray
+        The V parameters to sample at (n,).
+
+    Returns
+    -------
+    ndarray
+        The interpolated values (n, ...).
+        Parameters outside of the grid are clamped to its border.
+
+    """
+    u = np.clip(np.asarray(u, dtype=float), u_params[0], u_params[-1])
+    v = np.clip(np.asarray(v, dtype=float), v_params[0], v_params[-1])
+
+    i = np.clip(np.searchsorted(u_params, u, side="right") - 1, 0, len(u_params) - 2)
+    j = np.clip(np.searchsorted(v_params, v, side="right") - 1, 0, len(v_params) - 2)
+
+    tu = (u - u_params[i]) / (u_params[i + 1] - u_params[i])
+    tv = (v - v_params[j]) / (v_params[j + 1] - v_params[j])
+
+    extra = (slice(None),) + (None,) * (values.ndim - 2)
+    tu = tu[extra]
+    tv = tv[extra]
+
+    return (
+        values[i, j] * (1 - tu) * (1 - tv)
+        + values[i + 1, j] * tu * (1 - tv)
+        + values[i, j + 1] * (1 - tu) * tv
+        + values[i + 1, j + 1] * tu * tv
+    )
+
+
+def nearest_lookup(values, u_params, v_params, u, v):
+    """Look up the values of the nearest grid samples.
+
+    Use this instead of :func:`bilinear_interpolate` for values that cannot be blended, such as indices.
+
+    Parameters
+    ----------
+    values : ndarray
+        The grid values (nu, nv, ...).
+    u_params : ndarray
+        The increasing U parameters of the grid (nu,).
+    v_params : ndarray
+        The increasing V parameters of the grid (nv,).
+    u : ndarray
+        The U parameters to sample at (n,).
+    v : ndarray
+        The V parameters to sample at (n,).
+
+    Returns
+    -------
+    ndarray
+        The values of the nearest samples (n, ...).
+
+    """
+    i = np.rint(np.interp(u, u_params, np.arange(len(u_params)))).astype(int)
+    j = np.rint(np.interp(v, v_params, np.arange(len(v_params)))).astype(int)
+    return values[i, j]
+
+
+def points_in_polygon(points, polygon):
+    """Even-odd test of 2D points against a closed polygon.
+
+    Parameters
+    ----------
+    points : ndarray
+        The test points (n, 2).
+    polygon : ndarray
+        The polygon vertices (m, 2), without repeating the first vertex.
+
+    Returns
+    -------
+    ndarray
+        Boolean flags (n,).
+
+    """
+    x = points[:, 0]
+    y = points[:, 1]
+    inside = np.zeros(len(points), dtype=bool)
+    for (x0, y0), (x1, y1) in zip(polygon, np.roll(polygon, -1, axis=0)):
+        if y0 == y1:
+            continue
+        crosses = (y0 > y) != (y1 > y)
+        x_cross = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+        inside ^= crosses & (x < x_cross)
+    return inside
+
+
+class UVRaster(object):
+    """A surface sampled on a regular grid over its UV domain.
+
+    The surface is evaluated once per grid sample,
+    fields computed on the grid are read back by vectorized interpolation.
+
+    Parameters
+    ----------
+    surface : :class:`compas.geometry.Surface`
+        The sampled surface.
+    nu : int
+        The number of samples in the U direction.
+    nv : int, optional
+        The number of samples in the V direction.
+        Defaults to `nu`.
+
+    Attributes
+    ----------
+    u_params : ndarray
+        The U parameters of the samples (nu,).
+    v_params : ndarray
+        The V parameters of the samples (nv,).
+    points : ndarray
+        The surface points (nu, nv, 3).
+
+    """
+
+    def __init__(self, surface, nu, nv=None):
+        nv = nv or nu
+        self.u_params = np.linspace(surface.u_domain[0], surface.u_domain[1], nu)
+        self.v_params = np.linspace(surface.v_domain[0], surface.v_domain[1], nv)
+        self.points = np.array(
+            [[list(surface.point_at(u, v)) for v in self.v_params] for u in self.u_params], dtype=float
+        )
+
+    @property
+    def shape(self):
+        return len(self.u_params), len(self.v_params)
+
+    @property
+    def tangents(self):
+        """tuple[ndarray, ndarray] : The partial derivatives of the surface in U and V at the samples (nu, nv, 3).
+
+        The derivatives are estimated with finite differences of the sampled points.
+        """
+        du = np.gradient(self.points, self.u_params, axis=0, edge_order=2)
+        dv = np.gradient(self.points, self.v_params, axis=1, edge_order=2)
+        return du, dv
+
+    @property
+    def normals(self):
+        """ndarray : The unit normals of the surface at the samples (nu, nv, 3)."""
+        du, dv = self.tangents
+        normals = np.cross(du, dv)
+        lengths = np.linalg.norm(normals, axis=-1, keepdims=True)
+        return normals / np.where(lengths > 0, lengths, 1.0)
+
+    @property
+    def uv(self):
+        """ndarray : The UV parameters of all samples, flattened (nu * nv, 2)."""
+        uu, vv = np.meshgrid(self.u_params, self.v_params, indexing="ij")
+        return np.column_stack((uu.ravel(), vv.ravel()))
+
+    def interpolate(self, values, uv_params):
+        """Interpolate a field given on the raster at UV parameters.
+
+        Parameters
+        ----------
+        values : ndarray
+            The field values (nu, nv, ...).
+        uv_params : list[tuple[float, float]] | ndarray
+            The UV parameters to sample at.
+
+        Returns
+        -------
+        ndarray
+
+        """
+        uv_params = np.asarray(uv_params, dtype=float).reshape(-1, 2)
+        return bilinear_interpolate(values, self.u_params, self.v_params, uv_params[:, 0], uv_params[:, 1])
+
+    def lookup(self, values, uv_params):
+        """Look up the nearest raster values at UV parameters.
+
+        Parameters
+        ----------
+        values : ndarray
+            The field values (nu, nv, ...).
+        uv_params : list[tuple[float, float]] | ndarray
+            The UV parameters to sample at.
+
+        Returns
+        -------
+        ndarray
+
+        """
+        uv_params = np.asarray(uv_params, dtype=float).reshape(-1, 2)
+        return nearest_lookup(values, self.u_params, self.v_params, uv_params[:, 0], uv_params[:, 1])
+
+
+class DistanceField(object):
+    """Distances from the samples of a UV raster to a set of curves.
+
+    Parameters
+    ----------
+    raster : :class:`UVRaster`
+        The sampled surface.
+    engine : :class:`~compas_urt.design.distance_numpy.CurvesDistanceEngine`
+        The distance engine of the curves.
+    signed : bool, optional
+        If True, the distances are negative inside of closed curves.
+        The inside is resolved in the UV domain of the surface.
+    surface : :class:`compas.geometry.Surface`, optional
+        The sampled surface, required for the signed distances.
+
+    Attributes
+    ----------
+    distances : ndarray
+        The distances (nu, nv).
+    curve_ids : ndarray
+        The index of the nearest curve (nu, nv).
+
+    """
+
+    def __init__(self, raster, engine, signed=False, surface=None):
+        self.raster = raster
+        self.signed = signed
+
+        nu, nv = raster.shape
+        distances, curve_ids, _ = engine.query(raster.points.reshape(-1, 3))
+        self.distances = distances.reshape(nu, nv)
+        self.curve_ids = curve_ids.reshape(nu, nv)
+
+        if signed:
+            if surface is None:
+                raise Exception("Signed distance fields need the surface to resolve the inside of the curves.")
+            inside = np.zeros(nu * nv, dtype=bool)
+            for curve in engine.curves:
+                if not curve.is_closed:
+                    continue
+                _, points = curve.divide_by_count(64, return_points=True)
+                polygon = [surface.closest_point(point, return_parameters=True)[1] for point in points[:-1]]
+                inside ^= points_in_polygon(raster.uv, np.asarray(polygon, dtype=float))
+            self.distances[inside.reshape(nu, nv)] *= -1
+
+    def distances_at(self, uv_params):
+        """Interpolate the distances at UV parameters.
+
+        Parameters
+        ----------
+        uv_params : list[tuple[float, float]] | ndarray
+
+        Returns
+        -------
+        ndarray
+
+        """
+        return self.raster.interpolate(self.distances, uv_params)
+
+    def curve_ids_at(self, uv_params):
+        """Look up the index of the nearest curve at UV parameters.
+
+        Parameters
+        ----------
+        uv_params : list[tuple[float, float]] | ndarray
+
+        Returns
+        -------
+        ndarray
+
+        """
+        return self.raster.lookup(self.curve_ids, uv_params)
+
+
+class CurvatureField(object):
+    """Principal curvatures of a surface on the samples of a UV raster.
+
+    The curvatures are computed from finite differences of the sampled points,
+    so no surface derivatives are evaluated.
+
+    Parameters
+    ----------
+    raster : :class:`UVRaster`
+        The sampled surface.
+
+    Attributes
+    ----------
+    k1 : ndarray
+        The maximum principal curvature (nu, nv).
+    k2 : ndarray
+        The minimum principal curvature (nu, nv).
+
+    """
+
+    def __init__(self, raster):
+        self.raster = raster
+
+        du, dv = raster.tangents
+        duu = np.gradient(du, raster.u_params, axis=0, edge_order=2)
+        duv = np.gradient(du, raster.v_params, axis=1, edge_order=2)
+        dvv = np.gradient(dv, raster.v_params, axis=1, edge_order=2)
+        normals = raster.normals
+
+        # first and second fundamental forms
+        e = (du * du).sum(axis=-1)
+        f = (du * dv).sum(axis=-1)
+        g = (dv * dv).sum(axis=-1)
+        l = (duu * normals).sum(axis=-1)  # noqa: E741
+        m = (duv * normals).sum(axis=-1)
+        n = (dvv * normals).sum(axis=-1)
+
+        det = e * g - f * f
+        det = np.where(det > 0, det, np.inf)
+        mean = (e * n - 2 * f * m + g * l) / (2 * det)
+        gaussian = (l * n - m * m) / det
+        root = np.sqrt(np.clip(mean * mean - gaussian, 0.0, None))
+
+        self.k1 = mean + root
+        self.k2 = mean - root
+
+    @property
+    def max_curvature(self):
+        """ndarray : The largest absolute principal curvature (nu, nv)."""
+        return np.maximum(np.abs(self.k1), np.abs(self.k2))
+
+    def curvatures_at(self, uv_params):
+        """Interpolate the principal curvatures at UV parameters.
+
+        Parameters
+        ----------
+        uv_params : list[tuple[float, float]] | ndarray
+
+        Returns
+        -------
+        tuple[ndarray, ndarray]
+            The maximum and minimum principal curvatures (n,).
+
+        """
+        return self.raster.interpolate(self.k1, uv_params), self.raster.interpolate(self.k2, uv_params)
+
+    def max_diameters_at(self, uv_params, tolerance):
+        """Compute the largest diameter of a flat disk that stays within a tolerance of the surface.
+
+        The gap between the rim of a disk of radius ``r`` tangent to a surface with a curvature ``k``
+        is approximated by the sagitta ``k * r**2 / 2``.
+
+        Parameters
+        ----------
+        uv_params : list[tuple[float, float]] | ndarray
+            The centres of the disks.
+        tolerance : float
+            The largest allowed gap between the rim and the surface.
+
+        Returns
+        -------
+        ndarray
+            The diameters (n,), infinite on flat regions.
+
+        """
+        curvatures = self.raster.interpolate(self.max_curvature, uv_params)
+        with np.errstate(divide="ignore"):
+            return 2 * np.sqrt(2 * tolerance / curvatures)
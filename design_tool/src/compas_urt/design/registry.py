@@ -0,0 +1,107 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from collections import OrderedDict
+
+from compas_urt.design.hashing import brep_hash
+from compas_urt.design.hashing import geometry_hash
+
+# the most recently used surfaces, by the hash of their geometry
+_REGISTRY = OrderedDict()
+
+MAX_REGISTRY_SIZE = 16
+
+
+class SharedSurface(object):
+    """A converted surface shared by all the layers on the same geometry, with its derived data.
+
+    Parameters
+    ----------
+    compas_surface : :class:`compas.geometry.Surface`
+        The converted surface.
+
+    Attributes
+    ----------
+    compas_surface : :class:`compas.geometry.Surface`
+        The converted surface.
+
+    """
+
+    def __init__(self, compas_surface):
+        self.compas_surface = compas_surface
+        self._derived = {}
+
+    def derived(self, key, factory):
+        """Get data derived from the surface, computing it on the first request.
+
+        Parameters
+        ----------
+        key : tuple
+            The name of the data and its parameters, e.g. ``("uv_raster", 256)``.
+        factory : callable
+            Computes the data from nothing, when it is not available yet.
+
+        Returns
+        -------
+        object
+        """
+        if key not in self._derived:
+            self._derived[key] = factory()
+        return self._derived[key]
+
+
+def _convert(rhino_brep, face_index):
+    from compas_rhino.conversions import RhinoSurface
+
+    rhino_surface = rhino_brep.Faces[face_index].UnderlyingSurface()
+    return RhinoSurface.from_geometry(rhino_surface).to_compas()
+
+
+def shared_surface(rhino_brep, face_index=0):
+    """Get the shared surface of a face of a Brep, or of a COMPAS surface.
+
+    The surface is converted and checked once per geometry, no matter how many layers,
+    or how many copies of the Brep, use it.
+
+    Parameters
+    ----------
+    rhino_brep : :rhino:`Rhino.Geometry.Brep` | :class:`compas.geometry.Surface`
+        The Brep, or the COMPAS surface.
+    face_index : int, optional
+        The index of the face of the Brep.
+
+    Returns
+    -------
+    :class:`SharedSurface`
+    """
+    from compas.geometry import Surface
+
+    if isinstance(rhino_brep, Surface):
+        try:
+            key = ("surface", geometry_hash(rhino_brep))
+        except TypeError:
+            # not serializable, the registry holds on to the surface so that its id stays unique
+            key = ("id", id(rhino_brep))
+    else:
+        key = ("brep", brep_hash(rhino_brep), face_index)
+
+    shared = _REGISTRY.pop(key, None)
+    if shared is None:
+        if key[0] == "brep":
+            compas_surface = _convert(rhino_brep, face_index)
+        else:
+            compas_surface = rhino_brep
+        if compas_surface.u_domain[1] > 1 or compas_surface.v_domain[1] > 1:
+            raise Exception("Your surface is not reparameterized.")
+        shared = SharedSurface(compas_surface)
+
+    _REGISTRY[key] = shared
+    while len(_REGISTRY) > MAX_REGISTRY_SIZE:
+        _REGISTRY.popitem(last=False)
+    return shared
+
+
+def clear_registry():
+    """Forget all shared surfaces and their derived data."""
+    _REGISTRY.clear()
@@ -0,0 +1,151 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import math as m
+from itertools import product
+
+from compas.geometry import add_vectors
+from compas.geometry import dot_vectors
+from compas.geometry import length_vector
+from compas.geometry import scale_vector
+from compas.geometry import subtract_vectors
+
+# The overlap functions of :mod:`compas_urt.design.spatial_numpy` in pure Python, for IronPython,
+# with the same arguments, returning lists instead of arrays.
+
+_NEIGHBORHOOD = list(product((-1, 0, 1), repeat=3))
+
+
+def find_overlaps(points, radii, tolerance=0.0):
+    """Find the overlapping pairs of disks, based on their centre distance and their summed radii.
+
+    Parameters
+    ----------
+    points : list[list[float]]
+        The centres.
+    radii : list[float]
+        The radii.
+    tolerance : float, optional
+        Overlaps up to this depth are accepted.
+
+    Returns
+    -------
+    tuple[list[int], list[int], list[float]]
+        The indices of the first and the second disk of every overlapping pair, with ``i < j``,
+        and the depth of the overlap.
+
+    """
+    first = []
+    second = []
+    depths = []
+    if len(radii) < 2 or max(radii) <= 0:
+        return first, second, depths
+
+    # the disks by cell of a grid of the largest summed radii
+    cell_size = 2.0 * max(radii)
+    keys = [tuple(int(m.floor(value / cell_size)) for value in point) for point in points]
+    cells = {}
+    for index, key in enumerate(keys):
+        cells.setdefault(key, []).append(index)
+
+    for index, (x, y, z) in enumerate(keys):
+        for dx, dy, dz in _NEIGHBORHOOD:
+            for other in cells.get((x + dx, y + dy, z + dz), ()):
+                if other <= index:
+                    continue
+                depth = radii[index] + radii[other] - length_vector(subtract_vectors(points[index], points[other]))
+                if depth > tolerance:
+                    first.append(index)
+                    second.append(other)
+                    depths.append(depth)
+    return first, second, depths
+
+
+def select_non_overlapping(count, first, second, priorities):
+    """Greedily keep disks in order of priority, dropping the disks overlapping an already kept one.
+
+    Parameters
+    ----------
+    count : int
+        The number of disks.
+    first : list[int]
+        The first disk of every overlapping pair.
+    second : list[int]
+        The second disk of every overlapping pair.
+    priorities : list[float]
+        The priority of every disk, higher priorities are kept first.
+
+    Returns
+    -------
+    list[int]
+        The sorted indices of the dropped disks.
+
+    """
+    neighbors = {}
+    for i, j in zip(first, second):
+        neighbors.setdefault(i, []).append(j)
+        neighbors.setdefault(j, []).append(i)
+
+    dropped = set()
+    kept = set()
+    for index in sorted(sorted(neighbors), key=lambda index: -priorities[index]):
+        if index in dropped:
+            continue
+        kept.add(index)
+        dropped.update(neighbor for neighbor in neighbors[index] if neighbor not in kept)
+    return sorted(dropped)
+
+
+def nudge_apart(points, radii, normals=None, tolerance=0.0, max_iterations=10):
+    """Push overlapping disks apart until they no longer overlap.
+
+    Every overlapping pair is moved apart along the line between the centres,
+    by half of the overlap depth each. The moves of a disk are averaged.
+
+    Parameters
+    ----------
+    points : list[list[float]]
+        The centres.
+    radii : list[float]
+        The radii.
+    normals : list[list[float]], optional
+        If given, the moves are projected onto the planes of the disks.
+    tolerance : float, optional
+        Overlaps up to this depth are accepted.
+    max_iterations : int, optional
+        The maximum number of iterations.
+
+    Returns
+    -------
+    list[list[float]]
+        The moved centres.
+
+    """
+    points = [[float(value) for value in point] for point in points]
+    for _ in range(max_iterations):
+        first, second, depths = find_overlaps(points, radii, tolerance)
+        if not depths:
+            break
+
+        moves = [[0.0, 0.0, 0.0] for _ in points]
+        counts = [0] * len(points)
+        for i, j, depth in zip(first, second, depths):
+            direction = subtract_vectors(points[i], points[j])
+            length = length_vector(direction)
+            direction = scale_vector(direction, 1.0 / length) if length > 0 else [1.0, 0.0, 0.0]
+            half = scale_vector(direction, depth / 2)
+            moves[i] = add_vectors(moves[i], half)
+            moves[j] = subtract_vectors(moves[j], half)
+            counts[i] += 1
+            counts[j] += 1
+
+        for index, move in enumerate(moves):
+            if not counts[index]:
+                continue
+            move = scale_vector(move, 1.0 / counts[index])
+            if normals is not None:
+                move = subtract_vectors(move, scale_vector(normals[index], dot_vectors(move, normals[index])))
+            points[index] = add_vectors(points[index], move)
+
+    return points
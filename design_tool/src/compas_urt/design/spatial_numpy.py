@@ -0,0 +1,226 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from itertools import product
+
+import numpy as np
+
+# half of the 26 neighbour cells, so that every pair of cells is visited once
+_HALF_NEIGHBORHOOD = [offset for offset in product((-1, 0, 1), repeat=3) if offset > (0, 0, 0)]
+
+
+def _expand_ranges(starts, counts):
+    # concatenation of the ranges [start, start + count) without a python loop
+    total = counts.sum()
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    return np.arange(total) - offsets + np.repeat(starts, counts)
+
+
+class SpatialGrid(object):
+    """Uniform grid of points for fixed-radius neighbour queries.
+
+    The points are bucketed into cubic cells and sorted by cell,
+    so that the points of a cell are a contiguous range of the sorted order.
+
+    Parameters
+    ----------
+    points : ndarray
+        The points (n, 3).
+    cell_size : float
+        The size of the cells, at least the largest query distance.
+
+    """
+
+    def __init__(self, points, cell_size):
+        self.points = np.asarray(points, dtype=float).reshape(-1, 3)
+        self.cell_size = float(cell_size)
+
+        cells = np.floor(self.points / self.cell_size).astype(np.int64)
+        cells -= cells.min(axis=0) - 1 if len(cells) else 0
+        self.dimensions = cells.max(axis=0) + 2 if len(cells) else np.ones(3, dtype=np.int64)
+        keys = self._keys(cells)
+
+        self.order = np.argsort(keys, kind="stable")
+        self.sorted_keys = keys[self.order]
+        self.cells = cells
+
+    def _keys(self, cells):
+        return (cells[:, 0] * self.dimensions[1] + cells[:, 1]) * self.dimensions[2] + cells[:, 2]
+
+    def candidate_pairs(self):
+        """Find all pairs of points in the same or in adjacent cells.
+
+        Returns
+        -------
+        tuple[ndarray, ndarray]
+            The indices of the first and the second point of every pair, with ``i < j``.
+
+        """
+        first = []
+        second = []
+
+        # pairs within the same cell
+        starts = np.searchsorted(self.sorted_keys, self.sorted_keys, side="left")
+        ends = np.searchsorted(self.sorted_keys, self.sorted_keys, side="right")
+        positions = np.arange(len(self.sorted_keys))
+        counts = ends - positions - 1
+        first.append(np.repeat(positions, counts))
+        second.append(_expand_ranges(positions + 1, counts))
+
+        # pairs with the cells of the half neighbourhood
+        for offset in _HALF_NEIGHBORHOOD:
+            keys = self._keys(self.cells[self.order] + np.array(offset, dtype=np.int64))
+            starts = np.searchsorted(self.sorted_keys, keys, side="left")
+            counts = np.searchsorted(self.sorted_keys, keys, side="right") - starts
+            first.append(np.repeat(positions, counts))
+            second.append(_expand_ranges(starts, counts))
+
+        first = self.order[np.concatenate(first)]
+        second = self.order[np.concatenate(second)]
+        return np.minimum(first, second), np.maximum(first, second)
+
+    def pairs_within(self, distance):
+        """Find all pairs of points closer than a distance.
+
+        Parameters
+        ----------
+        distance : float
+            The query distance, at most the cell size.
+
+        Returns
+        -------
+        tuple[ndarray, ndarray, ndarray]
+            The indices of the first and the second point of every pair, and their distance.
+
+        """
+        first, second = self.candidate_pairs()
+        distances = np.linalg.norm(self.points[first] - self.points[second], axis=1)
+        close = distances < distance
+        return first[close], second[close], distances[close]
+
+
+def find_overlaps(points, radii, tolerance=0.0):
+    """Find the overlapping pairs of disks, based on their centre distance and their summed radii.
+
+    Parameters
+    ----------
+    points : ndarray
+        The centres (n, 3).
+    radii : ndarray
+        The radii (n,).
+    tolerance : float, optional
+        Overlaps up to this depth are accepted.
+
+    Returns
+    -------
+    tuple[ndarray, ndarray, ndarray]
+        The indices of the first and the second disk of every overlapping pair, with ``i < j``,
+        and the depth of the overlap.
+
+    """
+    radii = np.asarray(radii, dtype=float)
+    if len(radii) < 2:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0)
+
+    grid = SpatialGrid(points, 2 * radii.max())
+    first, second, distances = grid.pairs_within(2 * radii.max())
+    depths = radii[first] + radii[second] - distances
+    overlapping = depths > tolerance
+    return first[overlapping], second[overlapping], depths[overlapping]
+
+
+def select_non_overlapping(count, first, second, priorities):
+    """Greedily keep disks in order of priority, dropping the disks overlapping an already kept one.
+
+    Parameters
+    ----------
+    count : int
+        The number of disks.
+    first : ndarray
+        The first disk of every overlapping pair.
+    second : ndarray
+        The second disk of every overlapping pair.
+    priorities : ndarray
+        The priority of every disk (n,), higher priorities are kept first.
+
+    Returns
+    -------
+    ndarray
+        The indices of the dropped disks.
+
+    """
+    first = np.asarray(first, dtype=int)
+    second = np.asarray(second, dtype=int)
+    priorities = np.asarray(priorities, dtype=float)
+
+    # neighbours of every disk as a compressed sparse row structure
+    sources = np.concatenate((first, second))
+    targets = np.concatenate((second, first))
+    order = np.argsort(sources, kind="stable")
+    sources = sources[order]
+    targets = targets[order]
+    offsets = np.searchsorted(sources, np.arange(count + 1))
+
+    dropped = np.zeros(count, dtype=bool)
+    kept = np.zeros(count, dtype=bool)
+    involved = np.unique(sources)
+    for index in involved[np.argsort(-priorities[involved], kind="stable")]:
+        if dropped[index]:
+            continue
+        kept[index] = True
+        neighbors = targets[offsets[index] : offsets[index + 1]]
+        dropped[neighbors[~kept[neighbors]]] = True
+
+    return dropped.nonzero()[0]
+
+
+def nudge_apart(points, radii, normals=None, tolerance=0.0, max_iterations=10):
+    """Push overlapping disks apart until they no longer overlap.
+
+    Every overlapping pair is moved apart along the line between the centres,
+    by half of the overlap depth each. The moves of a disk are averaged.
+
+    Parameters
+    ----------
+    points : ndarray
+        The centres (n, 3).
+    radii : ndarray
+        The radii (n,).
+    normals : ndarray | list, optional
+        If given, the moves are projected onto the planes of the disks.
+    tolerance : float, optional
+        Overlaps up to this depth are accepted.
+    max_iterations : int, optional
+        The maximum number of iterations.
+
+    Returns
+    -------
+    ndarray
+        The moved centres (n, 3).
+
+    """
+    points = np.array(points, dtype=float)
+    if normals is not None:
+        normals = np.asarray(normals, dtype=float)
+    for _ in range(max_iterations):
+        first, second, depths = find_overlaps(points, radii, tolerance)
+        if not len(depths):
+            break
+        directions = points[first] - points[second]
+        lengths = np.linalg.norm(directions, axis=1, keepdims=True)
+        directions = np.where(lengths > 0, directions / np.where(lengths > 0, lengths, 1.0), [1.0, 0.0, 0.0])
+
+        moves = np.zeros_like(points)
+        counts = np.zeros(len(points))
+        np.add.at(moves, first, directions * depths[:, None] / 2)
+        np.add.at(moves, second, -directions * depths[:, None] / 2)
+        np.add.at(counts, first, 1)
+        np.add.at(counts, second, 1)
+        moves /= np.maximum(counts, 1)[:, None]
+
+        if normals is not None:
+            moves -= (moves * normals).sum(axis=1, keepdims=True) * normals
+        points += moves
+
+    return points
@@ -0,0 +1,581 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import json
+import os
+from itertools import product
+
+import numpy as np
+
+from compas_urt.design.spatial_numpy import _expand_ranges
+from compas_urt.design.tilefile_numpy import COLUMNS
+from compas_urt.design.tilefile_numpy import arrays_to_tiles
+from compas_urt.design.tilefile_numpy import read_arrays
+
+# Tile stores: a directory of NumPy arrays, memory-mapped when opened.
+#
+#   header.json          format name and version, layer names, the segments with their grid parameters,
+#                        the names of the current files of the removed tiles and of the position ids,
+#                        and the number of positions of the stored version of the design
+#   removed.npy          int64, the sorted ids of the removed tiles
+#   position_ids.npy     int64, the ids of the tiles of the stored version of the design, by their position in it
+#   palette.npy          float64 (k, 4), the RGBA colours of the tiles of the first segment
+#   frames.npy ...       one file per column of the tile files, with the tiles sorted by grid cell
+#   grid_values.npy      int64, the sorted keys of the occupied cells of the spatial grid
+#   grid_starts.npy      int64, the first tile of every occupied cell, and the tile count at the end
+#   uv_values.npy        the same for a grid over the UV parameters,
+#   uv_starts.npy        with the tiles of the cells in uv_order.npy
+#   uv_order.npy
+#   layers_*.npy         the same for the distinct layer indices
+#   tags_*.npy           the same for the distinct tags
+#   segment_000001/...   the tiles added by patches, with the same files as the first segment
+#   removed_000001.npy   the removed tiles after every patch
+#   positions_000001.npz the changes of the position ids by every patch made by position,
+#                        see _apply_position_delta
+#
+# The id of a tile is its position in the store, counting through the segments,
+# and stays the same until the store is rewritten. The tiles are sorted by grid cell,
+# so their ids differ from their positions in the design, which position_ids maps to ids.
+
+FORMAT = "compas_urt.store"
+VERSION = 1
+
+# the tiles per cell of the spatial grid, when no cell size is given
+TILES_PER_CELL = 64
+
+# the indices of a segment, besides the spatial grid
+INDICES = ["uv", "layers", "tags"]
+
+
+def _bucket(keys):
+    # sort the keys, and find the range of every distinct key in the sorted order
+    order = np.argsort(keys, kind="stable")
+    values, starts = np.unique(keys[order], return_index=True)
+    return values, np.append(starts, len(keys)).astype(np.int64), order.astype(np.int64)
+
+
+def _lookup(values, starts, wanted):
+    # the positions in the sorted order of the entries with one of the wanted keys
+    wanted = np.unique(np.asarray(wanted, dtype=values.dtype))
+    positions = np.searchsorted(values, wanted)
+    inside = positions < len(values)
+    # a missing key gives the position of the next key, which must not be found twice
+    found = positions[inside][values[positions[inside]] == wanted[inside]]
+    return _expand_ranges(starts[found], starts[found + 1] - starts[found])
+
+
+def _uv_keys(uvs, resolution):
+    cells = np.clip(np.floor(np.asarray(uvs) * resolution).astype(np.int64), 0, resolution - 1)
+    return cells[:, 0] * resolution + cells[:, 1]
+
+
+def _inverse(order):
+    # the position of every row in a sort order
+    inverse = np.empty(len(order), dtype=np.int64)
+    inverse[order] = np.arange(len(order), dtype=np.int64)
+    return inverse
+
+
+def _save_array(directory, name, values):
+    # written next to the final file and moved in place, so that readers never see a partial file
+    path = os.path.join(directory, name)
+    with open(path + ".tmp", "wb") as f:
+        np.save(f, values)
+    os.replace(path + ".tmp", path)
+
+
+def _save_arrays(directory, name, arrays):
+    # the same for several arrays in one file
+    path = os.path.join(directory, name)
+    with open(path + ".tmp", "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(path + ".tmp", path)
+
+
+def _apply_position_delta(position_ids, delta):
+    # the position ids of the next version of the design: the ids of the modified positions replaced,
+    # the removed positions deleted, and the ids of the added tiles inserted at their positions in the new version
+    position_ids = np.array(position_ids, dtype=np.int64)
+    position_ids[delta["modified"]] = delta["modified_ids"]
+    position_ids = np.delete(position_ids, delta["removed"])
+    inserted = delta["inserted"]
+    return np.insert(position_ids, inserted - np.arange(len(inserted)), delta["inserted_ids"])
+
+
+def _find_sorted(values, wanted):
+    # the position of every wanted value in sorted values, and whether it was found
+    at = np.searchsorted(values, wanted)
+    found = at < len(values)
+    found[found] = values[at[found]] == wanted[found]
+    return at, found
+
+
+def _previous_positions(delta, positions):
+    # the positions in the previous version of the design of positions in the next version, or their new ids
+    ids = np.full(len(positions), -1, dtype=np.int64)
+    at, inserted = _find_sorted(delta["inserted"], positions)
+    ids[inserted] = delta["inserted_ids"][at[inserted]]
+
+    # the q-th remaining position is q plus the number of removed positions before it,
+    # which are the removed positions r_j with r_j - j <= q
+    remaining = positions - at
+    removed = delta["removed"]
+    previous = remaining + np.searchsorted(removed - np.arange(len(removed)), remaining, side="right")
+
+    at, modified = _find_sorted(delta["modified"], previous)
+    modified &= ~inserted
+    ids[modified] = delta["modified_ids"][at[modified]]
+    return np.where(ids >= 0, -1, previous), ids
+
+
+def _write_header(directory, header):
+    # replaced in one step, so that readers see the store before or after a change
+    path = os.path.join(directory, "header.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(header, f)
+    os.replace(path + ".tmp", path)
+
+
+def _write_segment(directory, arrays, cell_size, uv_resolution):
+    # write the tiles of a segment, and return its grid parameters and the order of the tiles in it
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    points = arrays["frames"][:, :3]
+    count = len(points)
+    origin = points.min(axis=0) if count else np.zeros(3)
+    if cell_size is None:
+        # the tiles cover a surface, so they fill the cells of the largest side of the bounding box
+        extent = points.max(axis=0) - origin if count else np.zeros(3)
+        area = max(extent[0] * extent[1], extent[0] * extent[2], extent[1] * extent[2])
+        cell_size = max((area * TILES_PER_CELL / max(count, 1)) ** 0.5, 1e-6)
+
+    cells = np.floor((points - origin) / cell_size).astype(np.int64)
+    dimensions = cells.max(axis=0) + 1 if count else np.ones(3, dtype=np.int64)
+    keys = (cells[:, 0] * dimensions[1] + cells[:, 1]) * dimensions[2] + cells[:, 2]
+
+    # the tiles of a cell are contiguous, so that a box query reads few pages of the columns
+    grid_values, grid_starts, order = _bucket(keys)
+    for column in COLUMNS:
+        np.save(os.path.join(directory, column + ".npy"), np.ascontiguousarray(arrays[column][order]))
+    np.save(os.path.join(directory, "palette.npy"), np.asarray(arrays["palette"], dtype=float).reshape(-1, 4))
+    np.save(os.path.join(directory, "grid_values.npy"), grid_values)
+    np.save(os.path.join(directory, "grid_starts.npy"), grid_starts)
+
+    keys = {
+        "uv": _uv_keys(arrays["uvs"][order], uv_resolution),
+        "layers": arrays["layers"][order],
+        "tags": arrays["tags"][order],
+    }
+    for name in INDICES:
+        for suffix, values in zip(("values", "starts", "order"), _bucket(keys[name])):
+            np.save(os.path.join(directory, "{}_{}.npy".format(name, suffix)), values)
+
+    segment = {
+        "count": count,
+        "origin": origin.tolist(),
+        "cell_size": float(cell_size),
+        "dimensions": dimensions.tolist(),
+    }
+    return segment, order
+
+
+def write_store(directory, arrays, cell_size=None, uv_resolution=64):
+    """Write tiles, as arrays, to a tile store.
+
+    Parameters
+    ----------
+    directory : str
+        The directory of the store, created if it does not exist.
+    arrays : dict
+        The tiles as arrays, see :func:`~compas_urt.design.tilefile_numpy.read_arrays`.
+    cell_size : float, optional
+        The size of the cells of the spatial grid,
+        by default so that a cell holds about :data:`TILES_PER_CELL` tiles of a surface.
+    uv_resolution : int, optional
+        The number of cells of the UV grid along U and along V.
+
+    Returns
+    -------
+    int
+        The number of written tiles.
+    """
+    segment, order = _write_segment(directory, arrays, cell_size, uv_resolution)
+    segment["name"] = ""
+    segment["offset"] = 0
+    _save_array(directory, "removed.npy", np.zeros(0, dtype=np.int64))
+    _save_array(directory, "position_ids.npy", _inverse(order))
+
+    header = {
+        "format": FORMAT,
+        "version": VERSION,
+        "uv_resolution": uv_resolution,
+        "layers": list(arrays["layer_names"]),
+        "segments": [segment],
+        "generation": 0,
+        "removed": "removed.npy",
+        "position_ids": "position_ids.npy",
+        "position_count": segment["count"],
+        "position_deltas": [],
+    }
+    _write_header(directory, header)
+    return segment["count"]
+
+
+def tilefile_to_store(filepath, directory, cell_size=None, uv_resolution=64):
+    """Convert a binary tile file into a tile store.
+
+    Parameters
+    ----------
+    filepath : str
+        The path of the tile file.
+    directory : str
+        The directory of the store.
+    cell_size : float, optional
+    uv_resolution : int, optional
+
+    Returns
+    -------
+    int
+        The number of written tiles.
+    """
+    return write_store(directory, read_arrays(filepath), cell_size, uv_resolution)
+
+
+class _Segment(object):
+    # the memory-mapped tiles of a segment, queried by position in the segment
+
+    def __init__(self, directory, parameters, uv_resolution):
+        self.directory = os.path.join(directory, parameters["name"])
+        self.offset = parameters["offset"]
+        self.count = parameters["count"]
+        self.origin = np.array(parameters["origin"])
+        self.cell_size = parameters["cell_size"]
+        self.dimensions = np.array(parameters["dimensions"])
+        self.uv_resolution = uv_resolution
+        self._arrays = {}
+
+    def array(self, name):
+        if name not in self._arrays:
+            self._arrays[name] = np.load(os.path.join(self.directory, name + ".npy"), mmap_mode="r")
+        return self._arrays[name]
+
+    def index(self, name, wanted):
+        positions = _lookup(self.array(name + "_values"), self.array(name + "_starts"), wanted)
+        return np.sort(self.array(name + "_order")[positions])
+
+    def box(self, minimum, maximum):
+        low = np.maximum(np.floor((minimum - self.origin) / self.cell_size).astype(np.int64), 0)
+        high = np.minimum(np.floor((maximum - self.origin) / self.cell_size).astype(np.int64), self.dimensions - 1)
+        if not self.count or np.any(high < low):
+            return np.zeros(0, dtype=np.int64)
+
+        ranges = [np.arange(low[axis], high[axis] + 1) for axis in range(3)]
+        cells = np.array(list(product(*ranges)), dtype=np.int64).reshape(-1, 3)
+        keys = (cells[:, 0] * self.dimensions[1] + cells[:, 1]) * self.dimensions[2] + cells[:, 2]
+        candidates = _lookup(self.array("grid_values"), self.array("grid_starts"), keys)
+        candidates.sort()
+
+        points = self.array("frames")[candidates, :3]
+        return candidates[np.all((points >= minimum) & (points <= maximum), axis=1)]
+
+    def uv(self, minimum, maximum):
+        resolution = self.uv_resolution
+        low = np.clip(np.floor(minimum * resolution).astype(np.int64), 0, resolution - 1)
+        high = np.clip(np.floor(maximum * resolution).astype(np.int64), 0, resolution - 1)
+        keys = [u * resolution + v for u in range(low[0], high[0] + 1) for v in range(low[1], high[1] + 1)]
+        candidates = self.index("uv", keys)
+
+        uvs = self.array("uvs")[candidates]
+        return candidates[np.all((uvs >= minimum) & (uvs <= maximum), axis=1)]
+
+
+class TileStore(object):
+    """A tile store, opened for queries.
+
+    The columns and the indices are memory-mapped, a query only reads the pages of the tiles it finds.
+    The query methods return the sorted ids of the tiles, which combine with :func:`numpy.intersect1d`
+    and are read into arrays or tiles with :meth:`arrays` and :meth:`tiles`.
+
+    Parameters
+    ----------
+    directory : str
+        The directory of the store.
+
+    Attributes
+    ----------
+    header : dict
+        The header of the store.
+    layer_names : list[str]
+        The names of the layers.
+    removed : ndarray
+        The sorted ids of the removed tiles.
+    position_ids : ndarray | None
+        The ids of the tiles of the stored version of the design, by their position in it:
+        in the arrays the store was written from, or in the new version of the last applied patch.
+        None after a patch by store ids, whose new version may not hold all tiles of the design.
+
+    Examples
+    --------
+    >>> store = TileStore("design.store")  # doctest: +SKIP
+    >>> zone = store.query(box=([0, 0, 0], [1000, 500, 300]), layer="0_GridLayer")  # doctest: +SKIP
+    >>> tiles = store.tiles(zone)  # doctest: +SKIP
+
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.reload()
+
+    def reload(self):
+        """Read the header again, e.g. after a patch was applied to the store."""
+        with open(os.path.join(self.directory, "header.json")) as f:
+            self.header = json.load(f)
+        if self.header.get("format") != FORMAT:
+            raise Exception("{} is not a tile store.".format(self.directory))
+        if self.header["version"] > VERSION:
+            raise Exception(
+                "Tile store version {} is newer than the supported version {}.".format(self.header["version"], VERSION)
+            )
+
+        self.layer_names = self.header["layers"]
+        self.segments = [
+            _Segment(self.directory, parameters, self.header["uv_resolution"]) for parameters in self.header["segments"]
+        ]
+        self.removed = np.load(os.path.join(self.directory, self.header["removed"]))
+        self._position_ids = None
+        self._deltas = None
+        self._palette = None
+
+    def _position_deltas(self):
+        if self._deltas is None:
+            self._deltas = []
+            for name in self.header["position_deltas"]:
+                with np.load(os.path.join(self.directory, name)) as delta:
+                    self._deltas.append({key: delta[key] for key in delta.files})
+        return self._deltas
+
+    @property
+    def position_ids(self):
+        # composed on demand, from the position ids of the written store and the changes of every patch since
+        if self._position_ids is None and self.header["position_ids"]:
+            position_ids = np.load(os.path.join(self.directory, self.header["position_ids"]))
+            for delta in self._position_deltas():
+                position_ids = _apply_position_delta(position_ids, delta)
+            self._position_ids = position_ids
+        return self._position_ids
+
+    def ids_at_positions(self, positions):
+        """Find the ids of the tiles at positions in the stored version of the design,
+        in time proportional to the number of positions and of applied patches.
+
+        Parameters
+        ----------
+        positions : list[int] | ndarray
+            The positions, see :attr:`position_ids`.
+
+        Returns
+        -------
+        ndarray
+            The ids of the tiles.
+        """
+        if not self.header["position_ids"]:
+            raise Exception("The store holds no version of the design by position, since a patch by store ids.")
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1)
+        if len(positions) and (positions.min() < 0 or positions.max() >= self.header["position_count"]):
+            raise Exception("The positions are not in the stored version of the design.")
+
+        # traced back through the patches, to the position ids of the written store
+        ids = np.full(len(positions), -1, dtype=np.int64)
+        pending = np.arange(len(positions))
+        for delta in reversed(self._position_deltas()):
+            positions, found = _previous_positions(delta, positions)
+            ids[pending[found >= 0]] = found[found >= 0]
+            pending, positions = pending[found < 0], positions[found < 0]
+
+        base = np.load(os.path.join(self.directory, self.header["position_ids"]), mmap_mode="r")
+        ids[pending] = base[positions]
+        return ids
+
+    @property
+    def size(self):
+        """int : The number of ids, including the removed tiles."""
+        last = self.segments[-1]
+        return last.offset + last.count
+
+    def __len__(self):
+        return self.size - len(self.removed)
+
+    def _collect(self, query):
+        # the ids of the tiles found by a query on every segment, without the removed ones
+        ids = np.concatenate([query(segment) + segment.offset for segment in self.segments])
+        if len(self.removed):
+            ids = ids[~np.isin(ids, self.removed, assume_unique=True)]
+        return ids
+
+    def query_box(self, minimum, maximum):
+        """Find the tiles with their centre in a box.
+
+        Parameters
+        ----------
+        minimum : [float, float, float]
+            The lower corner of the box.
+        maximum : [float, float, float]
+            The upper corner of the box.
+
+        Returns
+        -------
+        ndarray
+            The ids of the tiles.
+        """
+        minimum = np.asarray(minimum, dtype=float)
+        maximum = np.asarray(maximum, dtype=float)
+        return self._collect(lambda segment: segment.box(minimum, maximum))
+
+    def query_uv(self, minimum, maximum):
+        """Find the tiles with their UV parameters in a rectangle.
+
+        Parameters
+        ----------
+        minimum : [float, float]
+            The lowest U and V.
+        maximum : [float, float]
+            The highest U and V.
+
+        Returns
+        -------
+        ndarray
+            The ids of the tiles.
+        """
+        minimum = np.asarray(minimum, dtype=float)
+        maximum = np.asarray(maximum, dtype=float)
+        return self._collect(lambda segment: segment.uv(minimum, maximum))
+
+    def query_layer(self, layer):
+        """Find the tiles of a layer.
+
+        Parameters
+        ----------
+        layer : str | int
+            The name or the index of the layer.
+
+        Returns
+        -------
+        ndarray
+            The ids of the tiles.
+        """
+        if not isinstance(layer, int):
+            if layer not in self.layer_names:
+                return np.zeros(0, dtype=np.int64)
+            layer = self.layer_names.index(layer)
+        return self._collect(lambda segment: segment.index("layers", [layer]))
+
+    def query_tag(self, tag):
+        """Find the tiles with a tag.
+
+        Parameters
+        ----------
+        tag : int
+            The tag, -1 for the tiles without tag.
+
+        Returns
+        -------
+        ndarray
+            The ids of the tiles.
+        """
+        return self._collect(lambda segment: segment.index("tags", [tag]))
+
+    def query(self, box=None, uv=None, layer=None, tag=None):
+        """Find the tiles matching all of the given criteria.
+
+        Parameters
+        ----------
+        box : tuple, optional
+            The lower and the upper corner of a box, see :meth:`query_box`.
+        uv : tuple, optional
+            The lower and the upper corner of a UV rectangle, see :meth:`query_uv`.
+        layer : str | int, optional
+            A layer, see :meth:`query_layer`.
+        tag : int, optional
+            A tag, see :meth:`query_tag`.
+
+        Returns
+        -------
+        ndarray
+            The ids of the tiles, of all tiles without criteria.
+        """
+        results = []
+        if box is not None:
+            results.append(self.query_box(*box))
+        if uv is not None:
+            results.append(self.query_uv(*uv))
+        if layer is not None:
+            results.append(self.query_layer(layer))
+        if tag is not None:
+            results.append(self.query_tag(tag))
+
+        if not results:
+            return self._collect(lambda segment: np.arange(segment.count))
+        ids = results[0]
+        for other in results[1:]:
+            ids = np.intersect1d(ids, other, assume_unique=True)
+        return ids
+
+    def palette(self):
+        """Get the colours of all segments.
+
+        Returns
+        -------
+        ndarray
+            The RGBA colours (k, 4), the palettes of the segments one after the other.
+        """
+        if self._palette is None:
+            self._palette = np.concatenate([np.array(segment.array("palette")) for segment in self.segments])
+        return self._palette
+
+    def arrays(self, ids):
+        """Read tiles into arrays.
+
+        Parameters
+        ----------
+        ids : ndarray
+            The ids of the tiles.
+
+        Returns
+        -------
+        dict
+            The arrays of the tiles, see :func:`~compas_urt.design.tilefile_numpy.read_arrays`,
+            and their ``"ids"``.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        arrays = {}
+        color_offset = 0
+        for segment in self.segments:
+            inside = np.flatnonzero((ids >= segment.offset) & (ids < segment.offset + segment.count))
+            for column in COLUMNS:
+                values = segment.array(column)
+                if column not in arrays:
+                    arrays[column] = np.zeros((len(ids),) + values.shape[1:], dtype=values.dtype)
+                arrays[column][inside] = values[ids[inside] - segment.offset]
+            arrays["colors"][inside] += color_offset
+            color_offset += len(segment.array("palette"))
+
+        arrays["palette"] = self.palette()
+        arrays["layer_names"] = self.layer_names
+        arrays["ids"] = ids
+        return arrays
+
+    def tiles(self, ids):
+        """Read tiles.
+
+        Parameters
+        ----------
+        ids : ndarray
+            The ids of the tiles.
+
+        Returns
+        -------
+        list[:class:`~compas_urt.design.RoundTile`]
+        """
+        return arrays_to_tiles(self.arrays(ids))
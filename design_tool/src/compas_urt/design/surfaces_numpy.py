@@ -0,0 +1,452 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import math as m
+
+import numpy as np
+from compas.geometry import Curve
+from compas.geometry import Frame
+from compas.geometry import Point
+from compas.geometry import Surface
+from compas.geometry import Vector
+from scipy.spatial import cKDTree
+
+# Headless surfaces and curves, for generating and analysing designs without Rhino.
+# They implement the subset of the COMPAS surface and curve interfaces used by the design layers.
+
+# the rounding accepted on the parameters at the ends of the curve domains
+PARAMETER_TOLERANCE = 1e-9
+
+
+class SampledCurve(Curve):
+    """Base class of the headless curves, with arc length computations on a dense sampling.
+
+    Parameters
+    ----------
+    samples : int, optional
+        The number of samples of the arc length table.
+
+    """
+
+    def __new__(cls, *args, **kwargs):
+        # bypass the plugin based factory of COMPAS curves
+        return object.__new__(cls)
+
+    def __init__(self, samples=256, **kwargs):
+        super(SampledCurve, self).__init__(**kwargs)
+        self.samples = samples
+        self._table = None
+
+    @property
+    def dtype(self):
+        return "{}/{}".format(self.__class__.__module__, self.__class__.__name__)
+
+    @property
+    def domain(self):
+        return 0.0, 1.0
+
+    @property
+    def start(self):
+        return self.point_at(0.0)
+
+    @property
+    def end(self):
+        return self.point_at(1.0)
+
+    @property
+    def is_closed(self):
+        return self.start.distance_to_point(self.end) < 1e-9
+
+    @property
+    def is_periodic(self):
+        return False
+
+    def _evaluate(self, t):
+        """Evaluate the curve at an array of parameters, returning an array of points (..., 3)."""
+        raise NotImplementedError
+
+    def _arc_length_table(self):
+        if self._table is None:
+            params = np.linspace(0.0, 1.0, self.samples)
+            points = self._evaluate(params)
+            lengths = np.concatenate(([0.0], np.cumsum(np.linalg.norm(np.diff(points, axis=0), axis=1))))
+            self._table = params, points, lengths
+        return self._table
+
+    def _check_parameter(self, t):
+        # the samples of the curve end at the ends of the domain, parameters beyond are not extrapolated
+        if not -PARAMETER_TOLERANCE <= t <= 1.0 + PARAMETER_TOLERANCE:
+            raise Exception("The curve parameter {} is outside of the domain [0, 1].".format(t))
+
+    def point_at(self, t):
+        self._check_parameter(t)
+        return Point(*self._evaluate(np.array([t], dtype=float))[0].tolist())
+
+    def tangent_at(self, t):
+        self._check_parameter(t)
+        h = 1e-6
+        a = self._evaluate(np.array([max(t - h, 0.0)]))[0]
+        b = self._evaluate(np.array([min(t + h, 1.0)]))[0]
+        return Vector(*(b - a).tolist()).unitized()
+
+    def length(self, precision=1e-8):
+        return float(self._arc_length_table()[2][-1])
+
+    def closest_point(self, point, return_parameter=False):
+        params, points, _ = self._arc_length_table()
+        index = int(np.argmin(np.linalg.norm(points - np.asarray(list(point), dtype=float), axis=1)))
+
+        # refine on the two neighbouring sampling intervals
+        low = params[max(index - 1, 0)]
+        high = params[min(index + 1, len(params) - 1)]
+        fine = np.linspace(low, high, 65)
+        fine_points = self._evaluate(fine)
+        fine_index = int(np.argmin(np.linalg.norm(fine_points - np.asarray(list(point), dtype=float), axis=1)))
+
+        closest = Point(*fine_points[fine_index].tolist())
+        if return_parameter:
+            return closest, float(fine[fine_index])
+        return closest
+
+    def _params_at_lengths(self, lengths):
+        params, _, table = self._arc_length_table()
+        return np.interp(lengths, table, params).tolist()
+
+    def divide_by_count(self, count, return_points=False):
+        params = self._params_at_lengths(np.linspace(0.0, self.length(), count + 1))
+        if return_points:
+            return params, [self.point_at(t) for t in params]
+        return params
+
+    def divide_by_length(self, length, return_points=False):
+        params = self._params_at_lengths(np.arange(0.0, self.length() + 1e-9, length))
+        if return_points:
+            return params, [self.point_at(t) for t in params]
+        return params
+
+
+class PolylineCurve(SampledCurve):
+    """A headless curve through a sequence of points, parameterized by arc length.
+
+    Parameters
+    ----------
+    points : list[:class:`compas.geometry.Point`]
+        The points of the polyline.
+
+    """
+
+    def __init__(self, points, **kwargs):
+        super(PolylineCurve, self).__init__(**kwargs)
+        self.points = [list(point) for point in points]
+
+    @property
+    def data(self):
+        return {"points": self.points, "samples": self.samples}
+
+    @data.setter
+    def data(self, data):
+        self.points = data["points"]
+        self.samples = data["samples"]
+        self._table = None
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data["points"], samples=data["samples"])
+
+    def _evaluate(self, t):
+        points = np.asarray(self.points, dtype=float)
+        lengths = np.concatenate(([0.0], np.cumsum(np.linalg.norm(np.diff(points, axis=0), axis=1))))
+        lengths /= lengths[-1]
+        t = np.asarray(t, dtype=float)
+        return np.stack([np.interp(t, lengths, points[:, axis]) for axis in range(3)], axis=-1)
+
+
+class IsoCurve(SampledCurve):
+    """An isoparametric curve of a headless surface.
+
+    The curve parameter is the free surface parameter, like the isocurves of Rhino surfaces.
+
+    Parameters
+    ----------
+    surface : :class:`AnalyticSurface`
+        The surface.
+    direction : {"u", "v"}
+        The fixed parameter.
+    value : float
+        The value of the fixed parameter.
+
+    """
+
+    def __init__(self, surface, direction, value, **kwargs):
+        super(IsoCurve, self).__init__(**kwargs)
+        self.surface = surface
+        self.direction = direction
+        self.value = value
+
+    @property
+    def data(self):
+        return {"surface": self.surface, "direction": self.direction, "value": self.value}
+
+    @data.setter
+    def data(self, data):
+        self.surface = data["surface"]
+        self.direction = data["direction"]
+        self.value = data["value"]
+        self._table = None
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data["surface"], data["direction"], data["value"])
+
+    def _evaluate(self, t):
+        t = np.asarray(t, dtype=float)
+        fixed = np.full_like(t, self.value)
+        if self.direction == "u":
+            return self.surface._evaluate(fixed, t)
+        return self.surface._evaluate(t, fixed)
+
+
+class AnalyticSurface(Surface):
+    """Base class of the headless surfaces, defined by a vectorized evaluation over the unit domain.
+
+    Subclasses implement :meth:`_evaluate`, the data properties, and :meth:`from_data`.
+
+    """
+
+    def __new__(cls, *args, **kwargs):
+        # bypass the plugin based factory of COMPAS surfaces
+        return object.__new__(cls)
+
+    def __init__(self, **kwargs):
+        super(AnalyticSurface, self).__init__(**kwargs)
+        self._kdtree = None
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.data == other.data
+
+    def __hash__(self):
+        return id(self)
+
+    @property
+    def dtype(self):
+        return "{}/{}".format(self.__class__.__module__, self.__class__.__name__)
+
+    @property
+    def u_domain(self):
+        return 0.0, 1.0
+
+    @property
+    def v_domain(self):
+        return 0.0, 1.0
+
+    @property
+    def is_u_periodic(self):
+        return False
+
+    @property
+    def is_v_periodic(self):
+        return False
+
+    def _evaluate(self, u, v):
+        """Evaluate the surface at arrays of parameters, returning an array of points (..., 3)."""
+        raise NotImplementedError
+
+    def _derivatives(self, u, v, h=1e-6):
+        u = np.asarray(u, dtype=float)
+        v = np.asarray(v, dtype=float)
+        u0, u1 = np.clip(u - h, 0.0, 1.0), np.clip(u + h, 0.0, 1.0)
+        v0, v1 = np.clip(v - h, 0.0, 1.0), np.clip(v + h, 0.0, 1.0)
+        du = (self._evaluate(u1, v) - self._evaluate(u0, v)) / (u1 - u0)[..., None]
+        dv = (self._evaluate(u, v1) - self._evaluate(u, v0)) / (v1 - v0)[..., None]
+        return du, dv
+
+    def point_at(self, u, v):
+        return Point(*self._evaluate(np.array([u], dtype=float), np.array([v], dtype=float))[0].tolist())
+
+    def frame_at(self, u, v):
+        point = self._evaluate(np.array([u], dtype=float), np.array([v], dtype=float))[0]
+        du, dv = self._derivatives(np.array([u], dtype=float), np.array([v], dtype=float))
+        return Frame(point.tolist(), du[0].tolist(), dv[0].tolist())
+
+    def u_isocurve(self, u):
+        return IsoCurve(self, "u", u)
+
+    def v_isocurve(self, v):
+        return IsoCurve(self, "v", v)
+
+    def closest_parameters(self, points, iterations=8):
+        """Compute the parameters of the closest surface points of many points at once.
+
+        The parameters start from the nearest sample of a 64 x 64 grid,
+        and are refined with Gauss-Newton iterations.
+
+        Parameters
+        ----------
+        points : ndarray
+            The points (n, 3).
+        iterations : int, optional
+            The number of refinement iterations.
+
+        Returns
+        -------
+        ndarray
+            The parameters (n, 2).
+
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        grid = np.linspace(0.0, 1.0, 64)
+        uu, vv = np.meshgrid(grid, grid, indexing="ij")
+        if self._kdtree is None:
+            self._kdtree = cKDTree(self._evaluate(uu.ravel(), vv.ravel()))
+        _, nearest = self._kdtree.query(points)
+        u = uu.ravel()[nearest]
+        v = vv.ravel()[nearest]
+
+        for _ in range(iterations):
+            difference = self._evaluate(u, v) - points
+            du, dv = self._derivatives(u, v)
+            a = (du * du).sum(axis=1)
+            b = (du * dv).sum(axis=1)
+            c = (dv * dv).sum(axis=1)
+            ru = (difference * du).sum(axis=1)
+            rv = (difference * dv).sum(axis=1)
+            det = a * c - b * b
+            det = np.where(np.abs(det) > 1e-12, det, 1e-12)
+            u = np.clip(u - (c * ru - b * rv) / det, 0.0, 1.0)
+            v = np.clip(v - (a * rv - b * ru) / det, 0.0, 1.0)
+
+        return np.column_stack((u, v))
+
+    def closest_point(self, point, return_parameters=False):
+        u, v = self.closest_parameters([list(point)])[0].tolist()
+        closest = self.point_at(u, v)
+        if return_parameters:
+            return closest, (u, v)
+        return closest
+
+
+class SaddleSurface(AnalyticSurface):
+    """A hyperbolic paraboloid over a rectangle.
+
+    Parameters
+    ----------
+    size_u : float
+        The size in X.
+    size_v : float
+        The size in Y.
+    height : float
+        The height of the corners above and below the centre.
+
+    """
+
+    def __init__(self, size_u=1000.0, size_v=1000.0, height=200.0, **kwargs):
+        super(SaddleSurface, self).__init__(**kwargs)
+        self.size_u = size_u
+        self.size_v = size_v
+        self.height = height
+
+    @property
+    def data(self):
+        return {"size_u": self.size_u, "size_v": self.size_v, "height": self.height}
+
+    @data.setter
+    def data(self, data):
+        self.size_u = data["size_u"]
+        self.size_v = data["size_v"]
+        self.height = data["height"]
+        self._kdtree = None
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(**data)
+
+    def _evaluate(self, u, v):
+        u = np.asarray(u, dtype=float)
+        v = np.asarray(v, dtype=float)
+        z = self.height * ((2 * u - 1) ** 2 - (2 * v - 1) ** 2)
+        return np.stack((u * self.size_u, v * self.size_v, z), axis=-1)
+
+
+class CylinderSurface(AnalyticSurface):
+    """An open cylindrical panel around the Z axis.
+
+    Parameters
+    ----------
+    radius : float
+        The radius.
+    height : float
+        The height.
+    angle : float
+        The opening angle, in radians.
+
+    """
+
+    def __init__(self, radius=500.0, height=1000.0, angle=m.pi, **kwargs):
+        super(CylinderSurface, self).__init__(**kwargs)
+        self.radius = radius
+        self.height = height
+        self.angle = angle
+
+    @property
+    def data(self):
+        return {"radius": self.radius, "height": self.height, "angle": self.angle}
+
+    @data.setter
+    def data(self, data):
+        self.radius = data["radius"]
+        self.height = data["height"]
+        self.angle = data["angle"]
+        self._kdtree = None
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(**data)
+
+    def _evaluate(self, u, v):
+        u = np.asarray(u, dtype=float)
+        v = np.asarray(v, dtype=float)
+        angles = u * self.angle
+        return np.stack((self.radius * np.cos(angles), self.radius * np.sin(angles), v * self.height), axis=-1)
+
+
+class PanelSurface(AnalyticSurface):
+    """A double-curved panel, bulging over a rectangle.
+
+    Parameters
+    ----------
+    size_u : float
+        The size in X.
+    size_v : float
+        The size in Y.
+    height : float
+        The height of the bulge in the middle.
+
+    """
+
+    def __init__(self, size_u=1000.0, size_v=1000.0, height=150.0, **kwargs):
+        super(PanelSurface, self).__init__(**kwargs)
+        self.size_u = size_u
+        self.size_v = size_v
+        self.height = height
+
+    @property
+    def data(self):
+        return {"size_u": self.size_u, "size_v": self.size_v, "height": self.height}
+
+    @data.setter
+    def data(self, data):
+        self.size_u = data["size_u"]
+        self.size_v = data["size_v"]
+        self.height = data["height"]
+        self._kdtree = None
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(**data)
+
+    def _evaluate(self, u, v):
+        u = np.asarray(u, dtype=float)
+        v = np.asarray(v, dtype=float)
+        z = self.height * np.sin(m.pi * u) * np.sin(m.pi * v)
+        return np.stack((u * self.size_u, v * self.size_v, z), axis=-1)
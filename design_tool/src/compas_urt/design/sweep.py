@@ -0,0 +1,194 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import csv
+import time
+from itertools import product
+
+import compas
+
+from compas_urt.design import LayerSpec
+from compas_urt.design.memo import constructor_arguments
+
+
+def parameter_grid(parameters):
+    """Expand lists of parameter values into all their combinations.
+
+    Parameters
+    ----------
+    parameters : dict[str, list]
+        The values of every parameter.
+
+    Returns
+    -------
+    list[dict]
+        One mapping of parameter names to values per combination.
+
+    Examples
+    --------
+    >>> parameter_grid({"tile_diameter": [40, 50], "pack_type": ["hexagonal"]})
+    [{'pack_type': 'hexagonal', 'tile_diameter': 40}, {'pack_type': 'hexagonal', 'tile_diameter': 50}]
+
+    """
+    names = sorted(parameters)
+    return [dict(zip(names, values)) for values in product(*[parameters[name] for name in names])]
+
+
+def run_variant(task):
+    """Generate a single variant of a sweep and measure it.
+
+    The parameters that are arguments of the constructor of the layer are passed to it,
+    all other parameters are passed as options, along with the ``"seed"`` of the variant.
+
+    Parameters
+    ----------
+    task : dict
+        The ``"index"`` and the ``"seed"`` of the variant, the ``"layer_cls"``,
+        the ``"surface"`` serialized to JSON, the ``"parameters"``, and the ``"coverage_resolution"``.
+
+    Returns
+    -------
+    dict
+        The row of the variant in the results table.
+
+    """
+    layer_cls = task["layer_cls"]
+    parameters = task["parameters"]
+    row = {"index": task["index"], "seed": task["seed"]}
+    row.update(task["varied"])
+
+    arguments = constructor_arguments(layer_cls)
+    kwargs = dict((name, value) for name, value in parameters.items() if name in arguments)
+    options = dict((name, value) for name, value in parameters.items() if name not in arguments)
+    options["seed"] = task["seed"]
+
+    try:
+        layer = LayerSpec(layer_cls, task["surface"], options=options, **kwargs).create()
+        start = time.time()
+        layer.generate()
+        row["generation_time"] = time.time() - start
+        row["tiles"] = len(layer.tiles)
+        row["coverage"], row["largest_gap"], _ = layer.coverage(task["coverage_resolution"])
+        row["overlaps"] = len(layer.find_overlaps())
+        row["error"] = None
+    except Exception as error:
+        row["error"] = "{}: {}".format(type(error).__name__, error)
+
+    return row
+
+
+class ParameterSweep(object):
+    """Generate the variants of a layer over a grid of parameters, in parallel.
+
+    Every variant is generated from scratch on a headless surface, e.g. one of
+    :mod:`compas_urt.design.surfaces_numpy`, and measured by its tile count, coverage,
+    number of overlaps and generation time.
+
+    Parameters
+    ----------
+    layer_cls : type
+        The generative layer, e.g. :class:`~compas_urt.design.generative.GridLayer`.
+    surface : :class:`compas.geometry.Surface` | str
+        The surface, or its serialization to JSON.
+    parameters : dict[str, list]
+        The values of the swept parameters, see :func:`parameter_grid`.
+    fixed : dict, optional
+        The parameters shared by all variants.
+    seed : int, optional
+        The seed of the first variant. Every variant is generated with its own seed,
+        ``seed + index``, so that any variant can be reproduced on its own.
+    coverage_resolution : int, optional
+        The resolution of the raster the coverage is measured on.
+
+    Examples
+    --------
+    >>> from compas_urt.design.generative import GridLayer
+    >>> from compas_urt.design.surfaces_numpy import SaddleSurface
+    >>> sweep = ParameterSweep(
+    ...     GridLayer,
+    ...     SaddleSurface(),
+    ...     {"tile_diameter": [40, 50, 60], "tile_joint": [2, 4]},
+    ...     fixed={"tile_thickness": 10, "pack_type": "hexagonal", "curve_type": "isocurves", "uniform": True,
+    ...            "param_density": 1, "flip_curves": False, "flip_frame": False},
+    ... )
+    >>> rows = sweep.run()  # doctest: +SKIP
+
+    """
+
+    def __init__(self, layer_cls, surface, parameters, fixed=None, seed=0, coverage_resolution=128):
+        self.layer_cls = layer_cls
+        if not isinstance(surface, str):
+            surface = compas.json_dumps(surface)
+        self.surface = surface
+        self.parameters = parameters
+        self.fixed = fixed or {}
+        self.seed = seed
+        self.coverage_resolution = coverage_resolution
+        self.results = []
+
+    def tasks(self):
+        """Create the tasks of all variants.
+
+        Returns
+        -------
+        list[dict]
+            See :func:`run_variant`.
+        """
+        tasks = []
+        for index, varied in enumerate(parameter_grid(self.parameters)):
+            parameters = dict(self.fixed)
+            parameters.update(varied)
+            tasks.append(
+                {
+                    "index": index,
+                    "seed": self.seed + index,
+                    "layer_cls": self.layer_cls,
+                    "surface": self.surface,
+                    "parameters": parameters,
+                    "varied": varied,
+                    "coverage_resolution": self.coverage_resolution,
+                }
+            )
+        return tasks
+
+    def run(self, processes=None):
+        """Generate and measure all variants.
+
+        Parameters
+        ----------
+        processes : int, optional
+            The number of worker processes, by default the number of CPUs.
+            With a single process, the variants are generated in the current process.
+
+        Returns
+        -------
+        list[dict]
+            One row per variant, in the order of the parameter grid.
+        """
+        tasks = self.tasks()
+        if processes == 1:
+            self.results = [run_variant(task) for task in tasks]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                self.results = list(executor.map(run_variant, tasks))
+        return self.results
+
+    def to_csv(self, filepath):
+        """Write the results table to a CSV file.
+
+        Parameters
+        ----------
+        filepath : str
+        """
+        if not self.results:
+            raise Exception("The sweep has no results, run it first.")
+
+        columns = ["index", "seed"] + sorted(self.parameters)
+        columns += ["tiles", "coverage", "largest_gap", "overlaps", "generation_time", "error"]
+        with open(filepath, "w") as f:
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(self.results)
@@ -0,0 +1,351 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import io
+import json
+import os
+import numbers
+import zipfile
+from itertools import chain
+
+import numpy as np
+
+from compas_urt.design import RoundTile
+from compas_urt.design.palette import palette_color
+
+# Binary tile files: a zip archive of NumPy arrays, readable with numpy.load.
+#
+#   header.json               format name and version, tile count, chunk count, layer names
+#   palette.npy               float64 (k, 4), the RGBA colours of the tiles
+#   chunk_000000/frames.npy   float64 (n, 9), point, X axis and Y axis of the base frames
+#   chunk_000000/diameters.npy, thicknesses.npy  float64 (n,)
+#   chunk_000000/uvs.npy      float64 (n, 2)
+#   chunk_000000/colors.npy   uint32 (n,), indices into the palette
+#   chunk_000000/tags.npy     int64 (n,), -1 for no tag
+#   chunk_000000/layers.npy   int32 (n,), indices into the layer names
+#   chunk_000001/...
+
+FORMAT = "compas_urt.tiles"
+VERSION = 1
+
+COLUMNS = ["frames", "diameters", "thicknesses", "uvs", "colors", "tags", "layers"]
+
+NO_TAG = -1
+
+# the arrays of a file without tiles
+_EMPTY = {
+    "frames": ((0, 9), float),
+    "diameters": ((0,), float),
+    "thicknesses": ((0,), float),
+    "uvs": ((0, 2), float),
+    "colors": ((0,), np.uint32),
+    "tags": ((0,), np.int64),
+    "layers": ((0,), np.int32),
+}
+
+
+class _Encoder(object):
+    # the palette and the layer names of tiles being written
+
+    def __init__(self):
+        self.layer_names = []
+        self._palette = {}
+
+    def encode(self, tile, layer_name):
+        tag = NO_TAG if tile.tag is None else tile.tag
+        # NumPy integers too, e.g. tags read back from a tile file or a store
+        if not isinstance(tag, numbers.Integral):
+            raise Exception("Only integer tags can be written, not {!r}.".format(tile.tag))
+
+        if layer_name not in self.layer_names:
+            self.layer_names.append(layer_name)
+        color = tile.color
+        color_id = self._palette.setdefault((color.r, color.g, color.b, color.a), len(self._palette))
+        return tile, color_id, tag, self.layer_names.index(layer_name)
+
+    def palette(self):
+        return np.array(sorted(self._palette, key=self._palette.get), dtype=float).reshape(-1, 4)
+
+
+def _columns(entries):
+    # the columns of encoded tiles
+    tiles = [tile for tile, _, _, _ in entries]
+    count = len(tiles)
+    frames = np.fromiter(chain.from_iterable(tile.frame_values for tile in tiles), dtype=float, count=9 * count)
+    uvs = np.fromiter(chain.from_iterable(tile.uv_param[:2] for tile in tiles), dtype=float, count=2 * count)
+    return {
+        "frames": frames.reshape(count, 9),
+        "diameters": np.array([tile.diameter for tile in tiles], dtype=float),
+        "thicknesses": np.array([tile.thickness for tile in tiles], dtype=float),
+        "uvs": uvs.reshape(count, 2),
+        "colors": np.array([color for _, color, _, _ in entries], dtype=np.uint32),
+        "tags": np.array([tag for _, _, tag, _ in entries], dtype=np.int64),
+        "layers": np.array([layer for _, _, _, layer in entries], dtype=np.int32),
+    }
+
+
+class TileWriter(object):
+    """Streaming writer of binary tile files.
+
+    The tiles are buffered and written in chunks, so that a layer can be written
+    while it is generated, e.g. from :meth:`~compas_urt.design.generative.GridLayer.iter_tiles`,
+    without holding all of its tiles in memory.
+
+    Parameters
+    ----------
+    filepath : str
+        The path of the file.
+    chunk_size : int, optional
+        The number of tiles per chunk.
+    compress : bool, optional
+        If True, deflate the arrays.
+
+    Examples
+    --------
+    >>> with TileWriter("design.tiles") as writer:  # doctest: +SKIP
+    ...     writer.write_tiles(layer.iter_tiles(), layer_name="grid")
+
+    """
+
+    def __init__(self, filepath, chunk_size=10000, compress=False):
+        self.chunk_size = chunk_size
+        self.count = 0
+        self.chunks = 0
+        self._encoder = _Encoder()
+        self._buffer = []
+        self.filepath = filepath
+        self._zipfile = zipfile.ZipFile(filepath, "w", zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # a file without its header is never mistaken for a complete design
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    @property
+    def layer_names(self):
+        return self._encoder.layer_names
+
+    def _save(self, name, values):
+        stream = io.BytesIO()
+        np.save(stream, values)
+        self._zipfile.writestr(name + ".npy", stream.getvalue())
+
+    def write(self, tile, layer_name=None):
+        """Write a tile.
+
+        Parameters
+        ----------
+        tile : :class:`~compas_urt.design.RoundTile`
+        layer_name : str, optional
+            The name of the layer of the tile.
+        """
+        self._buffer.append(self._encoder.encode(tile, layer_name))
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def write_tiles(self, tiles, layer_name=None):
+        """Write tiles.
+
+        Parameters
+        ----------
+        tiles : iterable[:class:`~compas_urt.design.RoundTile`]
+        layer_name : str, optional
+            The name of the layer of the tiles.
+        """
+        for tile in tiles:
+            self.write(tile, layer_name)
+
+    def flush(self):
+        """Write the buffered tiles as a chunk."""
+        if not self._buffer:
+            return
+
+        prefix = "chunk_{:06d}/".format(self.chunks)
+        for column, values in _columns(self._buffer).items():
+            self._save(prefix + column, values)
+
+        self.count += len(self._buffer)
+        self.chunks += 1
+        self._buffer = []
+
+    def close(self):
+        """Write the remaining tiles, the palette and the header, and close the file."""
+        if self._zipfile is None:
+            return
+        self.flush()
+
+        self._save("palette", self._encoder.palette())
+        header = {
+            "format": FORMAT,
+            "version": VERSION,
+            "count": self.count,
+            "chunks": self.chunks,
+            "columns": COLUMNS,
+            "layers": self.layer_names,
+        }
+        self._zipfile.writestr("header.json", json.dumps(header))
+        self._zipfile.close()
+        self._zipfile = None
+
+    def abort(self):
+        """Close the file without writing the header, and delete it."""
+        if self._zipfile is None:
+            return
+        self._zipfile.close()
+        self._zipfile = None
+        self._buffer = []
+        if os.path.exists(self.filepath):
+            os.remove(self.filepath)
+
+
+def write_design(design, filepath, chunk_size=10000, compress=False):
+    """Write the tiles of a design to a binary tile file.
+
+    Parameters
+    ----------
+    design : :class:`~compas_urt.design.TileDesign`
+    filepath : str
+    chunk_size : int, optional
+    compress : bool, optional
+
+    Returns
+    -------
+    int
+        The number of written tiles.
+    """
+    with TileWriter(filepath, chunk_size=chunk_size, compress=compress) as writer:
+        for layer_name, layer in zip(layer_names(design), design.layers):
+            writer.write_tiles(layer.tiles, layer_name=layer_name)
+    return writer.count
+
+
+def design_to_arrays(design):
+    """Convert the tiles of a design into arrays, as read from a tile file.
+
+    Parameters
+    ----------
+    design : :class:`~compas_urt.design.TileDesign`
+
+    Returns
+    -------
+    dict
+        See :func:`read_arrays`.
+    """
+    encoder = _Encoder()
+    entries = []
+    for layer_name, layer in zip(layer_names(design), design.layers):
+        entries.extend(encoder.encode(tile, layer_name) for tile in layer.tiles)
+
+    arrays = _columns(entries)
+    arrays["palette"] = encoder.palette()
+    arrays["layer_names"] = encoder.layer_names
+    return arrays
+
+
+def layer_names(design):
+    """Get the names of the layers of a design in tile files, their position and class.
+
+    Parameters
+    ----------
+    design : :class:`~compas_urt.design.TileDesign`
+
+    Returns
+    -------
+    list[str]
+        The names, e.g. ``"0_GridLayer"``.
+    """
+    return ["{}_{}".format(index, type(layer).__name__) for index, layer in enumerate(design.layers)]
+
+
+def read_header(filepath):
+    """Read the header of a binary tile file.
+
+    Parameters
+    ----------
+    filepath : str
+
+    Returns
+    -------
+    dict
+    """
+    with zipfile.ZipFile(filepath) as archive:
+        header = json.loads(archive.read("header.json").decode("utf-8"))
+
+    if header.get("format") != FORMAT:
+        raise Exception("{} is not a tile file.".format(filepath))
+    if header["version"] > VERSION:
+        raise Exception(
+            "Tile file version {} is newer than the supported version {}.".format(header["version"], VERSION)
+        )
+    return header
+
+
+def read_arrays(filepath):
+    """Read a binary tile file into arrays.
+
+    Parameters
+    ----------
+    filepath : str
+
+    Returns
+    -------
+    dict[str, ndarray | list]
+        One array per column of :data:`COLUMNS` with one row per tile,
+        the ``"palette"`` of colours (k, 4), and the ``"layer_names"``.
+    """
+    header = read_header(filepath)
+    arrays = {}
+    with np.load(filepath) as npz:
+        for column in header["columns"]:
+            chunks = [npz["chunk_{:06d}/{}".format(chunk, column)] for chunk in range(header["chunks"])]
+            arrays[column] = np.concatenate(chunks) if chunks else np.zeros(*_EMPTY[column])
+        arrays["palette"] = npz["palette"]
+    arrays["layer_names"] = header["layers"]
+    return arrays
+
+
+def arrays_to_tiles(arrays):
+    """Convert the arrays of a tile file into tiles.
+
+    Parameters
+    ----------
+    arrays : dict
+        See :func:`read_arrays`.
+
+    Returns
+    -------
+    list[:class:`~compas_urt.design.RoundTile`]
+    """
+    palette = [palette_color(*rgba) for rgba in arrays["palette"].tolist()]
+    tiles = []
+    for frame, diameter, thickness, uv, color, tag in zip(
+        arrays["frames"].tolist(),
+        arrays["diameters"].tolist(),
+        arrays["thicknesses"].tolist(),
+        arrays["uvs"].tolist(),
+        arrays["colors"].tolist(),
+        arrays["tags"].tolist(),
+    ):
+        tag = None if tag == NO_TAG else tag
+        tiles.append(RoundTile.from_values(frame, diameter, thickness, tuple(uv), palette[color], tag))
+    return tiles
+
+
+def read_tiles(filepath):
+    """Read the tiles of a binary tile file.
+
+    Parameters
+    ----------
+    filepath : str
+
+    Returns
+    -------
+    list[:class:`~compas_urt.design.RoundTile`]
+    """
+    return arrays_to_tiles(read_arrays(filepath))
@@ -0,0 +1,227 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from itertools import chain
+
+import numpy as np
+from compas.geometry import Frame
+
+from compas_urt.design.raster_numpy import bilinear_interpolate
+
+
+def frames_to_arrays(frames):
+    """Convert frames into arrays of origins and axes.
+
+    Parameters
+    ----------
+    frames : list[:class:`compas.geometry.Frame`]
+
+    Returns
+    -------
+    tuple[ndarray, ndarray, ndarray]
+        The points, the X axes and the Y axes (n, 3).
+
+    """
+    points = np.array([list(frame.point) for frame in frames], dtype=float).reshape(-1, 3)
+    xaxes = np.array([list(frame.xaxis) for frame in frames], dtype=float).reshape(-1, 3)
+    yaxes = np.array([list(frame.yaxis) for frame in frames], dtype=float).reshape(-1, 3)
+    return points, xaxes, yaxes
+
+
+def tiles_to_arrays(tiles):
+    """Convert the base frames of tiles into arrays of origins and axes, without creating the frames.
+
+    Parameters
+    ----------
+    tiles : list[:class:`~compas_urt.design.Tile`]
+
+    Returns
+    -------
+    tuple[ndarray, ndarray, ndarray]
+        The points, the X axes and the Y axes (n, 3).
+
+    """
+    values = chain.from_iterable(tile.frame_values for tile in tiles)
+    rows = np.fromiter(values, dtype=float, count=9 * len(tiles)).reshape(-1, 3, 3)
+    return rows[:, 0], rows[:, 1], rows[:, 2]
+
+
+def frame_from_row(row):
+    """Convert a (3, 3) array of point, X axis and Y axis into a frame.
+
+    Parameters
+    ----------
+    row : ndarray
+
+    Returns
+    -------
+    :class:`compas.geometry.Frame`
+
+    """
+    return Frame(row[0].tolist(), row[1].tolist(), row[2].tolist())
+
+
+def _unitized(vectors):
+    lengths = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(lengths > 0, lengths, 1.0)
+
+
+def curve_tangent_field(raster, engine):
+    """Sample the tangent directions of the nearest curve on a UV raster.
+
+    Parameters
+    ----------
+    raster : :class:`~compas_urt.design.raster_numpy.UVRaster`
+    engine : :class:`~compas_urt.design.distance_numpy.CurvesDistanceEngine`
+
+    Returns
+    -------
+    ndarray
+        Unit vectors (nu, nv, 3).
+
+    """
+    nu, nv = raster.shape
+    _, segment_ids, _ = engine.nearest_segments(raster.points.reshape(-1, 3))
+    return engine.directions[segment_ids].reshape(nu, nv, 3)
+
+
+def attractor_field(raster, engine, effect_factor=None):
+    """Sample the directions pointing away from the nearest curve on a UV raster.
+
+    Parameters
+    ----------
+    raster : :class:`~compas_urt.design.raster_numpy.UVRaster`
+    engine : :class:`~compas_urt.design.distance_numpy.CurvesDistanceEngine`
+    effect_factor : float, optional
+        If given, the vectors fade out linearly to zero at this distance from the curves.
+
+    Returns
+    -------
+    ndarray
+        Vectors (nu, nv, 3).
+
+    """
+    nu, nv = raster.shape
+    points = raster.points.reshape(-1, 3)
+    distances, _, closest = engine.query(points)
+    vectors = _unitized(points - closest)
+    if effect_factor:
+        vectors *= np.clip(1.0 - distances / effect_factor, 0.0, 1.0)[:, None]
+    return vectors.reshape(nu, nv, 3)
+
+
+def image_gradient_field(raster, loaded_image):
+    """Sample the gradient of the brightness of an image mapped on the UV domain of the surface.
+
+    The image is stretched over the domain, with its width along U and its height along V.
+
+    Parameters
+    ----------
+    raster : :class:`~compas_urt.design.raster_numpy.UVRaster`
+    loaded_image : :class:`~compas_urt.design.load_image.LoadedImage`
+
+    Returns
+    -------
+    ndarray
+        The surface gradient vectors (nu, nv, 3), in brightness per unit length.
+
+    """
+    width, height = loaded_image.width, loaded_image.height
+    brightness = np.zeros((width, height))
+    for (x, y), color in loaded_image.pixels.items():
+        brightness[x, y] = 0.2126 * color.r + 0.7152 * color.g + 0.0722 * color.b
+
+    u_pixels = np.linspace(raster.u_params[0], raster.u_params[-1], width)
+    v_pixels = np.linspace(raster.v_params[0], raster.v_params[-1], height)
+    gradient_u = np.gradient(brightness, u_pixels, axis=0)
+    gradient_v = np.gradient(brightness, v_pixels, axis=1)
+
+    uv = raster.uv
+    nu, nv = raster.shape
+    lu = bilinear_interpolate(gradient_u, u_pixels, v_pixels, uv[:, 0], uv[:, 1]).reshape(nu, nv, 1)
+    lv = bilinear_interpolate(gradient_v, u_pixels, v_pixels, uv[:, 0], uv[:, 1]).reshape(nu, nv, 1)
+
+    # surface gradient from the parametric one, with the first fundamental form
+    du, dv = raster.tangents
+    e = (du * du).sum(axis=-1, keepdims=True)
+    f = (du * dv).sum(axis=-1, keepdims=True)
+    g = (dv * dv).sum(axis=-1, keepdims=True)
+    det = e * g - f * f
+    det = np.where(det > 0, det, 1.0)
+    a = (g * lu - f * lv) / det
+    b = (e * lv - f * lu) / det
+    return a * du + b * dv
+
+
+def reorient_frames(points, xaxes, yaxes, vectors, rotation_factor=1.0, offset_factor=0.0):
+    """Rotate and offset frames along vectors, all at once.
+
+    The vectors are projected onto the planes of the frames.
+    The X axes turn towards the projected vectors around the normals of the frames,
+    and the origins move along them.
+
+    Parameters
+    ----------
+    points : ndarray
+        The origins of the frames (n, 3).
+    xaxes : ndarray
+        The unit X axes of the frames (n, 3).
+    yaxes : ndarray
+        The unit Y axes of the frames (n, 3).
+    vectors : ndarray
+        The field vectors at the frames (n, 3).
+    rotation_factor : float, optional
+        The fraction of the angle between the X axis and the vector the frames are rotated by.
+    offset_factor : float, optional
+        The factor the projected vectors are scaled by to offset the origins.
+
+    Returns
+    -------
+    tuple[ndarray, ndarray, ndarray]
+        The new points, X axes and Y axes.
+
+    """
+    normals = _unitized(np.cross(xaxes, yaxes))
+    vectors = vectors - (vectors * normals).sum(axis=1, keepdims=True) * normals
+    directions = _unitized(vectors)
+
+    sin = (np.cross(xaxes, directions) * normals).sum(axis=1)
+    cos = (xaxes * directions).sum(axis=1)
+    angles = np.arctan2(sin, cos) * rotation_factor
+    angles = np.where(np.linalg.norm(vectors, axis=1) > 0, angles, 0.0)
+
+    # rodrigues' rotation of the X axes, which are perpendicular to the normals
+    new_xaxes = xaxes * np.cos(angles)[:, None] + np.cross(normals, xaxes) * np.sin(angles)[:, None]
+    new_yaxes = np.cross(normals, new_xaxes)
+    new_points = points + vectors * offset_factor
+
+    return new_points, new_xaxes, new_yaxes
+
+
+def reorient_tile_frames(tiles, vectors, rotation_factor=1.0, offset_factor=0.0):
+    """Rotate and offset the base frames of tiles along field vectors.
+
+    Parameters
+    ----------
+    tiles : list[:class:`~compas_urt.design.Tile`]
+        The tiles.
+    vectors : ndarray
+        The field vectors at the tiles (n, 3).
+    rotation_factor : float, optional
+        See :func:`reorient_frames`.
+    offset_factor : float, optional
+        See :func:`reorient_frames`.
+
+    Returns
+    -------
+    tuple[list[int], ndarray]
+        The indices of the tiles with a non-zero field vector,
+        and their new point, X axis and Y axis (k, 3, 3).
+
+    """
+    points, xaxes, yaxes = tiles_to_arrays(tiles)
+    points, xaxes, yaxes = reorient_frames(points, xaxes, yaxes, vectors, rotation_factor, offset_factor)
+    changed = (np.asarray(vectors) != 0).any(axis=1).nonzero()[0]
+    rows = np.stack((points[changed], xaxes[changed], yaxes[changed]), axis=1)
+    return changed.tolist(), rows
@@ -1,9 +1,19 @@
-from compas.artists import Artist
 from compas.plugins import plugin
-from compas_urt.design import RoundTile
-from compas_urt.ghpython.roundtileartist import RoundTileArtist
 
 
 @plugin(category="factories", requires=["Rhino"])
 def register_artists():
+    # imported here, so that the discovery of the plugins does not load Rhino, Grasshopper or the design package
+    from compas.artists import Artist
+
+    from compas_urt.design import DesignLayer
+    from compas_urt.design import RoundTile
+    from compas_urt.design.multiface import MultiFaceLayer
+    from compas_urt.design.overlay import LayerOverlay
+    from compas_urt.ghpython.roundtileartist import RoundTileArtist
+    from compas_urt.ghpython.roundtilelayerartist import RoundTileLayerArtist
+
     Artist.register(RoundTile, RoundTileArtist, context="Grasshopper")
+    Artist.register(DesignLayer, RoundTileLayerArtist, context="Grasshopper")
+    Artist.register(LayerOverlay, RoundTileLayerArtist, context="Grasshopper")
+    Artist.register(MultiFaceLayer, RoundTileLayerArtist, context="Grasshopper")
@@ -1,16 +1,29 @@
-from compas_rhino import unload_modules
-
-
 def reload_urt_modules():
+    from compas_rhino import unload_modules
+
     unload_modules("compas_urt.ghpython.roundtileartist")
+    unload_modules("compas_urt.ghpython.roundtilelayerartist")
     unload_modules("compas_urt.design")
 
     from compas.artists import Artist
     from compas_urt.ghpython.roundtileartist import RoundTileArtist
+    from compas_urt.ghpython.roundtilelayerartist import RoundTileLayerArtist
+    from compas_urt.design import DesignLayer
     from compas_urt.design import RoundTile
+    from compas_urt.design.multiface import MultiFaceLayer
+    from compas_urt.design.overlay import LayerOverlay
 
-    for key in Artist.ITEM_ARTIST["Grasshopper"].keys():
-        if str(key) == "<class 'compas_urt.design.RoundTile'>":
+    registered = (
+        "<class 'compas_urt.design.RoundTile'>",
+        "<class 'compas_urt.design.DesignLayer'>",
+        "<class 'compas_urt.design.overlay.LayerOverlay'>",
+        "<class 'compas_urt.design.multiface.MultiFaceLayer'>",
+    )
+    for key in list(Artist.ITEM_ARTIST["Grasshopper"].keys()):
+        if str(key) in registered:
             del Artist.ITEM_ARTIST["Grasshopper"][key]
 
     Artist.register(RoundTile, RoundTileArtist, context="Grasshopper")
+    Artist.register(DesignLayer, RoundTileLayerArtist, context="Grasshopper")
+    Artist.register(LayerOverlay, RoundTileLayerArtist, context="Grasshopper")
+    Artist.register(MultiFaceLayer, RoundTileLayerArtist, context="Grasshopper")
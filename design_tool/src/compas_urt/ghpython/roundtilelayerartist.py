@@ -0,0 +1,172 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import Rhino.Geometry as rg
+from compas_ghpython.artists import GHArtist
+from System.Drawing import Color
+
+
+class RoundTileLayerArtist(GHArtist):
+    """Artist for drawing all the round tiles of a layer at once.
+
+    Instead of one Brep per tile, every distinct tile size is meshed once, and the tiles are placed
+    as transformed copies of these prototypes, or merged into a single coloured mesh.
+    Above a number of tiles, only the outlines or the centres of the tiles are drawn.
+
+    Parameters
+    ----------
+    layer : :class:`~compas_urt.design.DesignLayer` | list[:class:`~compas_urt.design.RoundTile`]
+        The layer, or the tiles. Any object with a ``tiles`` list, such as a
+        :class:`~compas_urt.design.overlay.LayerOverlay` or a :class:`~compas_urt.design.multiface.MultiFaceLayer`.
+    mode : {"merged", "instances"}, optional
+        Draw a single mesh coloured with the tile colours, or one mesh per tile.
+    lod_threshold : int, optional
+        The number of tiles above which the tiles are drawn with the ``lod`` geometry.
+        None to always draw meshes.
+    lod : {"circles", "points"}, optional
+        The geometry of the tiles above the threshold.
+    segments : int, optional
+        The number of segments of the circles of the prototype meshes.
+    **kwargs : dict, optional
+        Additional keyword arguments.
+        See :class:`~compas_ghpython.artists.GHArtist` for more info.
+
+    Examples
+    --------
+    In a GhPython component:
+
+    >>> a = RoundTileLayerArtist(layer, mode="merged", lod_threshold=20000).draw()  # doctest: +SKIP
+
+    """
+
+    def __init__(self, layer, mode="merged", lod_threshold=10000, lod="circles", segments=24, **kwargs):
+        super(RoundTileLayerArtist, self).__init__(**kwargs)
+        self.tiles = layer.tiles if hasattr(layer, "tiles") else list(layer)
+        self.mode = mode
+        self.lod_threshold = lod_threshold
+        self.lod = lod
+        self.segments = segments
+        self._prototypes = {}
+        self._colors = {}
+
+    @staticmethod
+    def tile_plane(tile):
+        """Get the base plane of a tile, straight from the values of its frame.
+
+        Parameters
+        ----------
+        tile : :class:`~compas_urt.design.RoundTile`
+
+        Returns
+        -------
+        :rhino:`Rhino.Geometry.Plane`
+        """
+        values = tile.frame_values
+        return rg.Plane(
+            rg.Point3d(values[0], values[1], values[2]),
+            rg.Vector3d(values[3], values[4], values[5]),
+            rg.Vector3d(values[6], values[7], values[8]),
+        )
+
+    def prototype(self, diameter, thickness):
+        """Get the mesh of the tiles of a size, on the XY plane.
+
+        Parameters
+        ----------
+        diameter : float
+        thickness : float
+
+        Returns
+        -------
+        :rhino:`Rhino.Geometry.Mesh`
+        """
+        key = (diameter, thickness)
+        if key not in self._prototypes:
+            cylinder = rg.Cylinder(rg.Circle(rg.Plane.WorldXY, diameter / 2), thickness)
+            self._prototypes[key] = rg.Mesh.CreateFromCylinder(cylinder, 1, self.segments)
+        return self._prototypes[key]
+
+    def _color(self, color):
+        if color not in self._colors:
+            red, green, blue = color.rgb255
+            self._colors[color] = Color.FromArgb(int(round(color.a * 255)), red, green, blue)
+        return self._colors[color]
+
+    def transforms(self):
+        """Get the placement of the tiles, e.g. for block instances of the prototypes.
+
+        Returns
+        -------
+        dict[tuple[float, float], list[:rhino:`Rhino.Geometry.Transform`]]
+            The transformations from the XY plane to the tiles, by diameter and thickness.
+        """
+        transforms = {}
+        for tile in self.tiles:
+            transform = rg.Transform.PlaneToPlane(rg.Plane.WorldXY, self.tile_plane(tile))
+            transforms.setdefault((tile.diameter, tile.thickness), []).append(transform)
+        return transforms
+
+    def draw_instances(self):
+        """Draw every tile as a transformed copy of its prototype.
+
+        Returns
+        -------
+        list[:rhino:`Rhino.Geometry.Mesh`]
+        """
+        meshes = []
+        for tile in self.tiles:
+            mesh = self.prototype(tile.diameter, tile.thickness).DuplicateMesh()
+            mesh.Transform(rg.Transform.PlaneToPlane(rg.Plane.WorldXY, self.tile_plane(tile)))
+            meshes.append(mesh)
+        return meshes
+
+    def draw_merged(self):
+        """Draw all tiles as a single mesh, with the colours of the tiles as vertex colours.
+
+        Returns
+        -------
+        :rhino:`Rhino.Geometry.Mesh`
+        """
+        meshes = self.draw_instances()
+        colors = []
+        for tile, mesh in zip(self.tiles, meshes):
+            colors.extend([self._color(tile.color)] * mesh.Vertices.Count)
+
+        merged = rg.Mesh()
+        merged.Append(meshes)
+        merged.VertexColors.SetColors(colors)
+        return merged
+
+    def draw_circles(self):
+        """Draw the outline of every tile.
+
+        Returns
+        -------
+        list[:rhino:`Rhino.Geometry.Circle`]
+        """
+        return [rg.Circle(self.tile_plane(tile), tile.diameter / 2) for tile in self.tiles]
+
+    def draw_points(self):
+        """Draw the centre of every tile.
+
+        Returns
+        -------
+        list[:rhino:`Rhino.Geometry.Point3d`]
+        """
+        return [rg.Point3d(*tile.frame_values[:3]) for tile in self.tiles]
+
+    def draw(self):
+        """Draw the tiles, with the geometry of the level of detail for their number.
+
+        Returns
+        -------
+        :rhino:`Rhino.Geometry.Mesh` | list
+        """
+        if self.lod_threshold is not None and len(self.tiles) > self.lod_threshold:
+            if self.lod == "points":
+                return self.draw_points()
+            return self.draw_circles()
+        if self.mode == "instances":
+            return self.draw_instances()
+        return self.draw_merged()
@@ -0,0 +1,26 @@
+"""
+********************************************************************************
+compas_urt.rpc
+********************************************************************************
+
+.. currentmodule:: compas_urt.rpc
+
+Run the heavy kernels of compas_urt in a long-lived CPython server, e.g. from Grasshopper.
+
+.. autosummary::
+    :toctree: generated/
+
+    ComputeProxy
+    get_proxy
+    encode_array
+    decode_array
+
+"""
+from __future__ import absolute_import
+
+from compas_urt.rpc.payload import decode_array
+from compas_urt.rpc.payload import encode_array
+from compas_urt.rpc.proxy import ComputeProxy
+from compas_urt.rpc.proxy import get_proxy
+
+__all__ = ["ComputeProxy", "get_proxy", "encode_array", "decode_array"]
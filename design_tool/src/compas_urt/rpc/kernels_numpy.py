@@ -0,0 +1,162 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from compas_urt.design.raster_numpy import bilinear_interpolate
+from compas_urt.design.spatial_numpy import SpatialGrid
+from compas_urt.design.spatial_numpy import find_overlaps
+from compas_urt.design.spatial_numpy import nudge_apart
+from compas_urt.design.spatial_numpy import select_non_overlapping
+
+# The kernels run in the compute server, see :class:`~compas_urt.rpc.ComputeProxy`.
+# They take and return arrays and built-in types only.
+
+
+def overlaps(points, radii, tolerance=0.0):
+    """Find the overlapping pairs of tiles.
+
+    Parameters
+    ----------
+    points : ndarray
+        The centres of the tiles (n, 3).
+    radii : ndarray
+        The radii of the tiles (n,).
+    tolerance : float, optional
+        Overlaps up to this depth are accepted.
+
+    Returns
+    -------
+    tuple[ndarray, ndarray, ndarray]
+        The first and the second tile of every pair, and the depth of the overlap.
+    """
+    return find_overlaps(np.asarray(points, dtype=float), radii, tolerance)
+
+
+def resolve_overlaps(points, radii, normals=None, policy="nudge", priorities=None, tolerance=0.0, max_iterations=10):
+    """Resolve the overlaps of tiles, by moving them apart or by dropping tiles.
+
+    Parameters
+    ----------
+    points : ndarray
+        The centres of the tiles (n, 3).
+    radii : ndarray
+        The radii of the tiles (n,).
+    normals : ndarray, optional
+        The normals of the tiles (n, 3), the moves stay in the planes of the tiles.
+    policy : {"nudge", "drop"}, optional
+        Move the tiles apart, or drop the tiles of lower priority.
+    priorities : ndarray, optional
+        The priorities of the tiles to keep, by default the larger tiles.
+    tolerance : float, optional
+        Overlaps up to this depth are accepted.
+    max_iterations : int, optional
+        The maximum number of iterations of nudging.
+
+    Returns
+    -------
+    ndarray
+        The moved centres (n, 3) when nudging, otherwise the indices of the dropped tiles.
+    """
+    if policy == "nudge":
+        return nudge_apart(points, radii, normals, tolerance, max_iterations)
+    if policy == "drop":
+        first, second, _ = find_overlaps(np.asarray(points, dtype=float), radii, tolerance)
+        return select_non_overlapping(len(radii), first, second, radii if priorities is None else priorities)
+    raise Exception("Unknown overlap policy: {}".format(policy))
+
+
+def relax(points, radii, normals=None, effect_factor=1.0, tolerance=0.001, max_iterations=1000):
+    """Relax disks by pushing apart the pairs closer than their summed radii.
+
+    The same relaxation as :meth:`~compas_urt.design.generative.BubblesFromCurveLayer.relax_bubbles`,
+    without the projection onto the surface: with normals, the moves stay in the planes of the disks.
+
+    Parameters
+    ----------
+    points : ndarray
+        The centres (n, 3).
+    radii : ndarray
+        The radii (n,).
+    normals : ndarray, optional
+        The normals of the disks (n, 3).
+    effect_factor : float, optional
+        The push distance of a pair, as a factor of its summed radii.
+    tolerance : float, optional
+        The total move below which the relaxation stops.
+    max_iterations : int, optional
+        The maximum number of iterations.
+
+    Returns
+    -------
+    ndarray
+        The relaxed centres (n, 3).
+    """
+    points = np.array(points, dtype=float)
+    radii = np.asarray(radii, dtype=float)
+    if len(radii) < 2:
+        return points
+    if normals is not None:
+        normals = np.asarray(normals, dtype=float)
+    reach = 2 * radii.max() * effect_factor
+
+    for _ in range(max_iterations):
+        first, second, distances = SpatialGrid(points, reach).pairs_within(reach)
+        push = (radii[first] + radii[second]) * effect_factor
+        close = distances <= push
+        first, second, distances, push = first[close], second[close], distances[close], push[close]
+        if not len(first):
+            break
+
+        directions = points[first] - points[second]
+        lengths = np.linalg.norm(directions, axis=1, keepdims=True)
+        directions = np.where(lengths > 0, directions / np.where(lengths > 0, lengths, 1.0), 0.0)
+        halves = directions * ((push - distances) / 2)[:, None]
+
+        moves = np.zeros_like(points)
+        counts = np.zeros(len(points))
+        np.add.at(moves, first, halves)
+        np.add.at(moves, second, -halves)
+        np.add.at(counts, first, 1)
+        np.add.at(counts, second, 1)
+        moves /= np.maximum(counts, 1)[:, None]
+        if normals is not None:
+            moves -= (moves * normals).sum(axis=1, keepdims=True) * normals
+
+        points += moves
+        if np.linalg.norm(moves, axis=1).sum() < tolerance:
+            break
+    return points
+
+
+def image_colors(pixels, uvs, palette=None):
+    """Colour tiles from an image, optionally with the closest colours of a palette.
+
+    Parameters
+    ----------
+    pixels : ndarray
+        The RGBA colours of the image (width, height, 4), in the range of 0-1,
+        with the pixel (0, 0) at the parameters (0, 0) of the surface.
+    uvs : ndarray
+        The UV parameters of the tiles (n, 2).
+    palette : ndarray, optional
+        The available colours (k, 4).
+
+    Returns
+    -------
+    tuple[ndarray, ndarray | None]
+        The colours of the tiles (n, 4), and with a palette, the index of the colour of every tile.
+    """
+    pixels = np.asarray(pixels, dtype=float)
+    uvs = np.asarray(uvs, dtype=float).reshape(-1, 2)
+    width, height = pixels.shape[:2]
+    u_params = (np.arange(width) + 0.5) / width
+    v_params = (np.arange(height) + 0.5) / height
+    colors = bilinear_interpolate(pixels, u_params, v_params, uvs[:, 0], uvs[:, 1])
+    if palette is None:
+        return colors, None
+    palette = np.asarray(palette, dtype=float)
+    _, indices = cKDTree(palette).query(colors)
+    return palette[indices], indices
@@ -0,0 +1,244 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import base64
+import os
+import re
+import struct
+import sys
+import tempfile
+import uuid
+from array import array
+
+# the marker of encoded arrays in RPC payloads, with their "format" and "shape",
+# not "dtype", which the COMPAS decoder takes for COMPAS data
+ARRAY_KEY = "__array__"
+
+# the struct format characters of the dtypes that can be decoded without NumPy
+_FORMATS = {"<f8": "d", "<f4": "f", "<i8": "q", "<i4": "i", "<u4": "I", "<u1": "B", "|u1": "B", "|b1": "?"}
+
+# the ways of moving arrays between the client and the server:
+# "inline" in the message, or "file" through a temporary file, with only its path in the message
+TRANSPORTS = ("inline", "file")
+
+# the size in bytes from which arrays go through files, smaller ones are sent inline
+FILE_THRESHOLD = 65536
+
+# the keyword argument with the transport and the threshold of the results of a call
+TRANSPORT_KEY = "__transport__"
+
+# the names of the files written by encode_array
+_FILE_NAME = re.compile(r"^[0-9a-f]{32}\.bin$")
+
+
+def transport_directory():
+    """Get the directory of the files of the ``"file"`` transport.
+
+    Shared memory on Linux, where the files never touch the disk, otherwise the temporary directory.
+
+    Returns
+    -------
+    str
+    """
+    root = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else tempfile.gettempdir()
+    directory = os.path.join(root, "compas_urt_rpc")
+    if not os.path.isdir(directory):
+        try:
+            os.makedirs(directory)
+        except OSError:
+            # created by the other side in the meantime
+            pass
+    return directory
+
+
+def _transport_file(path):
+    # the real path of a file of the "file" transport, the receiver reads and deletes it,
+    # so that any other file is rejected before it is touched
+    path = os.path.realpath(path)
+    directory, name = os.path.split(path)
+    if directory != os.path.realpath(transport_directory()) or not _FILE_NAME.match(name):
+        raise Exception("Not a file of the file transport: {}".format(path))
+    return path
+
+
+def _flatten(values):
+    # the flat values and the shape of nested sequences
+    shape = [len(values)]
+    while len(values) and isinstance(values[0], (list, tuple, array)):
+        shape.append(len(values[0]))
+        values = [item for row in values for item in row]
+    return values, shape
+
+
+def _nest(values, shape):
+    # nested lists of the given shape
+    for size in reversed(shape[1:]):
+        values = [list(values[start : start + size]) for start in range(0, len(values), size)]
+    return list(values)
+
+
+def encode_array(values, transport="inline", threshold=FILE_THRESHOLD, files=None):
+    """Encode an array, or nested sequences of floats, for an RPC payload.
+
+    The values are sent as binary data instead of a JSON list of numbers, which is several times
+    smaller and faster to parse: base64 encoded in the message, or written to a file of which
+    only the path is sent. The receiver reads the file, and deletes it.
+
+    Parameters
+    ----------
+    values : ndarray | list
+        A NumPy array, or nested lists of floats of the same length, e.g. a list of points.
+    transport : {"inline", "file"}, optional
+        The way of moving the values, see :data:`TRANSPORTS`.
+    threshold : int, optional
+        The size in bytes from which the values go through a file.
+    files : list[str], optional
+        Collects the paths of the written files, e.g. to remove them if the call fails.
+
+    Returns
+    -------
+    dict
+    """
+    if transport not in TRANSPORTS:
+        raise Exception("Unknown transport: {}".format(transport))
+
+    if hasattr(values, "dtype") and hasattr(values, "tobytes"):
+        dtype = values.dtype.newbyteorder("<") if values.dtype.byteorder == ">" else values.dtype
+        values = values.astype(dtype, copy=False)
+        payload = {"format": dtype.str, "shape": list(values.shape)}
+        size = values.nbytes
+    else:
+        flat, shape = _flatten(values)
+        values = array("d", flat)
+        if sys.byteorder == "big":
+            values.byteswap()
+        payload = {"format": "<f8", "shape": shape}
+        size = len(values) * values.itemsize
+
+    if transport == "file" and size >= threshold:
+        path = os.path.join(transport_directory(), uuid.uuid4().hex + ".bin")
+        with open(path, "wb") as f:
+            values.tofile(f)
+        if files is not None:
+            files.append(path)
+        payload[ARRAY_KEY] = None
+        payload["file"] = path
+        return payload
+
+    if hasattr(values, "dtype"):
+        data = values.tobytes(order="C")
+    else:
+        data = values.tobytes() if hasattr(values, "tobytes") else values.tostring()
+    payload[ARRAY_KEY] = base64.b64encode(data).decode("ascii")
+    return payload
+
+
+def decode_array(payload):
+    """Decode an array of an RPC payload.
+
+    The file of an array sent through the ``"file"`` transport is deleted once read.
+    Only the files written by :func:`encode_array` in the :func:`transport_directory` are accepted.
+
+    Parameters
+    ----------
+    payload : dict
+        See :func:`encode_array`.
+
+    Returns
+    -------
+    ndarray | list
+        A NumPy array where NumPy is available, otherwise nested lists.
+
+    Raises
+    ------
+    Exception
+        If the file of the array is not a file of the transport directory.
+    """
+    path = payload.get("file")
+    if path:
+        path = _transport_file(path)
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+
+    if path:
+        try:
+            if np is not None:
+                return np.fromfile(path, dtype=payload["format"]).reshape(payload["shape"])
+            with open(path, "rb") as f:
+                data = f.read()
+        finally:
+            os.remove(path)
+    else:
+        data = base64.b64decode(payload[ARRAY_KEY])
+        if np is not None:
+            return np.frombuffer(data, dtype=payload["format"]).reshape(payload["shape"])
+
+    if payload["format"] not in _FORMATS:
+        raise Exception("Arrays of type {} cannot be decoded without NumPy.".format(payload["format"]))
+    code = _FORMATS[payload["format"]]
+    values = struct.unpack("<{}{}".format(len(data) // struct.calcsize(code), code), data)
+    return _nest(values, payload["shape"])
+
+
+def encode_payload(data, transport="inline", threshold=FILE_THRESHOLD, files=None):
+    """Encode all arrays in the arguments or the result of an RPC call.
+
+    Parameters
+    ----------
+    data : object
+        NumPy arrays, possibly nested in lists, tuples and dicts.
+    transport : {"inline", "file"}, optional
+    threshold : int, optional
+    files : list[str], optional
+        See :func:`encode_array`.
+
+    Returns
+    -------
+    object
+    """
+    if hasattr(data, "dtype") and hasattr(data, "shape") and data.shape:
+        return encode_array(data, transport, threshold, files)
+    if isinstance(data, dict):
+        return {key: encode_payload(value, transport, threshold, files) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [encode_payload(item, transport, threshold, files) for item in data]
+    return data
+
+
+def decode_payload(data):
+    """Decode all arrays in the arguments or the result of an RPC call.
+
+    Parameters
+    ----------
+    data : object
+        See :func:`encode_payload`.
+
+    Returns
+    -------
+    object
+    """
+    if isinstance(data, dict):
+        if ARRAY_KEY in data:
+            return decode_array(data)
+        return {key: decode_payload(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [decode_payload(item) for item in data]
+    return data
+
+
+def remove_files(files):
+    """Remove the files of arrays that were never received, e.g. after a failed call.
+
+    Parameters
+    ----------
+    files : list[str]
+    """
+    for path in files:
+        if os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,160 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import compas
+from compas.rpc import Proxy
+
+from compas_urt.rpc.payload import FILE_THRESHOLD
+from compas_urt.rpc.payload import TRANSPORT_KEY
+from compas_urt.rpc.payload import TRANSPORTS
+from compas_urt.rpc.payload import decode_payload
+from compas_urt.rpc.payload import encode_payload
+from compas_urt.rpc.payload import remove_files
+
+# the proxies of the running compute servers, by port, transport and threshold,
+# kept across the solutions of Grasshopper
+_PROXIES = {}
+
+KERNELS = "compas_urt.rpc.kernels_numpy"
+
+
+class ComputeProxy(Proxy):
+    """Proxy of a long-lived CPython compute server running the kernels of :mod:`compas_urt.rpc.kernels_numpy`.
+
+    Unlike :class:`compas.rpc.Proxy`, leaving a ``with`` block does not stop the server,
+    so that the next call, e.g. of the next Grasshopper solution, does not wait for CPython, NumPy and SciPy
+    to start again. Use :func:`get_proxy` to share one proxy, and :meth:`stop_server` to stop it.
+
+    Arrays are sent as binary data, see :func:`~compas_urt.rpc.payload.encode_array`,
+    and returned as NumPy arrays in CPython or as nested lists in IronPython.
+    With the ``"file"`` transport, large arrays do not go through the socket at all,
+    but through temporary files in shared memory.
+
+    Parameters
+    ----------
+    python : str, optional
+        The Python executable of the server, with NumPy, SciPy and compas_urt installed.
+    port : int, optional
+        The port of the server.
+    transport : {"inline", "file"}, optional
+        The way of moving arrays in both directions, see :data:`~compas_urt.rpc.payload.TRANSPORTS`.
+    threshold : int, optional
+        The size in bytes from which arrays go through files.
+    **kwargs : dict, optional
+        Additional keyword arguments, see :class:`compas.rpc.Proxy`.
+
+    Examples
+    --------
+    >>> from compas_urt.rpc import encode_array, get_proxy
+    >>> proxy = get_proxy()  # doctest: +SKIP
+    >>> points = proxy.relax(encode_array(points), encode_array(radii))  # doctest: +SKIP
+
+    """
+
+    def __init__(self, python=None, port=1754, transport="inline", threshold=FILE_THRESHOLD, **kwargs):
+        if transport not in TRANSPORTS:
+            raise Exception("Unknown transport: {}".format(transport))
+        self.transport = transport
+        self.threshold = threshold
+        kwargs.setdefault("capture_output", False)
+        super(ComputeProxy, self).__init__(
+            package=KERNELS,
+            python=python,
+            port=port,
+            service="compas_urt.rpc.service",
+            autoreload=False,
+            **kwargs
+        )
+
+    def __exit__(self, *args):
+        pass
+
+    def _proxy(self, *args, **kwargs):
+        files = []
+        try:
+            args = encode_payload(args, self.transport, self.threshold, files)
+            kwargs = encode_payload(kwargs, self.transport, self.threshold, files)
+            kwargs[TRANSPORT_KEY] = [self.transport, self.threshold]
+            result = super(ComputeProxy, self)._proxy(*args, **kwargs)
+        finally:
+            # the server removes the files it read, unless the call failed before
+            remove_files(files)
+        return decode_payload(result)
+
+    def run_batch(self, calls):
+        """Run several calls in one round trip to the server.
+
+        Parameters
+        ----------
+        calls : list[tuple[str, list, dict]]
+            The name of the kernel, the positional and the keyword arguments of every call.
+            Names without a module are kernels of :mod:`compas_urt.rpc.kernels_numpy`.
+
+        Returns
+        -------
+        list
+            The results of the calls.
+        """
+        calls = [
+            [name if "." in name else "{}.{}".format(KERNELS, name), list(args), dict(kwargs)]
+            for name, args, kwargs in calls
+        ]
+        self._function = getattr(self._server, "batch")
+        return self._proxy(calls)
+
+
+def _running_proxies(port):
+    # the cached proxies of the server on a port, forgetting those of a stopped server
+    proxies = []
+    for key in [key for key in _PROXIES if key[0] == port]:
+        try:
+            _PROXIES[key]._server.ping()
+        except Exception:
+            del _PROXIES[key]
+        else:
+            proxies.append(_PROXIES[key])
+    return proxies
+
+
+def get_proxy(python=None, port=1754, transport="inline", threshold=FILE_THRESHOLD):
+    """Get a proxy of the compute server on a port, starting the server the first time.
+
+    The proxies are shared by their port, transport and threshold,
+    so that changing the transport of one proxy never changes that of another.
+
+    Parameters
+    ----------
+    python : str, optional
+        The Python executable of the server.
+        By default, that of a running server, otherwise the Python of :class:`compas.rpc.Proxy`.
+    port : int, optional
+        The port of the server.
+    transport : {"inline", "file"}, optional
+        The way of moving arrays.
+    threshold : int, optional
+        The size in bytes from which arrays go through files.
+
+    Returns
+    -------
+    :class:`ComputeProxy`
+
+    Raises
+    ------
+    Exception
+        If the server on the port was started with another Python executable.
+    """
+    running = _running_proxies(port)
+    if running:
+        if python is not None and compas._os.select_python(python) != running[0].python:
+            raise Exception(
+                "The compute server on port {} runs {}, not {}. Stop it first, or use another port.".format(
+                    port, running[0].python, python
+                )
+            )
+        python = running[0].python
+
+    key = (port, transport, threshold)
+    if key not in _PROXIES:
+        _PROXIES[key] = ComputeProxy(python=python, port=port, transport=transport, threshold=threshold)
+    return _PROXIES[key]
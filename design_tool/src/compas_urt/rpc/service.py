@@ -0,0 +1,82 @@
+"""The compute server of compas_urt.
+
+Started by :class:`~compas_urt.rpc.ComputeProxy`, or by hand with::
+
+    python -m compas_urt.rpc.service --port 1754
+
+The server only listens on the local machine, and decodes and encodes the arrays of the payloads,
+see :mod:`compas_urt.rpc.payload`. Arrays moved through files require the client and the server
+to run on the same machine.
+
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import importlib
+
+from compas.rpc import Dispatcher
+from compas.rpc import Server
+
+from compas_urt.rpc.payload import FILE_THRESHOLD
+from compas_urt.rpc.payload import TRANSPORT_KEY
+from compas_urt.rpc.payload import decode_payload
+from compas_urt.rpc.payload import encode_payload
+
+
+class ComputeService(Dispatcher):
+    """Dispatcher of the compute server, with array payloads and batches of calls."""
+
+    def _call(self, function, idict, odict):
+        # the results go back the way the client asked for
+        kwargs = decode_payload(idict["kwargs"])
+        transport = kwargs.pop(TRANSPORT_KEY, None) or ["inline", FILE_THRESHOLD]
+        idict = {"args": decode_payload(idict["args"]), "kwargs": kwargs}
+        super(ComputeService, self)._call(function, idict, odict)
+        odict["data"] = encode_payload(odict["data"], *transport)
+
+    def batch(self, calls):
+        """Run several calls in one round trip.
+
+        Parameters
+        ----------
+        calls : list[tuple[str, list, dict]]
+            The fully qualified name of the function, the positional and the keyword arguments of every call.
+
+        Returns
+        -------
+        list
+            The results of the calls.
+        """
+        results = []
+        for name, args, kwargs in calls:
+            modulename, functionname = name.rsplit(".", 1)
+            function = getattr(importlib.import_module(modulename), functionname)
+            results.append(function(*args, **kwargs))
+        return results
+
+
+def start_service(port, **kwargs):
+    print("Starting compas_urt compute service on port {0}...".format(port))
+
+    # the server lives as long as Rhino, the requests are not logged to its output
+    server = Server(("127.0.0.1", port), logRequests=False)
+    server.register_function(server.ping)
+    server.register_function(server.remote_shutdown)
+    server.register_instance(ComputeService())
+
+    print("Listening...")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", "-p", action="store", default=1754, type=int, help="RPC port number")
+    # passed by compas.rpc.Proxy, modules are never reloaded
+    parser.add_argument("--autoreload", dest="autoreload", action="store_true")
+    parser.add_argument("--no-autoreload", dest="autoreload", action="store_false")
+
+    args = parser.parse_args()
+    start_service(args.port)
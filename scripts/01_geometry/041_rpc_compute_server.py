@@ -0,0 +1,31 @@
+# Run the heavy compas_urt kernels in a CPython server that stays warm between calls
+import random
+
+from compas_urt.rpc import encode_array
+from compas_urt.rpc import get_proxy
+
+# the disks cover about half of the square, so that the relaxation converges
+points = [[random.uniform(0, 1000), random.uniform(0, 1000), 0] for _ in range(600)]
+radii = [random.choice([10, 15, 20]) for _ in points]
+normals = [[0, 0, 1] for _ in points]
+
+# starts the server the first time, reconnects afterwards
+proxy = get_proxy()
+
+# arrays travel as binary data instead of JSON lists
+first, second, depths = proxy.overlaps(encode_array(points), encode_array(radii))
+print("{} overlaps".format(len(first)))
+
+relaxed = proxy.relax(encode_array(points), encode_array(radii), normals=encode_array(normals), max_iterations=200)
+
+# several calls in one round trip
+dropped, moved = proxy.run_batch(
+    [
+        ("resolve_overlaps", [encode_array(relaxed), encode_array(radii)], {"policy": "drop"}),
+        ("resolve_overlaps", [encode_array(relaxed), encode_array(radii)], {"normals": encode_array(normals)}),
+    ]
+)
+print("{} tiles dropped".format(len(dropped)))
+
+# the server keeps running for the next call, until it is stopped
+# proxy.stop_server()
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from compas_urt.design.generative import GridLayer
+
+GRID_OPTIONS = {
+    "pack_type": "hexagonal",
+    "curve_type": "isocurves",
+    "uniform": True,
+    "param_density": 1,
+    "flip_curves": False,
+    "flip_frame": False,
+    "debug_geometry": False,
+    "seed": 0,
+}
+
+
+def make_random_arrays(count, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = np.zeros((count, 9))
+    frames[:, :3] = rng.uniform(0, 1000, (count, 3)) * [1.0, 1.0, 0.2]
+    frames[:, 3] = 1.0
+    frames[:, 7] = 1.0
+    return {
+        "frames": frames,
+        "diameters": rng.choice([40.0, 50.0, 60.0], count),
+        "thicknesses": np.full(count, 5.0),
+        "uvs": rng.uniform(0, 1, (count, 2)),
+        "colors": rng.integers(0, 3, count).astype(np.uint32),
+        "tags": rng.integers(-1, 5, count).astype(np.int64),
+        "layers": rng.integers(0, 2, count).astype(np.int32),
+        "palette": np.array([[1, 0, 0, 1], [0, 1, 0, 1], [0, 0, 1, 1]], dtype=float),
+        "layer_names": ["0_GridLayer", "1_ImageLayer"],
+    }
+
+
+@pytest.fixture
+def random_arrays():
+    # the columns of a tile file for random tiles, ``random_arrays(count, seed=0)``
+    return make_random_arrays
+
+
+@pytest.fixture
+def grid_options():
+    return dict(GRID_OPTIONS)
+
+
+@pytest.fixture
+def grid_layer(grid_options):
+    # ``grid_layer(surface, tile_diameter=100.0, generate=False, **options)``, with the options over the grid options
+    def make(surface, tile_diameter=100.0, generate=False, **options):
+        layer = GridLayer(surface, tile_diameter, 5.0, 2.0, options=dict(grid_options, **options))
+        if generate:
+            layer.generate()
+        return layer
+
+    return make
@@ -0,0 +1,106 @@
+from copy import copy
+
+import compas
+import pytest
+from compas.geometry import Frame
+from compas.geometry import Translation
+from compas.geometry import distance_point_point
+
+from compas_urt.design import RoundTile
+from compas_urt.design import TileDesign
+from compas_urt.design import spatial
+from compas_urt.design import spatial_functions
+from compas_urt.design.surfaces_numpy import CylinderSurface
+from compas_urt.design.surfaces_numpy import PanelSurface
+from compas_urt.design.surfaces_numpy import SaddleSurface
+
+def test_combine_layers_removes_every_covered_tile_once(grid_layer):
+    surface = SaddleSurface()
+    top = grid_layer(surface, 150.0, generate=True)
+    bottom = grid_layer(surface, 50.0, generate=True)
+
+    _, combined = TileDesign().combine_layers(top, bottom)
+
+    def is_covered(tile):
+        return any(distance_point_point(tile.center, other.center) < other.diameter / 2 for other in top.tiles)
+
+    assert combined.tiles == [tile for tile in bottom.tiles if not is_covered(tile)]
+    assert len(combined.tiles) < len(bottom.tiles)
+
+
+def test_coverage_returns_the_gap_heatmap_as_an_array(grid_layer):
+    surface = SaddleSurface()
+    layer = grid_layer(surface, 100.0, generate=True)
+
+    covered, largest_gap, gaps = layer.coverage(64)
+
+    assert gaps.shape == (64, 64)
+    assert 0.5 < covered < 1.0
+    assert largest_gap > 0
+    assert (gaps >= 0).all() and (gaps == 0).any()
+
+
+@pytest.mark.parametrize("surface", [SaddleSurface(height=0.0), CylinderSurface(), PanelSurface()])
+@pytest.mark.parametrize("flip_curves", [False, True])
+def test_hexagonal_grid_has_no_overlaps(surface, flip_curves, grid_layer):
+    layer = grid_layer(surface, 60.0, generate=True, flip_curves=flip_curves)
+
+    assert layer.tiles
+    assert layer.find_overlaps() == []
+    for tile in layer.tiles:
+        assert 0 <= tile.uv_param[0] <= 1 and 0 <= tile.uv_param[1] <= 1
+
+
+def test_base_frame_raises_on_changes_in_place():
+    tile = RoundTile(Frame([1, 2, 3], [1, 0, 0], [0, 1, 0]), 50.0, 5.0, (0.5, 0.5))
+
+    with pytest.raises(Exception):
+        tile.base_frame.point = [0, 0, 0]
+    with pytest.raises(Exception):
+        tile.base_frame.xaxis *= -1
+    with pytest.raises(Exception):
+        tile.base_frame.transform(Translation.from_vector([1, 0, 0]))
+    assert tile.center == (1.0, 2.0, 3.0)
+
+    frame = tile.base_frame.copy()
+    frame.point = [0, 0, 0]
+    tile.base_frame = frame
+    assert tile.center == (0.0, 0.0, 0.0)
+    assert tile.pickup_frame.point == [0, 0, 5]
+
+
+def overlapping_layer(grid_layer):
+    layer = grid_layer(SaddleSurface(height=0.0), 60.0, generate=True)
+    layer.tiles = [copy(tile) for tile in layer.tiles]
+    for tile in layer.tiles[::10]:
+        tile.diameter *= 1.1
+    return layer
+
+
+@pytest.mark.parametrize("policy", ["drop_smaller", "drop_later"])
+def test_overlaps_are_dropped_the_same_without_numpy(monkeypatch, policy, grid_layer):
+    layer = overlapping_layer(grid_layer)
+    expected = copy(layer)
+    expected.resolve_overlaps(policy)
+
+    monkeypatch.setattr(compas, "IPY", True)
+    assert spatial_functions() is spatial
+    assert layer.find_overlaps() == pytest.approx(overlapping_layer(grid_layer).find_overlaps())
+    assert layer.resolve_overlaps(policy) == len(overlapping_layer(grid_layer).tiles) - len(expected.tiles)
+    assert layer.tiles == expected.tiles
+    assert layer.find_overlaps() == []
+
+
+@pytest.mark.parametrize("ipy", [False, True])
+def test_nudge_moves_copies_of_the_tiles(monkeypatch, ipy, grid_layer):
+    monkeypatch.setattr(compas, "IPY", ipy)
+    layer = overlapping_layer(grid_layer)
+    tiles = layer.tiles
+    centers = [tile.center for tile in tiles]
+    depth = sum(overlap[2] for overlap in layer.find_overlaps())
+
+    moved = layer.resolve_overlaps("nudge")
+
+    assert [tile.center for tile in tiles] == centers
+    assert moved == len([1 for tile, original in zip(layer.tiles, tiles) if tile is not original]) > 0
+    assert sum(overlap[2] for overlap in layer.find_overlaps()) < depth / 10
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from compas_urt.design.distance_numpy import CurvesDistanceEngine
+from compas_urt.design.distance_numpy import closest_points_on_segments
+from compas_urt.design.surfaces_numpy import PolylineCurve
+
+
+def brute_force(engine, points):
+    _, distances = closest_points_on_segments(points[:, None, :], engine.starts[None], engine.ends[None])
+    nearest = np.argmin(distances, axis=1)
+    return distances[np.arange(len(points)), nearest], engine.curve_ids[nearest]
+
+
+def test_a_long_segment_is_found_past_the_nearest_midpoints():
+    curves = [PolylineCurve([[0, 0, 0], [10000, 0, 0]]), PolylineCurve([[4995, -70, 0], [5005, -70, 0]])]
+    # the short curve has a hundred segments of 0.1, all with nearer midpoints than the long curve
+    engine = CurvesDistanceEngine(curves)
+
+    distances, curve_ids, closest = engine.query([[5000, -30, 0]])
+
+    assert distances.tolist() == [30.0]
+    assert curve_ids.tolist() == [0]
+    assert np.allclose(closest, [[5000, 0, 0]])
+
+
+@pytest.mark.parametrize("max_distance", [None, 150.0])
+def test_distances_match_a_brute_force_search(max_distance):
+    rng = np.random.default_rng(0)
+    # segments of 200 on the long curve, and of less than 0.3 on the short ones
+    curves = [PolylineCurve([[0, 500, 0], [20000, 500, 0]])]
+    for _ in range(20):
+        start = rng.uniform(0, 1000, 2)
+        curves.append(PolylineCurve([list(start) + [0], list(start + rng.uniform(-20, 20, 2)) + [0]]))
+    engine = CurvesDistanceEngine(curves)
+    points = np.zeros((2000, 3))
+    points[:, :2] = rng.uniform(0, 1000, (2000, 2))
+
+    distances, curve_ids, _ = engine.query(points, max_distance=max_distance)
+    expected, expected_ids = brute_force(engine, points)
+
+    resolved = expected < (np.inf if max_distance is None else max_distance)
+    assert np.allclose(distances[resolved], expected[resolved])
+    assert np.array_equal(curve_ids[resolved], expected_ids[resolved])
@@ -0,0 +1,19 @@
+import importlib.util
+import os
+
+import pytest
+
+# the checks of benchmarks/check_import_time.py, which imports every module in a fresh interpreter
+PATH = os.path.join(os.path.dirname(__file__), "..", "design_tool", "benchmarks", "check_import_time.py")
+spec = importlib.util.spec_from_file_location("check_import_time", PATH)
+check_import_time = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(check_import_time)
+
+
+@pytest.mark.parametrize("module", check_import_time.MODULES)
+def test_import_time_and_forbidden_modules(module):
+    times, loaded, error = check_import_time.import_module(module)
+
+    assert error is None
+    assert check_import_time.own_time(times) <= check_import_time.BUDGET
+    assert check_import_time.forbidden_modules(loaded) == []
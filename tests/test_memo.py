@@ -0,0 +1,43 @@
+from compas.geometry import Polyline
+
+from compas_urt.design.generative import BubblesFromCurveLayer
+from compas_urt.design.memo import LayerCache
+from compas_urt.design.memo import layer_key
+from compas_urt.design.surfaces_numpy import SaddleSurface
+
+def test_equal_surfaces_give_the_same_key(grid_layer):
+    assert layer_key(grid_layer(SaddleSurface())) == layer_key(grid_layer(SaddleSurface()))
+
+
+def test_equal_curves_give_the_same_key():
+    def bubbles_layer():
+        curve = Polyline([[0, 500, 0], [500, 500, 0], [1000, 500, 0]])
+        return BubblesFromCurveLayer(SaddleSurface(), curve, 10, 2.0, xsize_domain=(20, 40), ysize_domain=(20, 40))
+
+    assert layer_key(bubbles_layer()) == layer_key(bubbles_layer())
+
+
+def test_different_inputs_give_different_keys(grid_layer):
+    key = layer_key(grid_layer(SaddleSurface()))
+    assert layer_key(grid_layer(SaddleSurface(height=100.0))) != key
+    assert layer_key(grid_layer(SaddleSurface(), tile_diameter=120.0)) != key
+    assert layer_key(grid_layer(SaddleSurface(), seed=1)) != key
+
+
+def test_cache_hits_for_a_separately_built_layer(grid_layer):
+    cache = LayerCache()
+    first = grid_layer(SaddleSurface())
+    assert not cache.generate(first)
+
+    second = grid_layer(SaddleSurface())
+    assert cache.generate(second)
+    assert [tile.center for tile in second.tiles] == [tile.center for tile in first.tiles]
+
+
+def test_cache_is_bypassed_without_a_seed(grid_layer):
+    cache = LayerCache()
+    layer = grid_layer(SaddleSurface(), seed=None)
+
+    assert not cache.generate(layer)
+    assert not cache.generate(grid_layer(SaddleSurface(), seed=None))
+    assert layer.tiles and cache.get(layer_key(layer)) is None
@@ -0,0 +1,36 @@
+import compas
+import pytest
+
+from compas_urt.design.generative import GridLayer
+from compas_urt.design.multiface import MultiFaceLayer
+from compas_urt.design.spatial_numpy import find_overlaps
+from compas_urt.design.surfaces_numpy import SaddleSurface
+
+def stitched_layer(grid_options):
+    # the second face covers half of the first, where all its tiles overlap those of the first
+    faces = [SaddleSurface(height=0.0), SaddleSurface(size_v=500.0, height=0.0)]
+    layer = MultiFaceLayer(
+        GridLayer, faces, options=grid_options, tile_diameter=60.0, tile_thickness=5.0, tile_joint=2.0
+    )
+    layer.generate(processes=1)
+    return layer
+
+
+def seam_overlaps(layer):
+    points = [tile.center for tile in layer.tiles]
+    radii = [tile.diameter / 2 for tile in layer.tiles]
+    first, second, _ = find_overlaps(points, radii)
+    return [(i, j) for i, j in zip(first.tolist(), second.tolist()) if layer.tile_faces[i] != layer.tile_faces[j]]
+
+
+@pytest.mark.parametrize("ipy", [False, True])
+def test_stitch_removes_the_overlaps_between_faces(monkeypatch, ipy, grid_options):
+    expected = stitched_layer(grid_options)
+    monkeypatch.setattr(compas, "IPY", ipy)
+
+    layer = stitched_layer(grid_options)
+
+    assert len(layer.tiles) < len(layer.layers[0].tiles) + len(layer.layers[1].tiles)
+    assert layer.tile_faces.count(0) == len(layer.layers[0].tiles)
+    assert seam_overlaps(layer) == []
+    assert [tile.center for tile in layer.tiles] == [tile.center for tile in expected.tiles]
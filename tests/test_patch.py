@@ -0,0 +1,181 @@
+import os
+from copy import copy
+
+import numpy as np
+import pytest
+
+from compas_urt.design import TileDesign
+from compas_urt.design.palette import palette_color
+from compas_urt.design.patch_numpy import apply_patch
+from compas_urt.design.patch_numpy import diff_arrays
+from compas_urt.design.patch_numpy import diff_designs
+from compas_urt.design.patch_numpy import read_patch
+from compas_urt.design.patch_numpy import write_patch
+from compas_urt.design.store_numpy import TileStore
+from compas_urt.design.store_numpy import write_store
+from compas_urt.design.surfaces_numpy import SaddleSurface
+from compas_urt.design.tilefile_numpy import COLUMNS
+from compas_urt.design.tilefile_numpy import design_to_arrays
+
+def records(arrays):
+    # the tiles as sorted rows of values, with their colours and layer names resolved
+    palette = np.asarray(arrays["palette"])
+    layer_names = list(arrays["layer_names"])
+    rows = []
+    for i in range(len(arrays["frames"])):
+        rows.append(
+            tuple(arrays["frames"][i].round(9))
+            + (arrays["diameters"][i], arrays["thicknesses"][i])
+            + tuple(arrays["uvs"][i])
+            + tuple(palette[arrays["colors"][i]])
+            + (int(arrays["tags"][i]), layer_names[arrays["layers"][i]])
+        )
+    return sorted(rows)
+
+
+def stored_records(directory):
+    store = TileStore(directory)
+    return records(store.arrays(store.query()))
+
+
+def changed_version(random_arrays, arrays, seed):
+    # remove, move, retag, add and reorder tiles
+    rng = np.random.default_rng(seed)
+    count = len(arrays["frames"])
+    kept = np.sort(rng.choice(count, count - 50, replace=False))
+    new = {column: arrays[column][kept] for column in COLUMNS}
+    new["frames"][:20, :3] += 0.25
+    new["tags"][20:40] = 7
+    added = random_arrays(30, seed=seed + 100)
+    positions = np.sort(rng.choice(len(kept) + 30, 30, replace=False))
+    swapped = rng.choice(len(kept), (5, 2), replace=False)
+    for column in COLUMNS:
+        new[column][swapped] = new[column][swapped[:, ::-1]]
+        new[column] = np.insert(new[column], positions - np.arange(30), added[column], axis=0)
+    new["palette"] = arrays["palette"]
+    new["layer_names"] = arrays["layer_names"]
+    return new
+
+
+def check_positions(directory, arrays):
+    # the tiles at the positions of the stored version are those of the design, in its order
+    store = TileStore(directory)
+    positions = np.arange(len(arrays["frames"]))
+    assert np.array_equal(store.ids_at_positions(positions), store.position_ids)
+    assert np.array_equal(store.arrays(store.position_ids)["frames"], arrays["frames"])
+
+
+def test_positional_patch_removes_the_right_tile(tmp_path, random_arrays):
+    old = random_arrays(2000)
+    write_store(str(tmp_path), old)
+    new = {column: np.delete(old[column], 5, axis=0) for column in COLUMNS}
+    new["palette"] = old["palette"]
+    new["layer_names"] = old["layer_names"]
+
+    apply_patch(str(tmp_path), diff_arrays(old, new))
+
+    centers = TileStore(str(tmp_path)).arrays(TileStore(str(tmp_path)).query())["frames"][:, :3].tolist()
+    assert len(centers) == 1999
+    assert old["frames"][5, :3].tolist() not in centers
+
+
+@pytest.mark.parametrize("through_file", [False, True])
+def test_patched_store_matches_a_store_of_the_new_version(tmp_path, through_file, random_arrays):
+    versions = [random_arrays(1000)]
+    versions.append(changed_version(random_arrays, versions[0], 1))
+    versions.append(changed_version(random_arrays, versions[1], 2))
+    directory = str(tmp_path / "patched")
+    write_store(directory, versions[0])
+
+    for old, new in zip(versions[:-1], versions[1:]):
+        patch = diff_arrays(old, new)
+        if through_file:
+            write_patch(patch, str(tmp_path / "patch.npz"))
+            patch = read_patch(str(tmp_path / "patch.npz"))
+        apply_patch(directory, patch)
+
+        write_store(str(tmp_path / "rewritten"), new)
+        assert stored_records(directory) == stored_records(str(tmp_path / "rewritten"))
+        check_positions(directory, new)
+
+    assert sorted(name for name in os.listdir(directory) if name.startswith(("removed", "position"))) == [
+        "position_ids.npy",
+        "positions_000001.npz",
+        "positions_000002.npz",
+        "removed_000002.npy",
+    ]
+    assert not [name for name in os.listdir(directory) if name.endswith(".tmp")]
+
+
+def test_patches_grow_with_the_changes_only(tmp_path, random_arrays):
+    old = random_arrays(50000)
+    new = {column: old[column].copy() for column in COLUMNS}
+    new["colors"][::5000] = (new["colors"][::5000] + 1) % 3
+    new["palette"] = old["palette"]
+    new["layer_names"] = old["layer_names"]
+
+    patch = diff_arrays(old, new)
+    write_patch(patch, str(tmp_path / "patch.npz"))
+
+    assert len(patch["modified"]) == 10 and not len(patch["removed"]) and not len(patch["inserted"])
+    assert os.path.getsize(str(tmp_path / "patch.npz")) < 8000
+
+    directory = str(tmp_path / "store")
+    write_store(directory, old)
+    apply_patch(directory, read_patch(str(tmp_path / "patch.npz")))
+    assert os.path.getsize(os.path.join(directory, "positions_000001.npz")) < 4000
+    check_positions(directory, new)
+
+
+def test_patch_of_store_arrays_and_returned_ids(tmp_path, random_arrays):
+    old = random_arrays(1000)
+    write_store(str(tmp_path), old)
+    store = TileStore(str(tmp_path))
+    new = changed_version(random_arrays, old, 1)
+
+    patch = diff_arrays(store.arrays(store.query()), new)
+    modified, added = apply_patch(store, patch)
+
+    assert stored_records(str(tmp_path)) == records(new)
+    assert store.position_ids is None
+    with pytest.raises(Exception):
+        apply_patch(store, diff_arrays(new, changed_version(random_arrays, new, 2)))
+    count = len(patch["modified"])
+    read = store.arrays(np.concatenate([modified, added]))
+    assert np.array_equal(read["frames"], patch["frames"])
+    assert np.array_equal(read["tags"], patch["tags"])
+    assert count and len(added) == len(patch["frames"]) - count
+
+
+def test_patch_of_another_version_is_rejected(tmp_path, random_arrays):
+    old = random_arrays(1000)
+    write_store(str(tmp_path), old)
+    store = TileStore(str(tmp_path))
+    header = copy(store.header)
+    layer_names = list(store.layer_names)
+
+    patch = diff_arrays(changed_version(random_arrays, old, 1), changed_version(random_arrays, old, 2))
+    patch["layer_names"] = ["2_ImageLayer"]
+    with pytest.raises(Exception):
+        apply_patch(store, patch)
+
+    assert store.header == header and store.layer_names == layer_names
+    assert stored_records(str(tmp_path)) == records(old)
+
+
+def test_diff_designs_patches_the_stored_design(tmp_path, grid_layer):
+    layer = grid_layer(SaddleSurface(), 80.0, generate=True)
+    old = TileDesign()
+    old.add_layer(layer)
+
+    changed = copy(layer)
+    changed.tiles = [copy(tile) for tile in layer.tiles[3:]]
+    changed.tiles[0].color = palette_color(1.0, 0.0, 0.0)
+    changed.tiles[1].tag = 4
+    new = TileDesign()
+    new.add_layer(changed)
+
+    write_store(str(tmp_path), design_to_arrays(old))
+    apply_patch(str(tmp_path), diff_designs(old, new))
+
+    assert stored_records(str(tmp_path)) == records(design_to_arrays(new))
@@ -0,0 +1,148 @@
+import os
+import socket
+
+import numpy as np
+import pytest
+
+from compas.rpc import RPCServerError
+
+from compas_urt.rpc import ComputeProxy
+from compas_urt.rpc import decode_array
+from compas_urt.rpc import encode_array
+from compas_urt.rpc import get_proxy
+from compas_urt.rpc.payload import transport_directory
+
+
+def free_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+@pytest.fixture(scope="module")
+def proxy():
+    proxy = ComputeProxy(port=free_port())
+    try:
+        yield proxy
+    finally:
+        proxy.stop_server()
+
+
+def disks(count=200, seed=0):
+    # a feasible density, the disks cover about a third of the square
+    rng = np.random.default_rng(seed)
+    points = np.zeros((count, 3))
+    points[:, :2] = rng.uniform(0, 500, (count, 2))
+    return points, rng.choice([10.0, 15.0, 20.0], count), np.tile([0.0, 0.0, 1.0], (count, 1))
+
+
+def test_overlaps(proxy):
+    points, radii, _ = disks()
+    first, second, depths = proxy.overlaps(encode_array(points), encode_array(radii))
+
+    distances = np.linalg.norm(points[:, None] - points[None], axis=2)
+    expected = np.argwhere(np.triu(distances < radii[:, None] + radii[None], 1))
+    assert sorted(zip(first.tolist(), second.tolist())) == sorted(map(tuple, expected.tolist()))
+    assert np.all(depths > 0)
+
+
+def test_relax(proxy):
+    points, radii, normals = disks()
+    relaxed = proxy.relax(encode_array(points), encode_array(radii), normals=encode_array(normals))
+
+    assert relaxed.shape == points.shape
+    assert np.allclose(relaxed[:, 2], 0.0)
+    # the disks end up touching, up to the tolerance of the relaxation
+    first, _, _ = proxy.overlaps(encode_array(relaxed), encode_array(radii), tolerance=0.01)
+    assert len(first) == 0
+
+
+def test_resolve_overlaps(proxy):
+    points, radii, normals = disks()
+    dropped = proxy.resolve_overlaps(encode_array(points), encode_array(radii), policy="drop")
+
+    kept = np.setdiff1d(np.arange(len(points)), dropped)
+    first, _, _ = proxy.overlaps(encode_array(points[kept]), encode_array(radii[kept]))
+    assert len(dropped) and len(first) == 0
+
+    moved = proxy.resolve_overlaps(encode_array(points), encode_array(radii), normals=encode_array(normals))
+    assert moved.shape == points.shape and np.allclose(moved[:, 2], 0.0)
+
+
+def test_image_colors(proxy):
+    pixels = np.zeros((4, 2, 4))
+    pixels[:, :, 3] = 1.0
+    pixels[2:, :, 0] = 1.0
+    uvs = np.array([[0.1, 0.5], [0.9, 0.5]])
+    palette = np.array([[0.0, 0.0, 0.0, 1.0], [1.0, 0.0, 0.0, 1.0]])
+
+    colors, indices = proxy.image_colors(encode_array(pixels), encode_array(uvs), palette=encode_array(palette))
+    assert indices.tolist() == [0, 1]
+    assert np.array_equal(colors, palette)
+
+
+def test_run_batch(proxy):
+    points, radii, normals = disks()
+    dropped, moved = proxy.run_batch(
+        [
+            ("resolve_overlaps", [encode_array(points), encode_array(radii)], {"policy": "drop"}),
+            ("resolve_overlaps", [encode_array(points), encode_array(radii)], {"normals": encode_array(normals)}),
+        ]
+    )
+
+    assert np.array_equal(dropped, proxy.resolve_overlaps(encode_array(points), encode_array(radii), policy="drop"))
+    assert moved.shape == points.shape
+
+
+def test_kernel_errors_are_raised(proxy):
+    points, radii, _ = disks(10)
+    with pytest.raises(RPCServerError, match="Unknown overlap policy"):
+        proxy.resolve_overlaps(encode_array(points), encode_array(radii), policy="shrink")
+
+    # the server keeps running
+    assert proxy._server.ping() == 1
+
+
+def test_get_proxy_shares_proxies_by_transport():
+    port = free_port()
+    inline = get_proxy(port=port)
+    try:
+        files = get_proxy(port=port, transport="file", threshold=0)
+        assert get_proxy(port=port) is inline
+        assert files is not inline and inline.transport == "inline"
+
+        points, radii, _ = disks()
+        through_files = files.overlaps(encode_array(points), encode_array(radii))
+        for values, expected in zip(through_files, inline.overlaps(encode_array(points), encode_array(radii))):
+            assert np.array_equal(values, expected)
+
+        with pytest.raises(Exception, match="runs"):
+            get_proxy(python="/another/python", port=port)
+    finally:
+        inline.stop_server()
+
+
+def test_only_files_of_the_transport_are_decoded(tmp_path):
+    values = np.arange(100.0)
+    payload = encode_array(values, transport="file", threshold=0)
+    assert os.path.dirname(payload["file"]) == transport_directory()
+
+    outside = str(tmp_path / os.path.basename(payload["file"]))
+    values.tofile(outside)
+    renamed = os.path.join(transport_directory(), "renamed.bin")
+    values.tofile(renamed)
+    link = os.path.join(transport_directory(), "0" * 32 + ".bin")
+    os.symlink(outside, link)
+    try:
+        for path in (outside, renamed, link, os.path.join(transport_directory(), "..", "compas_urt_rpc", "x.bin")):
+            with pytest.raises(Exception, match="Not a file of the file transport"):
+                decode_array(dict(payload, file=path))
+        assert os.path.exists(outside) and os.path.exists(renamed)
+    finally:
+        os.remove(renamed)
+        os.remove(link)
+
+    assert np.array_equal(decode_array(payload), values)
+    assert not os.path.exists(payload["file"])
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from compas_urt.design import spatial
+from compas_urt.design import spatial_numpy
+
+
+def disks(count=400, seed=0):
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(0, 1000, (count, 3)) * [1.0, 1.0, 0.1]
+    return points, rng.choice([15.0, 20.0, 30.0], count)
+
+
+def pairs(first, second, depths):
+    return sorted(zip(np.asarray(first).tolist(), np.asarray(second).tolist(), np.round(depths, 9).tolist()))
+
+
+@pytest.mark.parametrize("tolerance", [0.0, 5.0])
+def test_pure_python_overlaps_match_numpy(tolerance):
+    points, radii = disks()
+
+    expected = spatial_numpy.find_overlaps(points, radii, tolerance)
+    found = spatial.find_overlaps(points.tolist(), radii.tolist(), tolerance)
+
+    assert len(expected[0])
+    assert pairs(*found) == pairs(*expected)
+
+
+def test_pure_python_selection_matches_numpy():
+    points, radii = disks()
+    first, second, _ = spatial_numpy.find_overlaps(points, radii)
+    priorities = radii - np.arange(len(radii)) * 1e-6
+
+    expected = spatial_numpy.select_non_overlapping(len(radii), first, second, priorities)
+    dropped = spatial.select_non_overlapping(len(radii), first.tolist(), second.tolist(), priorities.tolist())
+
+    assert dropped == expected.tolist()
+
+
+def test_pure_python_nudging_matches_numpy():
+    points, radii = disks(200)
+    normals = np.tile([0.0, 0.0, 1.0], (len(points), 1))
+
+    expected = spatial_numpy.nudge_apart(points, radii, normals, max_iterations=5)
+    moved = spatial.nudge_apart(points.tolist(), radii.tolist(), normals.tolist(), max_iterations=5)
+
+    assert np.allclose(moved, expected)
+    assert np.allclose(np.asarray(moved)[:, 2], points[:, 2])
+
+
+def test_no_overlaps_without_disks():
+    assert spatial.find_overlaps([], []) == ([], [], [])
+    assert spatial.find_overlaps([[0, 0, 0], [1, 0, 0]], [0.0, 0.0]) == ([], [], [])
+    assert spatial.select_non_overlapping(3, [], [], [1, 2, 3]) == []
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from compas_urt.design.patch_numpy import apply_patch
+from compas_urt.design.patch_numpy import diff_arrays
+from compas_urt.design.store_numpy import TileStore
+from compas_urt.design.store_numpy import write_store
+
+BOX = ([200.0, 300.0, 0.0], [600.0, 700.0, 100.0])
+UV = ([0.1, 0.2], [0.5, 0.9])
+
+
+def centers(arrays, selection=slice(None)):
+    # the tiles are identified by their random centres
+    return sorted(map(tuple, arrays["frames"][selection, :3].tolist()))
+
+
+def found(store, ids):
+    assert np.all(np.diff(ids) > 0)
+    return centers(store.arrays(ids))
+
+
+def in_box(arrays, minimum, maximum):
+    points = arrays["frames"][:, :3]
+    return np.all((points >= minimum) & (points <= maximum), axis=1)
+
+
+def in_uv(arrays, minimum, maximum):
+    return np.all((arrays["uvs"] >= minimum) & (arrays["uvs"] <= maximum), axis=1)
+
+
+def check_queries(store, arrays):
+    assert len(store) == len(arrays["frames"])
+    assert found(store, store.query()) == centers(arrays)
+    assert found(store, store.query_box(*BOX)) == centers(arrays, in_box(arrays, *BOX))
+    assert found(store, store.query_uv(*UV)) == centers(arrays, in_uv(arrays, *UV))
+
+    layer_names = list(arrays["layer_names"])
+    for index, name in enumerate(layer_names):
+        layer = arrays["layers"] == index
+        assert found(store, store.query_layer(name)) == centers(arrays, layer)
+        assert found(store, store.query_layer(store.layer_names.index(name))) == centers(arrays, layer)
+    assert len(store.query_layer("unknown")) == 0
+
+    for tag in (-1, 3, 99):
+        assert found(store, store.query_tag(tag)) == centers(arrays, arrays["tags"] == tag)
+
+    ids = store.query(box=BOX, uv=UV, layer=layer_names[1], tag=2)
+    expected = in_box(arrays, *BOX) & in_uv(arrays, *UV) & (arrays["layers"] == 1) & (arrays["tags"] == 2)
+    assert found(store, ids) == centers(arrays, expected)
+
+
+@pytest.mark.parametrize("cell_size", [None, 25.0, 400.0])
+def test_queries_match_a_brute_force_filter(tmp_path, cell_size, random_arrays):
+    arrays = random_arrays(3000)
+    write_store(str(tmp_path), arrays, cell_size=cell_size, uv_resolution=16)
+    check_queries(TileStore(str(tmp_path)), arrays)
+
+
+def test_tiles_read_back_with_their_values(tmp_path, random_arrays):
+    arrays = random_arrays(500)
+    write_store(str(tmp_path), arrays)
+    store = TileStore(str(tmp_path))
+
+    read = store.arrays(store.query())
+    order = np.lexsort(read["frames"][:, :3].T[::-1])
+    expected = np.lexsort(arrays["frames"][:, :3].T[::-1])
+    for column in ("frames", "diameters", "uvs", "tags", "layers"):
+        assert np.array_equal(read[column][order], arrays[column][expected])
+    assert np.array_equal(read["palette"][read["colors"][order]], arrays["palette"][arrays["colors"][expected]])
+    assert len(store.tiles(read["ids"][:10])) == 10
+
+
+def test_empty_store(tmp_path, random_arrays):
+    write_store(str(tmp_path), random_arrays(0))
+    store = TileStore(str(tmp_path))
+
+    assert len(store) == 0
+    for ids in (store.query(), store.query_box(*BOX), store.query_uv(*UV), store.query_layer(0), store.query_tag(-1)):
+        assert len(ids) == 0
+    assert store.tiles(store.query()) == []
+
+
+def test_queries_of_a_store_reopened_after_a_patch(tmp_path, random_arrays):
+    old = random_arrays(2000)
+    write_store(str(tmp_path), old)
+
+    rng = np.random.default_rng(1)
+    kept = np.sort(rng.choice(2000, 1800, replace=False))
+    new = {column: values[kept] for column, values in old.items() if column not in ("palette", "layer_names")}
+    new["frames"][:100, :3] += 0.25
+    new["tags"][100:200] = 4
+    added = random_arrays(150, seed=2)
+    for column in new:
+        new[column] = np.concatenate([new[column], added[column]])
+    new["palette"] = old["palette"]
+    new["layer_names"] = ["0_GridLayer", "1_ImageLayer"]
+
+    store = TileStore(str(tmp_path))
+    apply_patch(store, diff_arrays(store.arrays(store.query()), new, tolerance=1.0))
+
+    check_queries(TileStore(str(tmp_path)), new)
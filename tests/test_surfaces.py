@@ -0,0 +1,25 @@
+import pytest
+
+from compas_urt.design.surfaces_numpy import IsoCurve
+from compas_urt.design.surfaces_numpy import PolylineCurve
+from compas_urt.design.surfaces_numpy import SaddleSurface
+
+
+@pytest.mark.parametrize(
+    "curve", [PolylineCurve([[0, 0, 0], [100, 0, 0], [100, 100, 0]]), IsoCurve(SaddleSurface(), "u", 0.5)]
+)
+def test_curves_reject_parameters_outside_of_the_domain(curve):
+    assert curve.point_at(0.0) == curve.start
+    assert curve.point_at(1.0) == curve.end
+    for t in (-0.01, 1.01):
+        with pytest.raises(Exception):
+            curve.point_at(t)
+        with pytest.raises(Exception):
+            curve.tangent_at(t)
+
+
+def test_divisions_stay_within_the_domain():
+    curve = IsoCurve(SaddleSurface(), "u", 0.5)
+    params = curve.divide_by_length(curve.length() / 7)
+    assert params[0] == 0.0 and params[-1] <= 1.0
+    assert [curve.point_at(t) for t in params]
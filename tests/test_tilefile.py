@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from compas.geometry import Frame
+
+from compas_urt.design import RoundTile
+from compas_urt.design.palette import palette_color
+from compas_urt.design.tilefile_numpy import TileWriter
+from compas_urt.design.tilefile_numpy import read_arrays
+from compas_urt.design.tilefile_numpy import read_tiles
+
+
+def make_tiles(count, tags):
+    colors = [palette_color(1.0, 0.0, 0.0), palette_color(0.0, 0.5, 1.0)]
+    return [
+        RoundTile(
+            Frame([i * 60.0, 0, i % 3], [1, 0, 0], [0, 1, 0]),
+            50.0 + i % 2,
+            5.0,
+            (i / 10.0, 0.5),
+            colors[i % 2],
+            tags[i],
+        )
+        for i in range(count)
+    ]
+
+
+def test_tiles_round_trip(tmp_path):
+    path = str(tmp_path / "design.tiles")
+    tiles = make_tiles(25, [None, 1, 2, 3, 4] * 5)
+    with TileWriter(path, chunk_size=10) as writer:
+        writer.write_tiles(tiles[:12], "a")
+        writer.write_tiles(tiles[12:], "b")
+
+    read = read_tiles(path)
+    assert [tile.frame_values for tile in read] == [tile.frame_values for tile in tiles]
+    assert [(tile.diameter, tile.thickness, tuple(tile.uv_param)) for tile in read] == [
+        (tile.diameter, tile.thickness, tuple(tile.uv_param)) for tile in tiles
+    ]
+    assert [tile.color for tile in read] == [tile.color for tile in tiles]
+    assert [tile.tag for tile in read] == [tile.tag for tile in tiles]
+    assert read_arrays(path)["layers"].tolist() == [0] * 12 + [1] * 13
+
+
+def test_numpy_integer_tags_can_be_written(tmp_path):
+    path = str(tmp_path / "design.tiles")
+    tags = np.arange(4, dtype=np.int64)
+    with TileWriter(path) as writer:
+        writer.write_tiles(make_tiles(4, list(tags)))
+
+    assert read_arrays(path)["tags"].tolist() == [0, 1, 2, 3]
+
+
+def test_other_tags_are_rejected(tmp_path):
+    with pytest.raises(Exception):
+        with TileWriter(str(tmp_path / "design.tiles")) as writer:
+            writer.write_tiles(make_tiles(1, ["red"]))
+    assert not (tmp_path / "design.tiles").exists()
+
+
+def test_a_failed_design_leaves_no_file(tmp_path):
+    path = tmp_path / "design.tiles"
+
+    def tiles():
+        for tile in make_tiles(25, [None] * 25):
+            yield tile
+        raise RuntimeError("generation failed")
+
+    with pytest.raises(RuntimeError):
+        with TileWriter(str(path), chunk_size=10) as writer:
+            writer.write_tiles(tiles())
+
+    assert writer.chunks == 2
+    assert not path.exists()